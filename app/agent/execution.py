@@ -0,0 +1,159 @@
+import asyncio
+import re
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Hashable, Optional
+
+from app.config import settings
+from app.utils.helpers import normalize_text
+
+# Nombre d'attentes conservées pour les statistiques
+WAIT_SAMPLES = 500
+
+_WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+def normalize_question(text: str) -> str:
+    """Forme canonique d'une question (minuscules, sans accents ni ponctuation)"""
+    return " ".join(_WORD_PATTERN.findall(normalize_text(text)))
+
+class _Abandoned(Exception):
+    """Le meneur a été annulé avant de répondre : les suiveurs relancent l'appel"""
+
+class Flight:
+    """Appel en cours pour une question : le meneur l'exécute, les suiveurs reçoivent sa réponse"""
+
+    __slots__ = ("key", "result", "output")
+
+    def __init__(self, key: Optional[Hashable], result: Optional[str] = None):
+        self.key = key
+        self.result = result
+        self.output: Optional[str] = None
+
+    @property
+    def coalesced(self) -> bool:
+        """Vrai pour un suiveur : la réponse d'un appel identique est déjà dans result"""
+        return self.result is not None
+
+    def publish(self, output: str):
+        """Réponse du meneur, transmise à tous les suiveurs"""
+        self.output = output
+
+class InteractionGate:
+    """Couche d'exécution des appels au LLM : concurrence bornée et dédoublonnage.
+
+    Au plus max_concurrent appels s'exécutent à la fois ; les suivants
+    attendent dans une file FIFO (les tours d'un même visiteur étant déjà
+    sérialisés, chaque visiteur y occupe au plus une place). Les questions
+    identiques après normalisation partagent un seul appel : le premier
+    arrivé le mène, les autres attendent sa réponse sans prendre de place
+    dans la file.
+    """
+
+    def __init__(self, max_concurrent: int = 4):
+        self.max_concurrent = max_concurrent
+        self._active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._waits: Deque[float] = deque(maxlen=WAIT_SAMPLES)
+        self.max_queue_depth = 0
+        self.led = 0
+        self.coalesced = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def _release(self):
+        """Libère une place : elle passe directement au premier de la file"""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._active -= 1
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Place d'exécution, attribuée dans l'ordre d'arrivée"""
+        started = time.perf_counter()
+        if self._active < self.max_concurrent and not self._waiters:
+            self._active += 1
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            self.max_queue_depth = max(self.max_queue_depth, len(self._waiters))
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # Place reçue au moment de l'annulation : on la rend
+                    self._release()
+                elif waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                raise
+        self._waits.append(time.perf_counter() - started)
+        try:
+            yield
+        finally:
+            self._release()
+
+    @asynccontextmanager
+    async def flight(self, key: Optional[Hashable]) -> AsyncIterator[Flight]:
+        """Appel dédoublonné : suiveur si une question identique est en cours, meneur sinon.
+
+        Le meneur détient une place d'exécution pendant tout le bloc et doit
+        publier sa réponse ; sans clé (question liée à l'historique), l'appel
+        n'est jamais partagé.
+        """
+        while key is not None and key in self._inflight:
+            try:
+                result = await asyncio.shield(self._inflight[key])
+            except _Abandoned:
+                continue
+            self.coalesced += 1
+            yield Flight(key, result)
+            return
+
+        flight = Flight(key)
+        pending = None
+        if key is not None:
+            pending = asyncio.get_running_loop().create_future()
+            self._inflight[key] = pending
+        self.led += 1
+        try:
+            async with self.slot():
+                yield flight
+        except BaseException as e:
+            if pending is not None:
+                abandoned = isinstance(e, (asyncio.CancelledError, GeneratorExit))
+                pending.set_exception(_Abandoned() if abandoned else e)
+                pending.exception()  # Pas d'avertissement si personne n'attendait
+            raise
+        else:
+            if pending is not None:
+                if flight.output is not None:
+                    pending.set_result(flight.output)
+                else:
+                    pending.set_exception(_Abandoned())
+                    pending.exception()
+        finally:
+            if pending is not None and self._inflight.get(key) is pending:
+                del self._inflight[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """File d'attente, temps d'attente et appels partagés"""
+        waits = sorted(self._waits)
+        return {
+            "max_concurrent": self.max_concurrent,
+            "active": self._active,
+            "queue_depth": len(self._waiters),
+            "max_queue_depth": self.max_queue_depth,
+            "in_flight": len(self._inflight),
+            "led": self.led,
+            "coalesced": self.coalesced,
+            "wait_avg_ms": round(sum(waits) * 1000 / len(waits), 1) if waits else 0.0,
+            "wait_p95_ms": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000, 1) if waits else 0.0
+        }
+
+agent_gate = InteractionGate(settings.AGENT_MAX_CONCURRENCY)
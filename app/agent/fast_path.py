@@ -0,0 +1,222 @@
+import re
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from app.models.salon import Salon
+from app.utils.helpers import normalize_text
+from app.utils.intent_matcher import intent_matcher
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Au-delà, la demande est rarement une simple consultation
+MAX_FAST_PATH_WORDS = 12
+
+# Mots sans contenu : politesse, articles, formules de question
+FILLER_WORDS = {
+    "bonjour", "bonsoir", "salut", "svp", "stp", "s'il", "vous", "te", "plait", "plaît", "merci",
+    "ou", "où", "se", "trouve", "trouvent", "sont", "est", "es", "c'est", "il", "y", "a", "ya",
+    "le", "la", "les", "l'", "un", "une", "des", "de", "du", "d'", "au", "aux", "à", "en",
+    "je", "j'", "cherche", "voudrais", "veux", "aimerais", "peux", "pouvez", "pourriez",
+    "trouver", "aller", "voir", "me", "moi", "m'", "montrer", "montrez", "montre", "afficher",
+    "affiche", "donner", "donnez", "donne", "quel", "quelle", "quels", "quelles",
+    "que", "qu'il", "qu'est", "ce", "quoi", "puis", "numéro", "n°", "no", "plus", "proche",
+    "proches", "s'", "toilette", "salon"
+}
+
+# Mots qui signalent une demande à raisonner (conseil, comparaison, explication)
+REASONING_WORDS = {
+    "pourquoi", "comment", "conseil", "conseillez", "recommande", "recommandez", "meilleur",
+    "meilleure", "mieux", "intéressant", "intéressante", "pas", "ne", "sans",
+    "comparer", "différence", "avis", "pense", "pensez"
+}
+
+# Mots du programme pris en charge sans l'agent ("horaires" reste à l'agent : souvent ceux du lieu)
+SCHEDULE_WORDS = ("programme", "planning", "agenda", "événement", "evenement")
+
+# Mots qui font d'une demande de stand une demande d'itinéraire
+DIRECTION_WORDS = {"où", "ou", "aller", "trouver", "direction", "chemin", "trouve"}
+
+_TOKEN_PATTERN = re.compile(r"[\w'’°]+")
+
+# Réponses : sortie de l'outil dans un gabarit par intention
+FAST_PATH_TEMPLATES = {
+    "facility": "{result}\n\nAutre chose pour vous aider ? 😊",
+    "map": "{result}",
+    "booth_location": "{result}\nBonne visite ! 🚶",
+    "exhibitor": "{result}\n\nVoulez-vous l'itinéraire jusqu'à ce stand ? 🗺️",
+    "schedule": "{result}\n\nUn événement vous intéresse ? Je peux vous y guider ! 🎤"
+}
+
+class FastPathDecision(NamedTuple):
+    """Intention reconnue sans ambiguïté et appel d'outil correspondant"""
+    intent: str
+    tool: str
+    argument: str
+
+class FastPathRouter:
+    """Réponses directes aux demandes reconnaissables, sans passer par le LLM.
+
+    Une demande est prise en charge quand elle relève d'une seule intention
+    (service, plan, stand ou exposant, programme) et que chacun de ses mots
+    est expliqué : mot-clé de l'intention, numéro de stand, nom d'exposant ou
+    mot sans contenu. Sinon elle est laissée à l'agent.
+    """
+
+    def __init__(self, salon_data: Salon, tools: Dict[str, Any]):
+        self.salon_data = salon_data
+        self.tools = tools
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hits = 0
+        self.errors = 0
+        self.hits_by_intent: Dict[str, int] = {}
+        self._hit_seconds = 0.0
+
+    @staticmethod
+    def _tokens(text: str) -> List[str]:
+        return [token.replace("’", "'") for token in _TOKEN_PATTERN.findall(text.lower())]
+
+    @staticmethod
+    def _is_word(token: str, keywords) -> bool:
+        """Vrai si le mot (sans élision, accents ni marque du pluriel) est l'un des mots-clés"""
+        bare = normalize_text(token.split("'", 1)[-1] if "'" in token[:3] else token)
+        return any(bare in (k, k + "s", k + "x") for k in map(normalize_text, keywords))
+
+    def _unexplained(self, tokens: List[str], keywords: List[str], extra: Optional[set] = None) -> List[str]:
+        """Mots qui ne sont ni des mots-clés reconnus, ni des mots sans contenu"""
+        left = []
+        for token in tokens:
+            bare = token.split("'", 1)[-1] if "'" in token[:3] else token
+            if token in FILLER_WORDS or bare in FILLER_WORDS or (extra and token in extra):
+                continue
+            if token in keywords or self._is_word(token, keywords):
+                continue
+            left.append(token)
+        return left
+
+    def route(self, text: str) -> Optional[FastPathDecision]:
+        """Intention reconnue avec certitude (None : la demande va à l'agent)"""
+        tokens = self._tokens(text)
+        if not tokens or len(tokens) > MAX_FAST_PATH_WORDS:
+            return None
+        if any(token in REASONING_WORDS for token in tokens):
+            return None
+
+        match = intent_matcher.match(text, whole_words=True)
+        facilities = [i for i in ("navigation.toilettes", "navigation.restauration",
+                                  "navigation.accueil", "navigation.sortie") if match.has(i)]
+        schedule_keywords = [token for token in tokens if self._is_word(token, SCHEDULE_WORDS)]
+        exhibitor = self.salon_data.find_exhibitor_by_booth_in_text(text)
+        booth_tokens = set()
+        if exhibitor is not None:
+            booth = exhibitor.booth_number.lower()
+            booth_tokens = {token for token in tokens if token in booth}
+
+        candidates = []
+        if facilities:
+            candidates.append("facility")
+        if match.has("navigation.map"):
+            candidates.append("map")
+        if exhibitor is not None:
+            candidates.append("booth")
+        if schedule_keywords:
+            candidates.append("schedule")
+
+        # Nom d'exposant cité seul ("EcoTech", "le stand de GreenWave")
+        if not candidates:
+            content = [t for t in tokens if t not in FILLER_WORDS and t != "stand"]
+            named = self.salon_data.get_exhibitor_by_name(" ".join(content)) if content else None
+            if named is not None:
+                return FastPathDecision("exhibitor", "exhibitor_info", named.booth_number)
+            return None
+
+        if len(candidates) != 1:
+            return None
+        kind = candidates[0]
+        keywords = match.keywords + ["stand"]
+
+        if kind == "facility":
+            if len(facilities) != 1 or self._unexplained(tokens, keywords):
+                return None
+            return FastPathDecision("facility", "navigation", text)
+
+        if kind == "map":
+            if self._unexplained(tokens, keywords):
+                return None
+            return FastPathDecision("map", "navigation", "plan")
+
+        if kind == "booth":
+            if self._unexplained(tokens, keywords, booth_tokens | DIRECTION_WORDS):
+                return None
+            if any(token in DIRECTION_WORDS for token in tokens) or match.has("query.navigation"):
+                return FastPathDecision("booth_location", "navigation", f"stand {exhibitor.booth_number}")
+            return FastPathDecision("exhibitor", "exhibitor_info", exhibitor.booth_number)
+
+        # Programme : aujourd'hui par défaut, demain ou complet si demandé
+        if self._unexplained(tokens, keywords + list(SCHEDULE_WORDS)):
+            return None
+        if match.has("schedule.tomorrow"):
+            return FastPathDecision("schedule", "event_schedule", "demain")
+        if match.has("schedule.all"):
+            return FastPathDecision("schedule", "event_schedule", "tous")
+        return FastPathDecision("schedule", "event_schedule", "aujourd'hui")
+
+    def answer(self, text: str) -> Optional[str]:
+        """Réponse directe, ou None si la demande doit passer par l'agent"""
+        started = time.perf_counter()
+        decision, tool = self._resolve(text)
+        result = None
+        if tool is not None:
+            try:
+                result = tool._run(decision.argument)
+            except Exception as e:
+                self._failed(decision, e)
+        return self._respond(decision, result, started)
+
+    async def aanswer(self, text: str) -> Optional[str]:
+        """Version asynchrone : l'outil s'exécute dans son pool, hors de la boucle d'événements"""
+        started = time.perf_counter()
+        decision, tool = self._resolve(text)
+        result = None
+        if tool is not None:
+            try:
+                result = await tool._arun(decision.argument)
+            except Exception as e:
+                self._failed(decision, e)
+        return self._respond(decision, result, started)
+
+    def _resolve(self, text: str) -> Tuple[Optional[FastPathDecision], Any]:
+        decision = self.route(text)
+        return decision, self.tools.get(decision.tool) if decision else None
+
+    def _failed(self, decision: FastPathDecision, error: Exception):
+        logger.error(f"❌ Fast path {decision.intent} failed: {error}")
+        with self._lock:
+            self.errors += 1
+
+    def _respond(self, decision: Optional[FastPathDecision], result: Optional[str], started: float) -> Optional[str]:
+        """Comptabilise la demande et met le résultat de l'outil en forme"""
+        with self._lock:
+            self.requests += 1
+            if result is not None:
+                self.hits += 1
+                self.hits_by_intent[decision.intent] = self.hits_by_intent.get(decision.intent, 0) + 1
+                self._hit_seconds += time.perf_counter() - started
+
+        if result is None:
+            return None
+        return FAST_PATH_TEMPLATES[decision.intent].format(result=result.strip())
+
+    def stats(self) -> Dict[str, Any]:
+        """Taux de réponses directes et répartition par intention"""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "hits": self.hits,
+                "hit_rate": round(self.hits / self.requests, 3) if self.requests else 0.0,
+                "errors": self.errors,
+                "hits_by_intent": dict(self.hits_by_intent),
+                "avg_hit_ms": round(self._hit_seconds * 1000 / self.hits, 2) if self.hits else 0.0
+            }
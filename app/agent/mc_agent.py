@@ -1,12 +1,14 @@
 import asyncio
 import logging
-from typing import Dict, List, Optional, Any
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Any
 from datetime import datetime
+from uuid import UUID
 
-from langchain.agents import AgentExecutor, create_openai_functions_agent
+from langchain.agents import AgentExecutor, create_openai_tools_agent
+from langchain.callbacks.base import BaseCallbackHandler
 from langchain.tools import BaseTool
 from langchain.schema import HumanMessage, AIMessage
-from langchain.memory import ConversationBufferWindowMemory
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_openai import ChatOpenAI
 
@@ -15,17 +17,57 @@ from app.models.salon import Salon
 from app.tools.exhibitor_tools import ExhibitorInfoTool
 from app.tools.event_tools import EventScheduleTool
 from app.tools.navigation_tools import NavigationTool
+from app.agent.fast_path import FastPathRouter
+from app.agent.execution import Flight, agent_gate, normalize_question
+from app.agent.response_cache import SemanticResponseCache, response_cache
+from app.agent.sessions import session_store
+from app.agent.streaming import SentenceChunker, split_sentences
+from app.agent.token_budget import MESSAGE_OVERHEAD_TOKENS, count_tokens, token_budget
 from app.utils.logger import setup_logger
+from app.utils.intent_matcher import intent_matcher
 from app.utils.exceptions import AgentError
+from app.utils.metrics import INTERACTION_SECONDS, INTERACTIONS_TOTAL, LLM_ERRORS_TOTAL, LLM_SECONDS, QUERIES_TOTAL, metrics
 
  
 
-logger = setup_logger(_name_)
+logger = setup_logger(__name__)
+
+# Session des appels sans identifiant de visiteur
+DEFAULT_SESSION_ID = "default"
+
+class LLMTimer(BaseCallbackHandler):
+    """Durée de chaque appel au modèle, de l'envoi du prompt à la fin de la génération"""
+    
+    run_inline = True
+    
+    def __init__(self):
+        super().__init__()
+        self._started: Dict[UUID, float] = {}
+    
+    @property
+    def active(self) -> int:
+        """Appels au modèle en cours"""
+        return len(self._started)
+    
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[Any], *, run_id: UUID, **kwargs: Any):
+        self._started[run_id] = time.perf_counter()
+    
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any):
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            LLM_SECONDS.observe(time.perf_counter() - started)
+    
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._started.pop(run_id, None)
+        LLM_ERRORS_TOTAL.inc()
+
+llm_timer = LLMTimer()
+metrics.gauge("mc_llm_active_calls", "Appels au modèle de langage en cours").set_function(lambda: llm_timer.active)
 
 class MasterOfCeremoniesAgent:
     """Agent principal servant de maître de cérémonie"""
     
-    def _init_(self, salon_data: Optional[Salon] = None):
+    def __init__(self, salon_data: Optional[Salon] = None):
         self.salon_data = salon_data
         self.interaction_count = 0
         self.session_stats = {
@@ -40,6 +82,7 @@ class MasterOfCeremoniesAgent:
         self._initialize_memory()
         self._initialize_tools()
         self._initialize_agent()
+        self._initialize_fast_path()
     
     def _initialize_llm(self):
         """Initialise le modèle de langage"""
@@ -48,7 +91,9 @@ class MasterOfCeremoniesAgent:
                 model="gpt-4",
                 temperature=0.7,
                 openai_api_key=settings.OPENAI_API_KEY,
-                max_tokens=500
+                max_tokens=500,
+                streaming=True,
+                callbacks=[llm_timer]
             )
             logger.info("✅ LLM initialized successfully")
         except Exception as e:
@@ -56,14 +101,10 @@ class MasterOfCeremoniesAgent:
             raise AgentError(f"LLM setup failed: {e}")
     
     def _initialize_memory(self):
-        """Initialise la mémoire conversationnelle"""
-        self.memory = ConversationBufferWindowMemory(
-            memory_key="chat_history",
-            return_messages=True,
-            k=15,  # Garder les 15 derniers échanges
-            human_prefix="Visiteur",
-            ai_prefix="Assistant"
-        )
+        """Initialise la mémoire conversationnelle (une session par visiteur, magasin partagé)"""
+        self.sessions = session_store
+        self.gate = agent_gate
+        self._session_prefix = f"{self.salon_data.id if self.salon_data else '-'}:"
         logger.info("✅ Memory initialized")
     
     def _initialize_tools(self):
@@ -81,10 +122,12 @@ class MasterOfCeremoniesAgent:
     
     def _initialize_agent(self):
         """Initialise l'agent avec son prompt système"""
+        self.budget = token_budget
         system_prompt = self._create_system_prompt()
         
         try:
-            self.agent = create_openai_functions_agent(
+            # Appels d'outils multiples par étape, exécutés en parallèle par l'exécuteur (asynchrone)
+            self.agent = create_openai_tools_agent(
                 llm=self.llm,
                 tools=self.tools,
                 prompt=system_prompt
@@ -93,10 +136,10 @@ class MasterOfCeremoniesAgent:
             self.agent_executor = AgentExecutor(
                 agent=self.agent,
                 tools=self.tools,
-                memory=self.memory,
                 verbose=settings.DEBUG,
                 max_iterations=3,
-                handle_parsing_errors=True
+                handle_parsing_errors=True,
+                trim_intermediate_steps=self.budget.trim_steps
             )
             
             logger.info("✅ Agent initialized successfully")
@@ -105,6 +148,13 @@ class MasterOfCeremoniesAgent:
             logger.error(f"❌ Agent initialization failed: {e}")
             raise AgentError(f"Agent setup failed: {e}")
     
+    def _initialize_fast_path(self):
+        """Initialise les réponses directes (demandes reconnaissables sans LLM)"""
+        self.fast_path = None
+        if self.salon_data and settings.FAST_PATH_ENABLED:
+            self.fast_path = FastPathRouter(self.salon_data, {tool.name: tool for tool in self.tools})
+            logger.info("✅ Fast path initialized")
+    
     def _create_system_prompt(self) -> ChatPromptTemplate:
         """Crée le prompt système pour l'agent"""
         salon_info = ""
@@ -118,8 +168,7 @@ class MasterOfCeremoniesAgent:
             - Nombre d'événements: {len(self.salon_data.events)}
             """
         
-        return ChatPromptTemplate.from_messages([
-            ("system", f"""
+        system_text = f"""
             Vous êtes l'assistant IA maître de cérémonie du salon professionnel.
             
             VOTRE MISSION:
@@ -145,40 +194,198 @@ class MasterOfCeremoniesAgent:
             {salon_info}
             
             Utilisez les outils disponibles pour répondre précisément aux questions.
-            """),
+            """
+        
+        # Part fixe de chaque requête : consignes et définitions des outils
+        self._system_tokens = count_tokens(system_text) + sum(
+            count_tokens(f"{tool.name} {tool.description}") + MESSAGE_OVERHEAD_TOKENS for tool in self.tools
+        )
+        
+        return ChatPromptTemplate.from_messages([
+            ("system", system_text),
             MessagesPlaceholder(variable_name="chat_history"),
             ("human", "{input}"),
             MessagesPlaceholder(variable_name="agent_scratchpad")
         ])
     
-    async def process_interaction(self, user_input: str, context: Dict[str, Any] = None) -> str:
+    async def process_interaction(self, user_input: str, context: Dict[str, Any] = None,
+                                  session_id: str = DEFAULT_SESSION_ID) -> str:
         """Traite une interaction avec un visiteur"""
+        key = self._session_key(session_id)
+        async with self.sessions.turn(key):
+            started = time.perf_counter()
+            path = "agent"
+            try:
+                self.interaction_count += 1
+                self.session_stats["interactions"] += 1
+                
+                direct = await self._direct_answer(user_input, context, key)
+                if direct is not None:
+                    path, answer = direct
+                    return answer
+                
+                async with self.gate.flight(self._flight_key(user_input, context)) as flight:
+                    if flight.coalesced:
+                        path = "shared"
+                        return self._record_shared(user_input, flight.result, key)
+                    
+                    # Traitement par l'agent, avec l'historique du seul visiteur (borné en jetons)
+                    enhanced_input = self._enhance_input(user_input, context)
+                    with self.budget.request(self._system_tokens, enhanced_input) as usage:
+                        response = await self.agent_executor.ainvoke({
+                            "input": enhanced_input,
+                            "chat_history": self.budget.fit_history(self.sessions.history(key), usage)
+                        })
+                    flight.publish(response["output"])
+                
+                self._record_answer(user_input, context, response["output"], key)
+                logger.info(f"🤖 Interaction #{self.interaction_count} processed")
+                return response["output"]
+                
+            except Exception as e:
+                logger.error(f"❌ Interaction processing failed: {e}")
+                path = "fallback"
+                return self._get_fallback_response(user_input)
+            finally:
+                self._observe(path, started)
+    
+    async def stream_interaction(self, user_input: str, context: Dict[str, Any] = None,
+                                 session_id: str = DEFAULT_SESSION_ID) -> AsyncIterator[str]:
+        """Traite une interaction en produisant la réponse phrase par phrase, au fil de la génération"""
+        key = self._session_key(session_id)
+        async with self.sessions.turn(key):
+            async for sentence in self._stream_locked(user_input, context, key):
+                yield sentence
+    
+    async def _stream_locked(self, user_input: str, context: Optional[Dict[str, Any]], key: str) -> AsyncIterator[str]:
+        started = time.perf_counter()
+        self.interaction_count += 1
+        self.session_stats["interactions"] += 1
+        
         try:
-            self.interaction_count += 1
-            self.session_stats["interactions"] += 1
-            
-            # Ajouter du contexte si disponible
-            enhanced_input = user_input
-            if context:
-                if context.get("visitor_count", 0) > 1:
-                    enhanced_input += f" [Contexte: {context['visitor_count']} visiteurs présents]"
-                if context.get("time_of_day"):
-                    enhanced_input += f" [Heure: {context['time_of_day']}]"
-            
-            # Traitement par l'agent
-            response = await self.agent_executor.ainvoke({
-                "input": enhanced_input
-            })
-            
-            # Mettre à jour les statistiques
-            self._update_stats(user_input, response["output"])
-            
-            logger.info(f"🤖 Interaction #{self.interaction_count} processed")
-            return response["output"]
-            
+            direct = await self._direct_answer(user_input, context, key)
         except Exception as e:
             logger.error(f"❌ Interaction processing failed: {e}")
-            return self._get_fallback_response(user_input)
+            direct = "fallback", self._get_fallback_response(user_input)
+        if direct is not None:
+            path, answer = direct
+            for sentence in split_sentences(answer):
+                yield sentence
+            self._observe(path, started)
+            return
+        
+        async with self.gate.flight(self._flight_key(user_input, context)) as flight:
+            if flight.coalesced:
+                for sentence in split_sentences(self._record_shared(user_input, flight.result, key)):
+                    yield sentence
+                self._observe("shared", started)
+                return
+            async for sentence in self._stream_agent(user_input, context, key, flight, started):
+                yield sentence
+    
+    async def _stream_agent(self, user_input: str, context: Optional[Dict[str, Any]], key: str,
+                            flight: Flight, started: float) -> AsyncIterator[str]:
+        chunker = SentenceChunker()
+        parts: List[str] = []
+        output = None
+        enhanced_input = self._enhance_input(user_input, context)
+        with self.budget.request(self._system_tokens, enhanced_input) as usage:
+            try:
+                # Seuls les jetons de texte sont relayés (les appels d'outils n'en produisent pas)
+                async for event in self.agent_executor.astream_events(
+                    {"input": enhanced_input, "chat_history": self.budget.fit_history(self.sessions.history(key), usage)},
+                    version="v1"
+                ):
+                    if event["event"] == "on_chat_model_stream":
+                        token = event["data"]["chunk"].content
+                        if token:
+                            parts.append(token)
+                            for sentence in chunker.feed(token):
+                                yield sentence
+                    elif event["event"] == "on_chain_end" and event["name"] == "AgentExecutor":
+                        output = (event["data"].get("output") or {}).get("output")
+            
+                for sentence in chunker.flush():
+                    yield sentence
+            except Exception as e:
+                logger.error(f"❌ Streamed interaction failed: {e}")
+                if not parts:
+                    yield self._get_fallback_response(user_input)
+                self._observe("fallback", started)
+                return
+        
+        output = output or "".join(parts)
+        if not output:
+            yield self._get_fallback_response(user_input)
+            self._observe("fallback", started)
+            return
+        if not parts:
+            # Modèle sans diffusion : la réponse arrive d'un bloc
+            for sentence in split_sentences(output):
+                yield sentence
+        flight.publish(output)
+        self._record_answer(user_input, context, output, key)
+        self._observe("agent", started)
+        logger.info(f"🤖 Interaction #{self.interaction_count} streamed")
+    
+    def _session_key(self, session_id: str) -> str:
+        """Clé de session propre au salon (les identifiants de visiteur sont partagés entre salons)"""
+        return self._session_prefix + session_id
+    
+    async def _direct_answer(self, user_input: str, context: Optional[Dict[str, Any]],
+                             key: str) -> Optional[Tuple[str, str]]:
+        """Réponse sans appel au LLM (réponses directes, puis cache), enregistrée en mémoire ; retourne (chemin, réponse)"""
+        # Demandes reconnaissables : réponse directe, sans appel au LLM
+        if self.fast_path is not None:
+            answer = await self.fast_path.aanswer(user_input)
+            if answer is not None:
+                self.sessions.record(key, user_input, answer)
+                self._update_stats(user_input, answer)
+                logger.info(f"⚡ Interaction #{self.interaction_count} answered by fast path")
+                return "fast_path", answer
+        
+        # Question déjà posée autrement : réponse mémorisée (sans contexte de la salle)
+        if self._use_response_cache(context):
+            cached = response_cache.get(self.salon_data, user_input)
+            if cached is not None:
+                self.sessions.record(key, user_input, cached)
+                self._update_stats(user_input, cached)
+                logger.info(f"💾 Interaction #{self.interaction_count} answered from response cache")
+                return "cache", cached
+        return None
+    
+    def _flight_key(self, user_input: str, context: Optional[Dict[str, Any]]) -> Optional[Tuple[str, int, str]]:
+        """Clé de dédoublonnage des appels identiques (None si la réponse dépend de l'historique)"""
+        if self.salon_data is None or context or not SemanticResponseCache.eligible(user_input):
+            return None
+        return self.salon_data.id, self.salon_data.version, normalize_question(user_input)
+    
+    def _record_shared(self, user_input: str, output: str, key: str) -> str:
+        """Réponse d'un appel identique mené pour un autre visiteur"""
+        self.sessions.record(key, user_input, output)
+        self._update_stats(user_input, output)
+        logger.info(f"🔗 Interaction #{self.interaction_count} shared an identical in-flight call")
+        return output
+    
+    def _use_response_cache(self, context: Optional[Dict[str, Any]]) -> bool:
+        return self.salon_data is not None and settings.RESPONSE_CACHE_ENABLED and not context
+    
+    def _enhance_input(self, user_input: str, context: Optional[Dict[str, Any]]) -> str:
+        """Ajoute le contexte de la salle à la question"""
+        enhanced_input = user_input
+        if context:
+            if context.get("visitor_count", 0) > 1:
+                enhanced_input += f" [Contexte: {context['visitor_count']} visiteurs présents]"
+            if context.get("time_of_day"):
+                enhanced_input += f" [Heure: {context['time_of_day']}]"
+        return enhanced_input
+    
+    def _record_answer(self, user_input: str, context: Optional[Dict[str, Any]], output: str, key: str):
+        """Historique, statistiques et cache après une réponse de l'agent"""
+        self.sessions.record(key, user_input, output)
+        self._update_stats(user_input, output)
+        if self._use_response_cache(context):
+            response_cache.set(self.salon_data, user_input, output)
     
     def _update_stats(self, user_input: str, response: str):
         """Met à jour les statistiques d'interaction"""
@@ -186,21 +393,21 @@ class MasterOfCeremoniesAgent:
         query_type = self._classify_query(user_input)
         self.session_stats["popular_queries"][query_type] = \
             self.session_stats["popular_queries"].get(query_type, 0) + 1
+        QUERIES_TOTAL.labels(query_type).inc()
+    
+    @staticmethod
+    def _observe(path: str, started: float):
+        """Durée de bout en bout d'une interaction, par chemin de réponse"""
+        INTERACTION_SECONDS.labels(path).observe(time.perf_counter() - started)
+        INTERACTIONS_TOTAL.labels(path).inc()
     
     def _classify_query(self, query: str) -> str:
         """Classifie automatiquement le type de requête"""
-        query_lower = query.lower()
-        
-        keywords = {
-            "exposants": ["exposant", "stand", "entreprise", "société", "booth"],
-            "événements": ["événement", "programme", "conférence", "atelier", "horaire"],
-            "navigation": ["où", "direction", "aller", "trouver", "chemin", "plan"],
-            "services": ["service", "aide", "assistance", "info", "renseignement"],
-            "général": []
-        }
+        categories = intent_matcher.match(query).with_prefix("query.")
         
-        for category, words in keywords.items():
-            if any(word in query_lower for word in words):
+        # Même priorité que l'ordre de la table des mots-clés
+        for category in ("exposants", "événements", "navigation", "services"):
+            if category in categories:
                 return category
         
         return "général"
@@ -222,11 +429,19 @@ class MasterOfCeremoniesAgent:
         
         return {
             **self.session_stats,
+            "fast_path": self.fast_path.stats() if self.fast_path else None,
+            "response_cache": response_cache.stats() if settings.RESPONSE_CACHE_ENABLED else None,
+            "sessions": self.sessions.stats(),
+            "execution": self.gate.stats(),
+            "tokens": self.budget.stats(),
             "session_duration": str(duration),
             "interactions_per_hour": round(self.session_stats["interactions"] / max(duration.total_seconds() / 3600, 0.1), 1)
         }
     
-    def reset_memory(self):
-        """Remet à zéro la mémoire conversationnelle"""
-        self.memory.clear()
+    def reset_memory(self, session_id: Optional[str] = None):
+        """Remet à zéro la mémoire conversationnelle (d'un visiteur, ou de tous ceux du salon)"""
+        if session_id is not None:
+            self.sessions.discard(self._session_key(session_id))
+        else:
+            self.sessions.clear(self._session_prefix)
         logger.info("🧹 Memory cleared")
@@ -0,0 +1,245 @@
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from app.config import settings
+from app.models.route_matrix import RouteMatrix
+from app.models.salon import Salon
+from app.models.venue_graph import estimate_node_count
+from app.utils.helpers import load_json_file
+from app.utils.logger import setup_logger
+from app.utils.exceptions import SalonNotFoundError
+
+logger = setup_logger(__name__)
+
+_SALON_ID_PATTERN = re.compile(r"^[\w-]+$")
+
+def load_salon_file(salon_id: str) -> Salon:
+    """Charge un salon depuis SALON_DATA_DIR/<salon_id>.json"""
+    if not _SALON_ID_PATTERN.match(salon_id):
+        raise SalonNotFoundError(f"Identifiant de salon invalide: {salon_id}")
+
+    data = load_json_file(os.path.join(settings.SALON_DATA_DIR, f"{salon_id}.json"))
+    if not data:
+        raise SalonNotFoundError(f"Salon introuvable: {salon_id}")
+
+    data.setdefault("id", salon_id)
+    return Salon.parse_obj(data)
+
+def estimate_salon_bytes(salon: Salon) -> int:
+    """Estimation de la mémoire occupée par les modèles, l'instantané et la matrice
+    des trajets d'un salon (la matrice, construite au premier trajet, est estimée
+    d'après le nombre de nœuds du plan)"""
+    total = salon.catalog.nbytes() + RouteMatrix.estimate_nbytes(estimate_node_count(salon))
+    for record in [*salon.exhibitors, *salon.events]:
+        total += sys.getsizeof(record.__dict__)
+        for value in record.__dict__.values():
+            total += sys.getsizeof(value)
+            if isinstance(value, list):
+                total += sum(sys.getsizeof(item) for item in value)
+    return total
+
+class SalonEngine:
+    """Salon chargé et son agent, construit à la première interaction"""
+
+    def __init__(self, salon: Salon, agent_factory: Callable[[Salon], Any]):
+        self.salon = salon
+        self._estimate_key = None
+        self._estimated_bytes = 0
+        self.last_used = time.monotonic()
+        self.active_sessions = 0
+        self._agent = None
+        self._agent_factory = agent_factory
+        self._lock = threading.Lock()
+
+    @property
+    def estimated_bytes(self) -> int:
+        """Estimation mémoire du salon, recalculée quand son plan ou sa taille change"""
+        salon = self.salon
+        key = (salon.layout_version, len(salon.exhibitors), len(salon.events))
+        if key != self._estimate_key:
+            self._estimated_bytes = estimate_salon_bytes(salon)
+            self._estimate_key = key
+        return self._estimated_bytes
+
+    @property
+    def agent(self) -> Any:
+        """Agent du salon (outils et index construits au premier accès)"""
+        with self._lock:
+            if self._agent is None:
+                self._agent = self._agent_factory(self.salon)
+                logger.info(f"Agent built for salon {self.salon.id}")
+            return self._agent
+
+    @property
+    def built_agent(self) -> Optional[Any]:
+        """Agent du salon s'il est déjà construit (None sinon, sans le construire)"""
+        return self._agent
+
+    def touch(self):
+        self.last_used = time.monotonic()
+
+class SalonRegistry:
+    """Registre des salons servis par le processus.
+
+    Chaque salon est chargé à sa première demande puis gardé en ordre LRU.
+    Au-delà du budget mémoire (ou du nombre maximal de salons), les salons
+    les moins récemment utilisés sont évincés, sauf ceux qui ont une session
+    WebSocket ouverte.
+    """
+
+    def __init__(self, loader: Callable[[str], Salon], agent_factory: Callable[[Salon], Any],
+                 max_bytes: int, max_salons: int = 16):
+        self.max_bytes = max_bytes
+        self.max_salons = max_salons
+        self._loader = loader
+        self._agent_factory = agent_factory
+        self._engines: "OrderedDict[str, SalonEngine]" = OrderedDict()
+        self._building: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[], None]] = []
+        self.loads = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._engines)
+
+    def __contains__(self, salon_id: str) -> bool:
+        return salon_id in self._engines
+
+    def subscribe(self, listener: Callable[[], None]):
+        """Appelle listener() après chaque chargement ou éviction de salon"""
+        self._listeners.append(listener)
+
+    def _notify(self):
+        for listener in list(self._listeners):
+            listener()
+
+    def _cached(self, salon_id: str) -> Optional[SalonEngine]:
+        engine = self._engines.get(salon_id)
+        if engine is not None:
+            self._engines.move_to_end(salon_id)
+            engine.touch()
+        return engine
+
+    def get(self, salon_id: str) -> SalonEngine:
+        """Moteur du salon, chargé au besoin (un seul chargement par salon à la fois)"""
+        with self._lock:
+            engine = self._cached(salon_id)
+            if engine is not None:
+                return engine
+            build_lock = self._building.setdefault(salon_id, threading.Lock())
+
+        with build_lock:
+            with self._lock:
+                engine = self._cached(salon_id)
+                if engine is not None:
+                    return engine
+            try:
+                engine = SalonEngine(self._loader(salon_id), self._agent_factory)
+            except Exception:
+                with self._lock:
+                    self._building.pop(salon_id, None)
+                raise
+            self._insert(salon_id, engine)
+
+        logger.info(f"Salon {salon_id} loaded (~{engine.estimated_bytes // 1024} KB)")
+        return engine
+
+    def register(self, salon: Salon) -> SalonEngine:
+        """Ajoute un salon déjà chargé"""
+        engine = SalonEngine(salon, self._agent_factory)
+        self._insert(salon.id, engine)
+        return engine
+
+    def acquire(self, salon_id: str) -> SalonEngine:
+        """Moteur du salon, protégé de l'éviction jusqu'à release()"""
+        engine = self.get(salon_id)
+        with self._lock:
+            engine.active_sessions += 1
+        return engine
+
+    def release(self, engine: SalonEngine):
+        """Libère un moteur obtenu par acquire()"""
+        with self._lock:
+            engine.active_sessions = max(0, engine.active_sessions - 1)
+            evicted = self._evict()
+        if evicted:
+            self._notify()
+
+    def evict(self, salon_id: str) -> bool:
+        """Retire un salon du registre (s'il n'est pas en cours d'utilisation)"""
+        with self._lock:
+            engine = self._engines.get(salon_id)
+            if engine is None or engine.active_sessions:
+                return False
+            del self._engines[salon_id]
+            self.evictions += 1
+        self._notify()
+        return True
+
+    def _insert(self, salon_id: str, engine: SalonEngine):
+        with self._lock:
+            self._engines[salon_id] = engine
+            self._engines.move_to_end(salon_id)
+            # Retiré seulement une fois le salon visible : un get() concurrent le trouve en cache
+            self._building.pop(salon_id, None)
+            self.loads += 1
+            self._evict(keep=salon_id)
+        self._notify()
+
+    def _evict(self, keep: Optional[str] = None) -> int:
+        """Évince les salons inactifs les moins récemment utilisés au-delà du budget"""
+        evicted = 0
+        total = sum(engine.estimated_bytes for engine in self._engines.values())
+        for salon_id in list(self._engines):
+            if total <= self.max_bytes and len(self._engines) <= self.max_salons:
+                break
+            engine = self._engines[salon_id]
+            if salon_id == keep or engine.active_sessions:
+                continue
+            del self._engines[salon_id]
+            total -= engine.estimated_bytes
+            self.evictions += 1
+            evicted += 1
+            logger.info(f"Salon {salon_id} evicted")
+        return evicted
+
+    def loaded_salons(self) -> List[Salon]:
+        """Salons actuellement chargés"""
+        with self._lock:
+            return [engine.salon for engine in self._engines.values()]
+
+    def stats(self) -> Dict[str, Any]:
+        """Salons chargés et occupation du budget mémoire"""
+        with self._lock:
+            now = time.monotonic()
+            return {
+                "salons": {
+                    salon_id: {
+                        "estimated_bytes": engine.estimated_bytes,
+                        "active_sessions": engine.active_sessions,
+                        "idle_seconds": round(now - engine.last_used, 1)
+                    }
+                    for salon_id, engine in self._engines.items()
+                },
+                "estimated_bytes": sum(e.estimated_bytes for e in self._engines.values()),
+                "max_bytes": self.max_bytes,
+                "loads": self.loads,
+                "evictions": self.evictions
+            }
+
+def _build_agent(salon: Salon):
+    from app.agent.mc_agent import MasterOfCeremoniesAgent
+    return MasterOfCeremoniesAgent(salon)
+
+salon_registry = SalonRegistry(
+    load_salon_file,
+    _build_agent,
+    max_bytes=settings.SALON_REGISTRY_MEMORY_MB * 1024 * 1024,
+    max_salons=settings.SALON_REGISTRY_MAX_SALONS
+)
@@ -0,0 +1,228 @@
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, FrozenSet, Hashable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from app.agent.fast_path import FILLER_WORDS
+from app.config import settings
+from app.models.lookup import normalize_booth
+from app.models.salon import Salon
+from app.utils.helpers import normalize_text
+from app.utils.intent_matcher import intent_matcher
+
+# Dimension des vecteurs (n-grammes hachés)
+EMBEDDING_DIMENSIONS = 512
+
+# Poids des mots entiers par rapport aux trigrammes de caractères
+WORD_WEIGHT = 2.0
+
+# Mots qui renvoient à la conversation en cours ("et demain ?", "il est où ?")
+FOLLOW_UP_WORDS = {
+    "lui", "elle", "eux", "celui", "celle", "ceux", "celles", "ci", "là", "bas",
+    "ça", "cela", "ceci", "même", "mêmes", "aussi", "encore", "autre", "autres",
+    "précédent", "précédente", "dernier", "dernière", "ensuite", "après", "avant",
+    "oui", "non", "ok", "d'accord", "dessus", "dedans", "son", "sa", "ses", "leur", "leurs"
+}
+
+# Débuts de phrase qui prolongent la question précédente
+FOLLOW_UP_OPENERS = {"et", "mais", "donc", "alors", "sinon"}
+
+# Mots ramenés à une même forme avant le calcul du vecteur (paraphrases courantes)
+SYNONYMS = {"planning": "programme", "agenda": "programme", "passe": "programme", "passent": "programme"}
+
+# Mots interrogatifs sans contenu (en plus de FILLER_WORDS)
+QUESTION_WORDS = {"qui"}
+
+# Intentions qui dépendent du moment de la question : seules à séparer les réponses
+TIME_INTENT_PREFIX = "schedule."
+
+_TOKEN_PATTERN = re.compile(r"[\w'’°]+")
+# Mots composés gardés entiers pour repérer les relances ("après-midi" n'est pas "après")
+_WORD_PATTERN = re.compile(r"[\w'’°]+(?:-[\w'’°]+)*")
+
+class CachedResponse(NamedTuple):
+    """Réponse mémorisée et vecteur de la question qui l'a produite"""
+    question: str
+    response: str
+    vector: np.ndarray
+    expires_at: float
+
+class SemanticResponseCache:
+    """Cache des réponses de l'agent, retrouvées par similarité de la question.
+
+    Chaque question est représentée par un vecteur local (trigrammes de
+    caractères et mots hachés, sans les mots de politesse) ; une réponse est
+    réutilisée quand le cosinus dépasse le seuil. Les entrées sont rangées
+    par salon, version du catalogue, tranche horaire et signature (jour
+    demandé, nombres, stands et noms d'exposants cités) : deux questions
+    proches sur des stands différents ne partagent jamais leur réponse ; le
+    reste est laissé à la similarité. LRU et durée de vie bornent la mémoire.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 900.0,
+                 bucket_minutes: int = 15, threshold: float = 0.85):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.bucket_seconds = bucket_minutes * 60
+        self.threshold = threshold
+        self._entries: "OrderedDict[Tuple[Hashable, int], CachedResponse]" = OrderedDict()
+        self._partitions: Dict[Hashable, List[int]] = {}
+        self._names: Dict[str, Tuple[int, Dict[str, str]]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.ineligible = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _tokens(text: str) -> List[str]:
+        return [token.replace("’", "'") for token in _TOKEN_PATTERN.findall(text.lower())]
+
+    @staticmethod
+    def eligible(text: str) -> bool:
+        """Vrai si la question se comprend sans l'historique de la conversation"""
+        tokens = [token.replace("’", "'") for token in _WORD_PATTERN.findall(text.lower())]
+        if not tokens or tokens[0] in FOLLOW_UP_OPENERS:
+            return False
+        return not any(token in FOLLOW_UP_WORDS for token in tokens)
+
+    @staticmethod
+    def embed(text: str) -> np.ndarray:
+        """Vecteur normalisé de trigrammes de caractères et de mots hachés"""
+        vector = np.zeros(EMBEDDING_DIMENSIONS, dtype=np.float32)
+        for token in SemanticResponseCache._tokens(text):
+            if token in FILLER_WORDS or token in QUESTION_WORDS:
+                continue
+            word = normalize_text(token.split("'", 1)[-1] if "'" in token[:3] else token)
+            word = SYNONYMS.get(word, word)
+            vector[zlib.crc32(word.encode()) % EMBEDDING_DIMENSIONS] += WORD_WEIGHT
+            padded = f" {word} "
+            for i in range(len(padded) - 2):
+                vector[zlib.crc32(padded[i:i + 3].encode()) % EMBEDDING_DIMENSIONS] += 1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _name_words(self, salon: Salon) -> Dict[str, str]:
+        """Mots des noms d'exposants -> nom normalisé (reconstruit quand la version change)"""
+        cached = self._names.get(salon.id)
+        if cached is not None and cached[0] == salon.version:
+            return cached[1]
+        words: Dict[str, str] = {}
+        for name in salon.lookup.by_name:
+            for word in name.split():
+                if len(word) >= 4:
+                    words.setdefault(word, name)
+        self._names[salon.id] = (salon.version, words)
+        return words
+
+    def _signature(self, salon: Salon, text: str) -> FrozenSet[str]:
+        """Éléments qui doivent coïncider pour partager une réponse"""
+        match = intent_matcher.match(text, whole_words=True)
+        signature = {intent for intent in match.intents if intent.startswith(TIME_INTENT_PREFIX)}
+        tokens = [normalize_text(token) for token in self._tokens(text)]
+        signature.update(token for token in tokens if any(c.isdigit() for c in token))
+        exhibitor = salon.find_exhibitor_by_booth_in_text(text)
+        if exhibitor is not None:
+            signature.add(f"booth:{normalize_booth(exhibitor.booth_number)}")
+        names = self._name_words(salon)
+        signature.update(f"name:{names[token]}" for token in tokens if token in names)
+        return frozenset(signature)
+
+    def _partition(self, salon: Salon, text: str, now: float) -> Hashable:
+        return (salon.id, salon.version, int(now // self.bucket_seconds), self._signature(salon, text))
+
+    def get(self, salon: Salon, text: str, now: Optional[datetime] = None) -> Optional[str]:
+        """Réponse d'une question assez proche, ou None"""
+        if not self.eligible(text):
+            with self._lock:
+                self.ineligible += 1
+            return None
+        timestamp = (now or datetime.now()).timestamp()
+        partition = self._partition(salon, text, timestamp)
+        vector = self.embed(text)
+
+        with self._lock:
+            ids = self._partitions.get(partition, [])
+            live = [i for i in ids if self._entries[(partition, i)].expires_at > timestamp]
+            for i in set(ids) - set(live):
+                del self._entries[(partition, i)]
+            if live:
+                self._partitions[partition] = live
+            else:
+                self._partitions.pop(partition, None)
+
+            best = None
+            if live and vector.any():
+                vectors = np.stack([self._entries[(partition, i)].vector for i in live])
+                scores = vectors @ vector
+                top = int(np.argmax(scores))
+                if scores[top] >= self.threshold:
+                    best = (partition, live[top])
+
+            if best is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best)
+            self.hits += 1
+            return self._entries[best].response
+
+    def set(self, salon: Salon, text: str, response: str, now: Optional[datetime] = None):
+        """Mémorise la réponse d'une question éligible"""
+        if not self.eligible(text):
+            return
+        timestamp = (now or datetime.now()).timestamp()
+        partition = self._partition(salon, text, timestamp)
+        # La réponse ne survit pas à sa tranche horaire
+        bucket_end = (int(timestamp // self.bucket_seconds) + 1) * self.bucket_seconds
+        entry = CachedResponse(text, response, self.embed(text),
+                               min(timestamp + self.ttl_seconds, bucket_end))
+
+        with self._lock:
+            key = (partition, self._next_id)
+            self._next_id += 1
+            self._entries[key] = entry
+            self._partitions.setdefault(partition, []).append(key[1])
+            while len(self._entries) > self.max_entries:
+                (old_partition, old_id), _ = self._entries.popitem(last=False)
+                remaining = [i for i in self._partitions.get(old_partition, []) if i != old_id]
+                if remaining:
+                    self._partitions[old_partition] = remaining
+                else:
+                    self._partitions.pop(old_partition, None)
+
+    def clear(self):
+        """Vide le cache et remet les compteurs à zéro"""
+        with self._lock:
+            self._entries.clear()
+            self._partitions.clear()
+            self._names.clear()
+            self.hits = 0
+            self.misses = 0
+            self.ineligible = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Compteurs de succès, d'échecs et de questions non éligibles"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "ineligible": self.ineligible,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0
+            }
+
+response_cache = SemanticResponseCache(
+    settings.RESPONSE_CACHE_MAX_ENTRIES,
+    settings.RESPONSE_CACHE_TTL_SECONDS,
+    settings.RESPONSE_CACHE_BUCKET_MINUTES,
+    settings.RESPONSE_CACHE_SIMILARITY
+)
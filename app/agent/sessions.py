@@ -0,0 +1,210 @@
+import asyncio
+import hashlib
+import hmac
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+from langchain.schema import AIMessage, HumanMessage
+
+from app.config import settings
+
+# Coût fixe estimé d'une session et d'un échange (objets Python), en octets
+SESSION_OVERHEAD_BYTES = 1024
+TURN_OVERHEAD_BYTES = 160
+
+def _sign(visitor_id: str) -> str:
+    return hmac.new(settings.SECRET_KEY.encode("utf-8"), visitor_id.encode("utf-8", "surrogatepass"),
+                    hashlib.sha256).hexdigest()
+
+def issue_visitor_token() -> str:
+    """Jeton de reprise d'une conversation : identifiant aléatoire signé par le serveur"""
+    visitor_id = uuid.uuid4().hex
+    return f"{visitor_id}.{_sign(visitor_id)}"
+
+def verify_visitor_token(token: Optional[str]) -> Optional[str]:
+    """Identifiant du visiteur si le jeton a été émis par ce serveur, None sinon"""
+    visitor_id, _, signature = (token or "").partition(".")
+    # Comparaison en octets : le jeton vient du client et peut contenir n'importe quel caractère
+    if not visitor_id or not hmac.compare_digest(signature.encode("utf-8", "surrogatepass"),
+                                                 _sign(visitor_id).encode("ascii")):
+        return None
+    return visitor_id
+
+class ConversationSession:
+    """Historique compact d'un visiteur : derniers échanges (question, réponse) en texte"""
+
+    __slots__ = ("session_id", "turns", "max_chars", "last_seen", "nbytes")
+
+    def __init__(self, session_id: str, max_turns: int, max_chars: int):
+        self.session_id = session_id
+        self.turns: Deque[Tuple[str, str]] = deque(maxlen=max_turns)
+        self.max_chars = max_chars
+        self.last_seen = time.monotonic()
+        self.nbytes = SESSION_OVERHEAD_BYTES
+
+    def __len__(self) -> int:
+        return len(self.turns)
+
+    @staticmethod
+    def _turn_bytes(turn: Tuple[str, str]) -> int:
+        return TURN_OVERHEAD_BYTES + sum(len(text.encode("utf-8")) for text in turn)
+
+    def _add(self, user_input: str, response: str) -> int:
+        """Ajoute un échange (textes tronqués) ; retourne la variation de taille"""
+        if len(response) > self.max_chars:
+            response = response[:self.max_chars] + "…"
+        turn = (user_input[:self.max_chars], response)
+        delta = self._turn_bytes(turn)
+        if len(self.turns) == self.turns.maxlen:
+            delta -= self._turn_bytes(self.turns[0])
+        self.turns.append(turn)
+        self.nbytes += delta
+        return delta
+
+    def messages(self) -> List[Any]:
+        """Historique au format attendu par le prompt (chat_history)"""
+        messages: List[Any] = []
+        for user_input, response in self.turns:
+            messages.append(HumanMessage(content=user_input))
+            messages.append(AIMessage(content=response))
+        return messages
+
+class SessionStore:
+    """Conversations des visiteurs, bornées en nombre, en mémoire et en inactivité.
+
+    Les sessions sont rangées de la moins à la plus récemment utilisée :
+    l'expiration (inactivité) et l'éviction (plafond global) retirent par
+    le début, sans parcourir tout le magasin. Un verrou protège la structure
+    et les historiques ; les échanges d'un même visiteur sont sérialisés par
+    un verrou asyncio tenu à part (turn), qui survit à l'éviction de la
+    session tant qu'un échange le détient ou l'attend.
+    """
+
+    def __init__(self, max_sessions: int = 10000, max_bytes: int = 64 * 1024 * 1024,
+                 idle_seconds: float = 1800.0, max_turns: int = 15, max_chars: int = 1000):
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.idle_seconds = idle_seconds
+        self.max_turns = max_turns
+        self.max_chars = max_chars
+        self._sessions: "OrderedDict[str, ConversationSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Verrous d'échange en cours : session -> (verrou, nombre d'échanges qui le détiennent ou l'attendent)
+        self._turns: Dict[str, Tuple[asyncio.Lock, int]] = {}
+        self.nbytes = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def _expire(self, now: float):
+        """Retire les sessions inactives (en tête de l'ordre d'utilisation)"""
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if now - session.last_seen < self.idle_seconds:
+                return
+            self._drop(session.session_id)
+            self.expired += 1
+
+    def _evict(self, keep: str):
+        """Évince les sessions les moins récentes au-delà des plafonds"""
+        while len(self._sessions) > 1 and (len(self._sessions) > self.max_sessions or self.nbytes > self.max_bytes):
+            oldest = next(iter(self._sessions))
+            if oldest == keep:
+                self._sessions.move_to_end(oldest)
+                continue
+            self._drop(oldest)
+            self.evicted += 1
+
+    def _drop(self, session_id: str):
+        session = self._sessions.pop(session_id, None)
+        if session is not None:
+            self.nbytes -= session.nbytes
+
+    def get(self, session_id: str) -> ConversationSession:
+        """Session d'un visiteur (créée au besoin), marquée comme utilisée"""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = ConversationSession(session_id, self.max_turns, self.max_chars)
+                self._sessions[session_id] = session
+                self.nbytes += session.nbytes
+                self._evict(session_id)
+            else:
+                self._sessions.move_to_end(session_id)
+            session.last_seen = now
+            return session
+
+    @asynccontextmanager
+    async def turn(self, session_id: str) -> AsyncIterator[ConversationSession]:
+        """Échange d'un visiteur : attend la fin des échanges précédents de la même session"""
+        with self._lock:
+            lock, users = self._turns.get(session_id) or (asyncio.Lock(), 0)
+            self._turns[session_id] = (lock, users + 1)
+        try:
+            async with lock:
+                yield self.get(session_id)
+        finally:
+            with self._lock:
+                lock, users = self._turns[session_id]
+                if users == 1:
+                    del self._turns[session_id]
+                else:
+                    self._turns[session_id] = (lock, users - 1)
+
+    def history(self, session_id: str) -> List[Any]:
+        """Messages de l'historique d'un visiteur"""
+        session = self.get(session_id)
+        with self._lock:
+            return session.messages()
+
+    def record(self, session_id: str, user_input: str, response: str):
+        """Ajoute un échange à l'historique d'un visiteur"""
+        session = self.get(session_id)
+        with self._lock:
+            if self._sessions.get(session_id) is not session:
+                return
+            self.nbytes += session._add(user_input, response)
+            self._evict(session_id)
+
+    def discard(self, session_id: str):
+        """Termine une session (déconnexion, remise à zéro)"""
+        with self._lock:
+            self._drop(session_id)
+
+    def clear(self, prefix: str = ""):
+        """Termine toutes les sessions (dont l'identifiant commence par prefix)"""
+        with self._lock:
+            for session_id in [s for s in self._sessions if s.startswith(prefix)]:
+                self._drop(session_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """Occupation du magasin de sessions"""
+        with self._lock:
+            self._expire(time.monotonic())
+            return {
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "memory_kb": round(self.nbytes / 1024, 1),
+                "max_memory_kb": round(self.max_bytes / 1024, 1),
+                "expired": self.expired,
+                "evicted": self.evicted
+            }
+
+session_store = SessionStore(
+    settings.SESSION_MAX_SESSIONS,
+    settings.SESSION_MEMORY_MB * 1024 * 1024,
+    settings.SESSION_IDLE_SECONDS,
+    settings.SESSION_MAX_TURNS,
+    settings.SESSION_MAX_MESSAGE_CHARS
+)
@@ -0,0 +1,59 @@
+import re
+from typing import List
+
+# Fin de phrase : ponctuation finale suivie d'un blanc, ou retour à la ligne
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+|\n+")
+
+# Première phrase : coupée plus tôt (virgule) pour que la voix démarre vite
+FIRST_CHUNK_MIN_CHARS = 40
+FIRST_CHUNK_BREAK = re.compile(r"(?<=[,;:])\s+")
+
+# Au-delà, un morceau est coupé au dernier espace même sans ponctuation
+MAX_CHUNK_CHARS = 200
+
+class SentenceChunker:
+    """Découpe un flux de jetons en phrases prêtes à afficher ou à prononcer.
+
+    Chaque morceau garde son séparateur final : leur concaténation redonne
+    le texte d'origine (retours à la ligne compris).
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._emitted = 0
+
+    def feed(self, token: str) -> List[str]:
+        """Ajoute un jeton ; retourne les phrases complètes"""
+        self._buffer += token
+        chunks = []
+        while True:
+            found = _SENTENCE_END.search(self._buffer)
+            if found is None and not self._emitted and len(self._buffer) >= FIRST_CHUNK_MIN_CHARS:
+                found = FIRST_CHUNK_BREAK.search(self._buffer, FIRST_CHUNK_MIN_CHARS // 2)
+            if found is not None:
+                start, end = found.start(), found.end()
+            elif len(self._buffer) > MAX_CHUNK_CHARS:
+                cut = self._buffer.rfind(" ", 0, MAX_CHUNK_CHARS)
+                start, end = (cut, cut + 1) if cut > 0 else (MAX_CHUNK_CHARS, MAX_CHUNK_CHARS)
+            else:
+                return chunks
+            # Coupe franche (mot plus long que MAX_CHUNK_CHARS) : start == end, rien n'est ajouté
+            chunk = self._buffer[:end]
+            self._buffer = self._buffer[end:]
+            if chunk.strip():
+                chunks.append(chunk)
+                self._emitted += 1
+
+    def flush(self) -> List[str]:
+        """Termine le flux : retourne le reste du tampon"""
+        chunk = self._buffer
+        self._buffer = ""
+        if not chunk.strip():
+            return []
+        self._emitted += 1
+        return [chunk]
+
+def split_sentences(text: str) -> List[str]:
+    """Découpe une réponse complète comme le ferait le flux"""
+    chunker = SentenceChunker()
+    return chunker.feed(text) + chunker.flush()
@@ -0,0 +1,192 @@
+import math
+import re
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.config import settings
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Surcoût par message du format de conversation (rôle, séparateurs)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_PIECE_PATTERN = re.compile(r"[^\W\d_]+|\d+|\S")
+_BLANK_LINES = re.compile(r"\n\s*\n+")
+_OMITTED_NOTE = "[… {} ligne(s) omise(s) : demandez la page suivante ou précisez la demande]"
+
+def count_tokens(text: str) -> int:
+    """Estimation locale du nombre de jetons (calibrée sur les tokenizers BPE de GPT).
+
+    Mots : un jeton par tranche de 4 lettres ; nombres : un par tranche de
+    3 chiffres ; ponctuation : un par signe, deux pour les symboles non
+    ASCII (émojis, cadres du plan). L'estimation est volontairement un peu
+    haute pour que les plafonds restent sûrs.
+    """
+    total = 0
+    for piece in _PIECE_PATTERN.findall(text):
+        if piece[0].isalpha():
+            total += math.ceil(len(piece) / 4)
+        elif piece[0].isdigit():
+            total += math.ceil(len(piece) / 3)
+        else:
+            total += 1 if piece.isascii() else 2
+    return total
+
+class PromptUsage:
+    """Répartition des jetons d'une requête au LLM"""
+
+    __slots__ = ("system", "history", "input", "tools", "history_dropped", "truncated")
+
+    def __init__(self, system: int, input_tokens: int):
+        self.system = system
+        self.history = 0
+        self.input = input_tokens
+        self.tools: Dict[str, int] = {}
+        self.history_dropped = 0
+        self.truncated = 0
+
+    @property
+    def total(self) -> int:
+        return self.system + self.history + self.input + sum(self.tools.values())
+
+    def summary(self) -> str:
+        tools = ", ".join(f"{name}={tokens}" for name, tokens in self.tools.items()) or "0"
+        return (f"system={self.system} history={self.history} (-{self.history_dropped} turns) "
+                f"input={self.input} tools=[{tools}] total={self.total}")
+
+_current_usage: ContextVar[Optional[PromptUsage]] = ContextVar("prompt_usage", default=None)
+
+class TokenBudget:
+    """Plafonds de jetons du prompt envoyé au LLM.
+
+    L'historique est coupé par les échanges les plus anciens dès qu'il
+    dépasse son budget (ou ce qu'il reste sous le plafond du prompt), et les
+    observations des outils sont condensées puis tronquées, ligne par ligne,
+    au budget de chaque outil. Chaque requête journalise sa répartition.
+    """
+
+    def __init__(self, max_prompt_tokens: int = 3000, history_tokens: int = 1200,
+                 tool_tokens: Optional[Dict[str, int]] = None, default_tool_tokens: int = 400):
+        self.max_prompt_tokens = max_prompt_tokens
+        self.history_tokens = history_tokens
+        self.tool_tokens = dict(tool_tokens or {})
+        self.default_tool_tokens = default_tool_tokens
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.total_tokens = 0
+        self.max_tokens_seen = 0
+        self.history_dropped = 0
+        self.truncated = 0
+
+    @contextmanager
+    def request(self, system_tokens: int, user_input: str) -> Iterator[PromptUsage]:
+        """Suivi d'une requête : les observations tronquées pendant le bloc y sont comptées"""
+        usage = PromptUsage(system_tokens, count_tokens(user_input) + MESSAGE_OVERHEAD_TOKENS)
+        token = _current_usage.set(usage)
+        try:
+            yield usage
+        finally:
+            try:
+                _current_usage.reset(token)
+            except ValueError:
+                # Générateur refermé depuis un autre contexte (déconnexion du client)
+                _current_usage.set(None)
+            self._record(usage)
+
+    def fit_history(self, messages: List[Any], usage: Optional[PromptUsage] = None) -> List[Any]:
+        """Derniers échanges de l'historique qui tiennent dans le budget"""
+        budget = self.history_tokens
+        if usage is not None:
+            budget = min(budget, self.max_prompt_tokens - usage.system - usage.input)
+        kept: List[Any] = []
+        used = 0
+        # Par paires (question, réponse), des plus récentes aux plus anciennes
+        for start in range(len(messages) - 2, -2, -2):
+            pair = messages[max(start, 0):start + 2]
+            cost = sum(count_tokens(m.content) + MESSAGE_OVERHEAD_TOKENS for m in pair)
+            if used + cost > budget:
+                break
+            kept[:0] = pair
+            used += cost
+        if usage is not None:
+            usage.history = used
+            usage.history_dropped = (len(messages) - len(kept) + 1) // 2
+        return kept
+
+    def fit_observation(self, tool: str, observation: str) -> Tuple[str, int, bool]:
+        """Observation condensée et tronquée au budget de l'outil ; retourne (texte, jetons, tronquée)"""
+        budget = self.tool_tokens.get(tool, self.default_tool_tokens)
+        text = _BLANK_LINES.sub("\n", "\n".join(line.rstrip() for line in observation.strip().splitlines()))
+        tokens = count_tokens(text)
+        if tokens <= budget:
+            return text, tokens, False
+
+        lines = text.splitlines()
+        # Place réservée à la note, au plus long nombre de lignes omises
+        available = budget - count_tokens(_OMITTED_NOTE.format(len(lines)))
+        kept: List[str] = []
+        used = 0
+        for line in lines:
+            cost = count_tokens(line)
+            if used + cost > available:
+                break
+            kept.append(line)
+            used += cost
+        if not kept:
+            # Une seule ligne trop longue : coupe approximative (≈ 3 caractères par jeton), resserrée au besoin
+            line = lines[0][:max(available, 1) * 3]
+            while len(line) > 1 and count_tokens(line) + 2 > available:
+                line = line[:-max(len(line) // 8, 1)]
+            kept = [line + "…"]
+            used = count_tokens(kept[0])
+        note = _OMITTED_NOTE.format(len(lines) - len(kept))
+        return "\n".join(kept + [note]), used + count_tokens(note), True
+
+    def trim_steps(self, steps: List[Tuple[Any, str]]) -> List[Tuple[Any, str]]:
+        """Étapes intermédiaires de l'agent (trim_intermediate_steps) aux observations bornées"""
+        usage = _current_usage.get()
+        tools: Dict[str, int] = {}
+        truncated = 0
+        trimmed = []
+        for action, observation in steps:
+            text, tokens, cut = self.fit_observation(action.tool, str(observation))
+            truncated += cut
+            tools[action.tool] = tools.get(action.tool, 0) + tokens + count_tokens(str(action.tool_input))
+            trimmed.append((action, text))
+        if usage is not None:
+            usage.tools = tools
+            usage.truncated = truncated
+        return trimmed
+
+    def _record(self, usage: PromptUsage):
+        logger.info(f"🧮 Prompt tokens: {usage.summary()}")
+        if usage.total > self.max_prompt_tokens:
+            logger.warning(f"⚠️ Prompt over budget: {usage.total} > {self.max_prompt_tokens} tokens")
+        with self._lock:
+            self.requests += 1
+            self.total_tokens += usage.total
+            self.max_tokens_seen = max(self.max_tokens_seen, usage.total)
+            self.history_dropped += usage.history_dropped
+            self.truncated += usage.truncated
+
+    def stats(self) -> Dict[str, Any]:
+        """Taille moyenne et maximale des prompts, coupes effectuées"""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "max_prompt_tokens": self.max_prompt_tokens,
+                "avg_prompt_tokens": round(self.total_tokens / self.requests, 1) if self.requests else 0.0,
+                "largest_prompt_tokens": self.max_tokens_seen,
+                "history_turns_dropped": self.history_dropped,
+                "observations_truncated": self.truncated
+            }
+
+token_budget = TokenBudget(
+    settings.TOKEN_BUDGET_MAX_PROMPT,
+    settings.TOKEN_BUDGET_HISTORY,
+    settings.TOKEN_BUDGET_TOOLS,
+    settings.TOKEN_BUDGET_TOOL_DEFAULT
+)
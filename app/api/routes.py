@@ -1,19 +1,31 @@
-from fastapi import FastAPI, HTTPException, Depends, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
-from sqlalchemy.orm import Session
-from typing import List, Dict, Any
+from fastapi.responses import HTMLResponse, PlainTextResponse, Response
+from typing import List, Dict, Any, Optional
 import json
+import math
+import time
 import asyncio
 
 from app.config import settings
-from app.models.database import get_db, SessionLocal
-from app.models.salon import ExhibitorResponse, ExhibitorCreate
+from app.models.salon import Exhibitor
+from app.models.snapshot_file import load_snapshot
+from app.models.route_matrix import MAX_BATCH_PAIRS, RouteBatchRequest, RouteMatrix
+from app.models.venue_graph import WALKING_SPEED
 from app.services.voice_service import VoiceService
 from app.services.vision_service import VisionService
-from app.agents.mc_agent import MasterOfCeremoniesAgent
+from app.services.crowd_service import crowd_service
+from app.services.announcement_service import Announcement, announcement_scheduler
+from app.agent.registry import SalonEngine, salon_registry
+from app.agent.execution import agent_gate
+from app.agent.response_cache import response_cache
+from app.agent.sessions import issue_visitor_token, session_store, verify_visitor_token
 from app.utils.logger import setup_logger
+from app.utils.cache import tool_cache
+from app.utils.metrics import FIRST_CHUNK_SECONDS, metrics
+from app.utils.pagination import page_request, paginate
+from app.utils.exceptions import SalonNotFoundError, SnapshotError
 
 logger = setup_logger(__name__)
 
@@ -26,10 +38,10 @@ app = FastAPI(
 # Services globaux
 voice_service = VoiceService()
 vision_service = VisionService()
-mc_agent = None  # Initialisé au démarrage
+catalog_snapshot = None  # Instantané projeté du salon par défaut (SALON_SNAPSHOT_PATH)
 
 # Templates et fichiers statiques
-app.mount("/static", StaticFiles(directory="static"), name="static")
+app.mount("/static", StaticFiles(directory="static", check_dir=False), name="static")
 templates = Jinja2Templates(directory="templates")
 
 # Gestionnaire de connexions WebSocket
@@ -42,17 +54,27 @@ class ConnectionManager:
         self.active_connections.append(websocket)
 
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+        if websocket in self.active_connections:
+            self.active_connections.remove(websocket)
 
     async def broadcast(self, message: dict):
-        for connection in self.active_connections:
+        for connection in list(self.active_connections):
             try:
                 await connection.send_json(message)
-            except:
-                await self.disconnect(connection)
+            except Exception:
+                self.disconnect(connection)
 
 manager = ConnectionManager()
 
+# Jauges lues à chaque export de /metrics
+metrics.gauge("mc_websocket_connections", "Connexions WebSocket ouvertes").set_function(
+    lambda: len(manager.active_connections))
+metrics.gauge("mc_sessions", "Conversations de visiteurs en mémoire").set_function(lambda: len(session_store))
+metrics.gauge("mc_agent_queue_depth", "Interactions en attente d'une place d'exécution").set_function(
+    lambda: agent_gate.queue_depth)
+metrics.gauge("mc_salons_loaded", "Salons chargés en mémoire").set_function(lambda: len(salon_registry))
+metrics.gauge("mc_response_cache_entries", "Réponses mémorisées").set_function(lambda: len(response_cache))
+
 # Routes API
 @app.get("/")
 async def dashboard():
@@ -67,41 +89,247 @@ async def health_check():
         "services": {
             "voice": await voice_service.test_connection(),
             "vision": vision_service.is_camera_available(),
-            "agent": mc_agent is not None
-        }
+            "agent": len(salon_registry) > 0
+        },
+        "tool_cache": tool_cache.stats(),
+        "salons": salon_registry.stats(),
+        "crowd": crowd_service.stats(),
+        "announcements": announcement_scheduler.stats(),
+        "sessions": session_store.stats(),
+        "agent_execution": agent_gate.stats(),
+        "speech": voice_service.speech_stats()
     }
 
-@app.get("/api/exhibitors", response_model=List[ExhibitorResponse])
-async def get_exhibitors(db: Session = Depends(get_db)):
-    """Récupère la liste des exposants"""
-    # Implémentation avec SQLAlchemy
-    pass
-
-@app.post("/api/exhibitors", response_model=ExhibitorResponse)
-async def create_exhibitor(
-    exhibitor: ExhibitorCreate, 
-    db: Session = Depends(get_db)
-):
-    """Crée un nouvel exposant"""
-    # Implémentation avec SQLAlchemy
-    pass
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Métriques au format texte Prometheus (latences, compteurs, jauges)"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/exhibitors", response_model=List[Exhibitor])
+async def get_exhibitors():
+    """Récupère la liste des exposants (salon par défaut)"""
+    engine = await _salon_engine(settings.DEFAULT_SALON_ID)
+    return engine.salon.exhibitors
+
+@app.post("/api/exhibitors", response_model=Exhibitor)
+async def create_exhibitor(exhibitor: Exhibitor):
+    """Ajoute ou remplace un exposant du salon par défaut (index mis à jour)"""
+    engine = await _salon_engine(settings.DEFAULT_SALON_ID)
+    engine.salon.add_exhibitor(exhibitor)
+    return exhibitor
+
+def _catalog_page(records, cursor: Optional[str], page: Optional[int], limit: Optional[int]) -> Dict[str, Any]:
+    """Page de résultats JSON avec jeton de continuation"""
+    try:
+        request = page_request(cursor, page, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    result = paginate(records, request)
+    return {
+        "items": [record.dict() for record in result.items],
+        "offset": result.offset,
+        "next_cursor": result.next_cursor
+    }
+
+async def _salon_engine(salon_id: str, pin: bool = False) -> SalonEngine:
+    """Moteur d'un salon, chargé hors de la boucle d'événements (404 si inconnu)"""
+    loop = asyncio.get_running_loop()
+    try:
+        load = salon_registry.acquire if pin else salon_registry.get
+        return await loop.run_in_executor(None, load, salon_id)
+    except SalonNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+async def _loaded_catalog(salon_id: str):
+    """Catalogue d'un salon (l'instantané projeté sert le salon par défaut s'il est configuré)"""
+    if catalog_snapshot is not None and salon_id == settings.DEFAULT_SALON_ID:
+        return catalog_snapshot
+    engine = await _salon_engine(salon_id)
+    return engine.salon.catalog
+
+@app.get("/api/salons")
+async def list_salons():
+    """Salons chargés en mémoire et occupation du budget"""
+    return salon_registry.stats()
+
+@app.get("/api/salons/{salon_id}/stats")
+async def salon_stats(salon_id: str):
+    """Statistiques de l'agent d'un salon (interactions, réponses directes)"""
+    engine = await _salon_engine(salon_id)
+    agent = engine.built_agent
+    if agent is None:
+        return {"interactions": 0, "fast_path": None}
+    return agent.get_session_stats()
+
+@app.get("/api/salons/{salon_id}/catalog/exhibitors")
+async def list_salon_exhibitors(salon_id: str, cursor: Optional[str] = None, page: Optional[int] = None,
+                                limit: Optional[int] = None):
+    """Liste paginée des exposants d'un salon"""
+    catalog = await _loaded_catalog(salon_id)
+    return {"total": len(catalog.exhibitors), **_catalog_page(iter(catalog.exhibitors), cursor, page, limit)}
+
+@app.get("/api/salons/{salon_id}/catalog/events")
+async def list_salon_events(salon_id: str, cursor: Optional[str] = None, page: Optional[int] = None,
+                            limit: Optional[int] = None):
+    """Liste paginée des événements d'un salon (ordre chronologique)"""
+    catalog = await _loaded_catalog(salon_id)
+    return {"total": len(catalog.events), **_catalog_page(iter(catalog.events), cursor, page, limit)}
+
+@app.get("/api/catalog/exhibitors")
+async def list_catalog_exhibitors(cursor: Optional[str] = None, page: Optional[int] = None,
+                                  limit: Optional[int] = None):
+    """Liste paginée des exposants du salon par défaut"""
+    return await list_salon_exhibitors(settings.DEFAULT_SALON_ID, cursor, page, limit)
+
+@app.get("/api/catalog/events")
+async def list_catalog_events(cursor: Optional[str] = None, page: Optional[int] = None,
+                              limit: Optional[int] = None):
+    """Liste paginée des événements du salon par défaut"""
+    return await list_salon_events(settings.DEFAULT_SALON_ID, cursor, page, limit)
+
+def _route_entry(origin: str, destination: str, distance: float, cost: float) -> Dict[str, Any]:
+    if not math.isfinite(cost):
+        return {"origin": origin, "destination": destination, "distance": None, "minutes": None}
+    return {"origin": origin, "destination": destination, "distance": round(distance, 1),
+            "minutes": round(cost / WALKING_SPEED, 1)}
+
+async def _route_matrix(engine: SalonEngine) -> RouteMatrix:
+    """Matrice des trajets d'un salon, construite hors de la boucle d'événements
+    (graphe et Floyd-Warshall après un changement du plan)"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, lambda: engine.salon.venue_graph.matrix)
+
+@app.post("/api/salons/{salon_id}/routes/batch")
+async def batch_routes(salon_id: str, batch: RouteBatchRequest):
+    """Distances et temps de marche pour un lot de trajets (matrice précalculée)"""
+    if len(batch.pairs) > MAX_BATCH_PAIRS:
+        raise HTTPException(status_code=413, detail=f"Au plus {MAX_BATCH_PAIRS} trajets par lot")
+    engine = await _salon_engine(salon_id)
+    matrix = await _route_matrix(engine)
+    result = matrix.measure_pairs(batch.pairs)
+    
+    routes = []
+    for i, (origin, destination) in enumerate(batch.pairs):
+        entry = _route_entry(origin, destination, result.distance[i], result.cost[i])
+        if batch.paths and result.known[i] and entry["distance"] is not None:
+            steps = matrix.path(matrix.resolve(origin), matrix.resolve(destination))
+            entry["path"] = [matrix.keys[step] for step in steps]
+        routes.append(entry)
+    
+    return {"routes": routes, "unknown": int((~result.known).sum())}
+
+@app.post("/api/routes/batch")
+async def default_batch_routes(batch: RouteBatchRequest):
+    """Lot de trajets dans le salon par défaut"""
+    return await batch_routes(settings.DEFAULT_SALON_ID, batch)
+
+@app.get("/api/salons/{salon_id}/routes/from/{origin}")
+async def rank_destinations(salon_id: str, origin: str, kind: str = "booth", limit: int = 50):
+    """Destinations d'un type (booth, facility, room, zone) classées par temps de marche"""
+    engine = await _salon_engine(salon_id)
+    matrix = await _route_matrix(engine)
+    if matrix.resolve(origin) is None:
+        raise HTTPException(status_code=404, detail=f"Point de départ inconnu: {origin}")
+    ranked = matrix.rank_from(origin, kind=kind, limit=max(1, min(limit, MAX_BATCH_PAIRS)))
+    return {"origin": origin,
+            "destinations": [_route_entry(origin, key, distance, cost) for key, distance, cost in ranked]}
+
+async def _render_map(request: Request, salon_id: str, svg: bool) -> Response:
+    """Plan d'un salon, rendu une fois par version (ETag = empreinte du rendu)"""
+    engine = await _salon_engine(salon_id)
+    loop = asyncio.get_running_loop()
+    plan = await loop.run_in_executor(None, lambda: engine.salon.floor_plan)
+    etag = await loop.run_in_executor(None, plan.etag, svg)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    if svg:
+        return Response(plan.render_svg(), media_type="image/svg+xml", headers={"ETag": etag})
+    return PlainTextResponse(plan.render_ascii(), headers={"ETag": etag})
+
+@app.get("/api/salons/{salon_id}/map.svg")
+async def salon_map_svg(request: Request, salon_id: str):
+    """Plan SVG d'un salon (tableau de bord)"""
+    return await _render_map(request, salon_id, svg=True)
+
+@app.get("/api/salons/{salon_id}/map.txt")
+async def salon_map_text(request: Request, salon_id: str):
+    """Plan texte d'un salon"""
+    return await _render_map(request, salon_id, svg=False)
+
+@app.get("/api/map.svg")
+async def map_svg(request: Request):
+    """Plan SVG du salon par défaut"""
+    return await _render_map(request, settings.DEFAULT_SALON_ID, svg=True)
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
-    """WebSocket pour communication temps réel"""
+    """WebSocket pour communication temps réel (salon par défaut)"""
+    await salon_websocket_endpoint(websocket, settings.DEFAULT_SALON_ID)
+
+@app.websocket("/ws/{salon_id}")
+async def salon_websocket_endpoint(websocket: WebSocket, salon_id: str):
+    """WebSocket pour communication temps réel avec l'agent d'un salon"""
+    # Conversation propre au visiteur : reprise seulement avec un jeton émis par le serveur,
+    # sinon une nouvelle conversation (un identifiant choisi par le client ne suffit pas)
+    token = websocket.query_params.get("visitor_token")
+    visitor_id = verify_visitor_token(token)
+    if visitor_id is None:
+        token = issue_visitor_token()
+        visitor_id = verify_visitor_token(token)
+    session_id = f"ws-{visitor_id}"
     await manager.connect(websocket)
     try:
+        # Le salon reste chargé tant que la session est ouverte
+        engine = await _salon_engine(salon_id, pin=True)
+    except HTTPException as e:
+        await websocket.send_json({"type": "error", "message": e.detail})
+        await websocket.close(code=4404)
+        manager.disconnect(websocket)
+        return
+    
+    loop = asyncio.get_running_loop()
+    try:
+        # Jeton à présenter (visitor_token) pour reprendre la conversation après une reconnexion
+        await websocket.send_json({"type": "session", "visitor_token": token})
         while True:
             # Recevoir les messages du client
             data = await websocket.receive_json()
             
             if data["type"] == "voice_command":
                 # Traiter la commande vocale
-                response = await mc_agent.process_interaction(data["message"])
-                await websocket.send_json({
-                    "type": "agent_response",
-                    "message": response
-                })
+                started = time.perf_counter()
+                agent = await loop.run_in_executor(None, lambda: engine.agent)
+                speech = voice_service.speech_stream(started) if data.get("speak") else None
+                
+                # Réponse relayée phrase par phrase, puis en entier
+                sentences = []
+                first_chunk_ms = None
+                try:
+                    async for sentence in agent.stream_interaction(data["message"], session_id=session_id):
+                        if first_chunk_ms is None:
+                            first_chunk = time.perf_counter() - started
+                            FIRST_CHUNK_SECONDS.observe(first_chunk)
+                            first_chunk_ms = round(first_chunk * 1000, 1)
+                        if speech is not None:
+                            speech.say(sentence.strip())
+                        await websocket.send_json({
+                            "type": "agent_response_chunk",
+                            "index": len(sentences),
+                            "message": sentence
+                        })
+                        sentences.append(sentence)
+                    
+                    await websocket.send_json({
+                        "type": "agent_response",
+                        "message": "".join(sentences).strip(),
+                        "first_chunk_ms": first_chunk_ms
+                    })
+                finally:
+                    # Lecture terminée même si le client se déconnecte en cours de réponse
+                    if speech is not None:
+                        await speech.finish()
                 
             elif data["type"] == "start_listening":
                 # Commencer l'écoute
@@ -113,21 +341,47 @@ async def websocket_endpoint(websocket: WebSocket):
                     })
                     
     except WebSocketDisconnect:
+        pass
+    finally:
+        # La conversation est conservée pour une reprise (expiration par inactivité du magasin de sessions)
         manager.disconnect(websocket)
+        salon_registry.release(engine)
+
+async def _broadcast_announcement(announcement: Announcement):
+    await manager.broadcast({"type": "announcement", **announcement._asdict()})
+
+async def _speak_announcement(announcement: Announcement):
+    await voice_service.announce(announcement.message)
 
 @app.on_event("startup")
 async def startup_event():
     """Initialisation au démarrage"""
-    global mc_agent
+    global catalog_snapshot
     logger.info("Starting AI Assistant MC application")
     
+    # Projeter l'instantané du catalogue (partagé entre les workers)
+    if settings.SALON_SNAPSHOT_PATH:
+        try:
+            catalog_snapshot = load_snapshot(settings.SALON_SNAPSHOT_PATH)
+            logger.info(f"Catalog snapshot mapped: {settings.SALON_SNAPSHOT_PATH}")
+        except SnapshotError as e:
+            logger.error(f"Catalog snapshot unavailable: {e}")
+    
     # Initialiser les services
     await voice_service.initialize()
     vision_service.start_camera()
     
-    # Charger les données du salon
-    salon_data = load_salon_data()
-    mc_agent = MasterOfCeremoniesAgent(salon_data)
+    # Relevés d'affluence appliqués au routage des salons chargés
+    crowd_service.start(vision_service, salon_registry.loaded_salons,
+                        interval=settings.CROWD_REFRESH_SECONDS)
+    
+    # Annonces des événements : écrans connectés et synthèse vocale
+    if settings.ANNOUNCEMENTS_ENABLED:
+        salon_registry.subscribe(announcement_scheduler.salons_changed)
+        announcement_scheduler.start(salon_registry.loaded_salons, [_broadcast_announcement, _speak_announcement])
+    
+    # Les salons (données, index, agent) sont chargés à leur première demande
+    # par salon_registry
     
     logger.info("Application started successfully")
 
@@ -135,4 +389,8 @@ async def startup_event():
 async def shutdown_event():
     """Nettoyage à l'arrêt"""
     logger.info("Shutting down application")
+    crowd_service.stop()
+    announcement_scheduler.stop()
     vision_service.stop_camera()
+    if catalog_snapshot is not None:
+        catalog_snapshot.close()
@@ -1,5 +1,5 @@
 import os
-from typing import Optional
+from typing import Dict, List, Optional
 from pydantic import BaseSettings
 
 class Settings(BaseSettings):
@@ -23,6 +23,61 @@ class Settings(BaseSettings):
     API_PORT: int = 8000
     DEBUG: bool = False
     
+    # Cache des sorties d'outils
+    TOOL_CACHE_MAX_ENTRIES: int = 512
+    
+    # Pool d'exécution des outils (appels concurrents de l'agent)
+    TOOL_WORKERS: int = 8
+    
+    # Réponses directes aux demandes reconnaissables (sans appel au LLM)
+    FAST_PATH_ENABLED: bool = True
+    
+    # Cache des réponses de l'agent (questions proches par similarité cosinus)
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_MAX_ENTRIES: int = 256
+    RESPONSE_CACHE_TTL_SECONDS: float = 900.0
+    RESPONSE_CACHE_BUCKET_MINUTES: int = 15
+    RESPONSE_CACHE_SIMILARITY: float = 0.85
+    
+    # Appels simultanés au LLM (au-delà : file d'attente FIFO)
+    AGENT_MAX_CONCURRENCY: int = 4
+    
+    # Budget de jetons du prompt (historique et observations des outils)
+    TOKEN_BUDGET_MAX_PROMPT: int = 3000
+    TOKEN_BUDGET_HISTORY: int = 1200
+    TOKEN_BUDGET_TOOL_DEFAULT: int = 400
+    TOKEN_BUDGET_TOOLS: Dict[str, int] = {"navigation": 500, "exhibitor_info": 400, "event_schedule": 450}
+    
+    # Conversations des visiteurs (une session par jeton de reprise visitor_token, émis à la connexion)
+    SESSION_MAX_SESSIONS: int = 10000
+    SESSION_MEMORY_MB: int = 64
+    SESSION_IDLE_SECONDS: float = 1800.0
+    SESSION_MAX_TURNS: int = 15
+    SESSION_MAX_MESSAGE_CHARS: int = 1000
+    
+    # Registre des salons (chargés à la demande depuis SALON_DATA_DIR/<id>.json)
+    SALON_DATA_DIR: str = "data/salons"
+    DEFAULT_SALON_ID: str = "default"
+    SALON_REGISTRY_MEMORY_MB: int = 512
+    SALON_REGISTRY_MAX_SALONS: int = 16
+    
+    # Instantané binaire du catalogue (scripts/build_snapshot.py), projeté en mémoire
+    SALON_SNAPSHOT_PATH: Optional[str] = None
+    
+    # Affluence : caméra (index) -> zone, relevée toutes les CROWD_REFRESH_SECONDS
+    CROWD_CAMERA_ZONES: Dict[str, str] = {"0": "A"}
+    CROWD_REFRESH_SECONDS: float = 5.0
+    CROWD_READING_TTL_SECONDS: float = 60.0
+    
+    # Annonces des événements (rappels avant le début, début, fin)
+    ANNOUNCEMENTS_ENABLED: bool = True
+    ANNOUNCEMENT_LEAD_MINUTES: List[int] = [10]
+    ANNOUNCE_EVENT_END: bool = True
+    
+    # Métriques (/metrics) : quantiles de latence sur une fenêtre glissante
+    METRICS_WINDOW_SECONDS: float = 60.0
+    METRICS_WINDOW_SLICES: int = 6
+    
     # Logging
     LOG_LEVEL: str = "INFO"
     LOG_FILE: str = "logs/app.log"
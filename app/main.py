@@ -7,7 +7,7 @@ from app.api.routes import app as api_app
 from app.utils.logger import setup_logger
 from app.models.database import init_database
 
-logger = setup_logger(_name_)
+logger = setup_logger(__name__)
 
 def create_app() -> FastAPI:
     """Factory pour créer l'application FastAPI"""
@@ -52,7 +52,7 @@ async def shutdown():
     """Nettoyage à l'arrêt"""
     logger.info("🛑 Shutting down AI Assistant MC")
 
-if _name_ == "_main_":
+if __name__ == "__main__":
     uvicorn.run(
         "app.main:app",
         host=settings.API_HOST,
@@ -0,0 +1,324 @@
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from app.utils.helpers import normalize_text
+
+# Les dates sont stockées en secondes depuis cette origine (heure locale naïve)
+EPOCH = datetime(1970, 1, 1)
+
+def to_epoch(moment: datetime) -> int:
+    """Convertit une date naïve en secondes depuis EPOCH"""
+    return int((moment - EPOCH).total_seconds())
+
+def from_epoch(seconds: int) -> datetime:
+    """Convertit des secondes depuis EPOCH en date naïve"""
+    return EPOCH + timedelta(seconds=seconds)
+
+class StringTable:
+    """Table de chaînes internées : chaque valeur distincte n'est stockée qu'une fois"""
+
+    def __init__(self):
+        self.strings: List[str] = []
+        self._ids: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+    def __getitem__(self, string_id: int) -> str:
+        return self.strings[string_id]
+
+    def intern(self, value: Optional[str]) -> int:
+        """Identifiant de la chaîne (ajoutée si absente)"""
+        value = sys.intern(value or "")
+        string_id = self._ids.get(value)
+        if string_id is None:
+            string_id = len(self.strings)
+            self.strings.append(value)
+            self._ids[value] = string_id
+        return string_id
+
+# Colonnes de chaînes (identifiants dans la table) de chaque type d'enregistrement
+EXHIBITOR_STRING_COLUMNS = (
+    "id", "name", "booth_number", "category", "description", "contact_person",
+    "email", "phone", "website", "category_key", "search_text"
+)
+EVENT_STRING_COLUMNS = (
+    "id", "title", "description", "category", "speaker", "location", "language",
+    "level", "category_key", "search_text"
+)
+
+class ExhibitorRow:
+    """Vue en lecture seule sur une ligne de la table des exposants"""
+
+    __slots__ = ("_catalog", "_index")
+
+    def __init__(self, catalog: "CatalogSnapshot", index: int):
+        self._catalog = catalog
+        self._index = index
+
+    @property
+    def tags(self) -> List[str]:
+        return self._catalog.list_values("exhibitor_tags", self._index)
+
+    @property
+    def special_offers(self) -> List[str]:
+        return self._catalog.list_values("exhibitor_offers", self._index)
+
+    @property
+    def is_sponsor(self) -> bool:
+        return bool(self._catalog.exhibitor_columns["is_sponsor"][self._index])
+
+    def dict(self) -> Dict[str, Any]:
+        """Ligne sous forme de dictionnaire (mêmes champs que Exhibitor)"""
+        values = {name: getattr(self, name) for name in EXHIBITOR_STRING_COLUMNS if not name.endswith(("_key", "_text"))}
+        values.update(tags=self.tags, special_offers=self.special_offers, is_sponsor=self.is_sponsor)
+        return values
+
+    def __repr__(self) -> str:
+        return f"ExhibitorRow({self.booth_number!r}, {self.name!r})"
+
+class EventRow:
+    """Vue en lecture seule sur une ligne de la table des événements"""
+
+    __slots__ = ("_catalog", "_index")
+
+    def __init__(self, catalog: "CatalogSnapshot", index: int):
+        self._catalog = catalog
+        self._index = index
+
+    @property
+    def start_ts(self) -> int:
+        return self._catalog.event_columns["start_ts"][self._index]
+
+    @property
+    def end_ts(self) -> int:
+        return self._catalog.event_columns["end_ts"][self._index]
+
+    @property
+    def start_time(self) -> datetime:
+        return from_epoch(self.start_ts)
+
+    @property
+    def end_time(self) -> datetime:
+        return from_epoch(self.end_ts)
+
+    @property
+    def additional_speakers(self) -> List[str]:
+        return self._catalog.list_values("event_speakers", self._index)
+
+    @property
+    def tags(self) -> List[str]:
+        return self._catalog.list_values("event_tags", self._index)
+
+    def dict(self) -> Dict[str, Any]:
+        """Ligne sous forme de dictionnaire (mêmes champs que Event)"""
+        values = {name: getattr(self, name) for name in EVENT_STRING_COLUMNS if not name.endswith(("_key", "_text"))}
+        values.update(start_time=self.start_time, end_time=self.end_time,
+                      additional_speakers=self.additional_speakers, tags=self.tags)
+        return values
+
+    def __repr__(self) -> str:
+        return f"EventRow({self.start_time:%d/%m %H:%M}, {self.title!r})"
+
+def _string_property(table: str, column: str) -> property:
+    """Accesseur d'une colonne de chaînes pour une classe de vue de ligne"""
+    def getter(row) -> str:
+        catalog = row._catalog
+        return catalog.strings[getattr(catalog, table)[column][row._index]]
+    return property(getter)
+
+for _column in EXHIBITOR_STRING_COLUMNS:
+    setattr(ExhibitorRow, _column, _string_property("exhibitor_columns", _column))
+for _column in EVENT_STRING_COLUMNS:
+    setattr(EventRow, _column, _string_property("event_columns", _column))
+
+class _RowSequence:
+    """Séquence paresseuse de vues de lignes"""
+
+    __slots__ = ("_catalog", "_row_class", "_length")
+
+    def __init__(self, catalog: "CatalogSnapshot", row_class: type, length: int):
+        self._catalog = catalog
+        self._row_class = row_class
+        self._length = length
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index: int):
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError(index)
+        return self._row_class(self._catalog, index)
+
+    def __iter__(self):
+        row_class, catalog = self._row_class, self._catalog
+        for index in range(self._length):
+            yield row_class(catalog, index)
+
+class CatalogSnapshot:
+    """Instantané en colonnes du catalogue d'un salon, optimisé pour la lecture.
+
+    Les chaînes sont internées dans une table unique, les champs de recherche
+    sont pré-normalisés, les dates sont des entiers et les événements sont
+    triés par heure de début. Les colonnes sont des séquences d'entiers
+    (array ou memoryview), ce qui permet aussi de les projeter depuis un
+    fichier binaire.
+    """
+
+    def __init__(self, strings: Sequence[str], exhibitor_columns: Dict[str, Sequence[int]],
+                 event_columns: Dict[str, Sequence[int]], version: int = 0, salon_id: str = ""):
+        self.strings = strings
+        self.exhibitor_columns = exhibitor_columns
+        self.event_columns = event_columns
+        self.version = version
+        self.salon_id = salon_id
+        self.exhibitors = _RowSequence(self, ExhibitorRow, len(exhibitor_columns["id"]))
+        self.events = _RowSequence(self, EventRow, len(event_columns["id"]))
+
+    @classmethod
+    def from_salon(cls, salon: Any) -> "CatalogSnapshot":
+        """Construit l'instantané à partir d'un Salon"""
+        return cls.from_records(salon.exhibitors, salon.events, salon.version, salon.id)
+
+    @classmethod
+    def from_records(cls, exhibitors: Iterable[Any], events: Iterable[Any],
+                     version: int = 0, salon_id: str = "") -> "CatalogSnapshot":
+        """Construit l'instantané à partir d'enregistrements ayant les attributs
+        de Exhibitor et Event (modèles, lignes de base de données...)"""
+        strings = StringTable()
+        exhibitor_columns: Dict[str, array] = {name: array("i") for name in EXHIBITOR_STRING_COLUMNS}
+        exhibitor_columns["is_sponsor"] = array("b")
+        event_columns: Dict[str, array] = {name: array("i") for name in EVENT_STRING_COLUMNS}
+        event_columns["start_ts"] = array("q")
+        event_columns["end_ts"] = array("q")
+        lists: Dict[str, List[List[str]]] = {
+            "exhibitor_tags": [], "exhibitor_offers": [], "event_speakers": [], "event_tags": []
+        }
+
+        for exhibitor in exhibitors:
+            values = {
+                "id": exhibitor.id,
+                "name": exhibitor.name,
+                "booth_number": exhibitor.booth_number,
+                "category": exhibitor.category,
+                "description": exhibitor.description,
+                "contact_person": exhibitor.contact_person,
+                "email": exhibitor.email,
+                "phone": exhibitor.phone,
+                "website": exhibitor.website,
+                "category_key": normalize_text(exhibitor.category),
+                "search_text": normalize_text(" ".join([
+                    exhibitor.name, exhibitor.description, *exhibitor.tags, exhibitor.category
+                ]))
+            }
+            for name in EXHIBITOR_STRING_COLUMNS:
+                exhibitor_columns[name].append(strings.intern(values[name]))
+            exhibitor_columns["is_sponsor"].append(1 if exhibitor.is_sponsor else 0)
+            lists["exhibitor_tags"].append(exhibitor.tags)
+            lists["exhibitor_offers"].append(exhibitor.special_offers)
+
+        for event in sorted(events, key=lambda e: e.start_time):
+            values = {
+                "id": event.id,
+                "title": event.title,
+                "description": event.description,
+                "category": event.category,
+                "speaker": event.speaker,
+                "location": event.location,
+                "language": event.language,
+                "level": event.level,
+                "category_key": normalize_text(event.category),
+                "search_text": normalize_text(" ".join([
+                    event.title, event.description, event.speaker, *event.tags, event.category
+                ]))
+            }
+            for name in EVENT_STRING_COLUMNS:
+                event_columns[name].append(strings.intern(values[name]))
+            event_columns["start_ts"].append(to_epoch(event.start_time))
+            event_columns["end_ts"].append(to_epoch(event.end_time))
+            lists["event_speakers"].append(event.additional_speakers)
+            lists["event_tags"].append(event.tags)
+
+        # Listes à longueur variable : offsets + valeurs à plat
+        for name, rows in lists.items():
+            offsets, values = array("i", [0]), array("i")
+            for row in rows:
+                values.extend(strings.intern(value) for value in row)
+                offsets.append(len(values))
+            columns = exhibitor_columns if name.startswith("exhibitor") else event_columns
+            columns[f"{name}_offsets"] = offsets
+            columns[f"{name}_values"] = values
+
+        return cls(strings.strings, exhibitor_columns, event_columns, version, salon_id)
+
+    def list_values(self, name: str, index: int) -> List[str]:
+        """Valeurs d'une colonne de listes pour une ligne"""
+        columns = self.exhibitor_columns if name.startswith("exhibitor") else self.event_columns
+        offsets = columns[f"{name}_offsets"]
+        values = columns[f"{name}_values"]
+        return [self.strings[values[i]] for i in range(offsets[index], offsets[index + 1])]
+
+    def exhibitors_in_category(self, category: str) -> Iterator[ExhibitorRow]:
+        """Exposants dont la catégorie contient le texte donné (casse et accents ignorés)"""
+        key = normalize_text(category)
+        column = self.exhibitor_columns["category_key"]
+        # Chaque catégorie distincte n'est comparée qu'une fois
+        matching = {string_id for string_id in set(column) if key in self.strings[string_id]}
+        for index, string_id in enumerate(column):
+            if string_id in matching:
+                yield ExhibitorRow(self, index)
+
+    def exhibitor_category_groups(self) -> Dict[str, List[int]]:
+        """Indices des exposants groupés par catégorie (ordre de première apparition)"""
+        groups: Dict[int, List[int]] = {}
+        for index, string_id in enumerate(self.exhibitor_columns["category"]):
+            groups.setdefault(string_id, []).append(index)
+        return {self.strings[string_id]: indices for string_id, indices in groups.items()}
+
+    def event_category_groups(self) -> Dict[str, List[int]]:
+        """Indices des événements (chronologiques) groupés par catégorie"""
+        groups: Dict[int, List[int]] = {}
+        for index, string_id in enumerate(self.event_columns["category"]):
+            groups.setdefault(string_id, []).append(index)
+        return {self.strings[string_id]: indices for string_id, indices in groups.items()}
+
+    def events_in_category(self, category: str, indices: Optional[Iterable[int]] = None) -> Iterator[EventRow]:
+        """Événements dont la catégorie contient le texte donné (parmi indices si fourni)"""
+        key = normalize_text(category)
+        column = self.event_columns["category_key"]
+        matching = {string_id for string_id in set(column) if key in self.strings[string_id]}
+        for index in (range(len(column)) if indices is None else indices):
+            if column[index] in matching:
+                yield EventRow(self, index)
+
+    def exhibitors_with_booth_prefix(self, prefix: str) -> Iterator[ExhibitorRow]:
+        """Exposants dont le numéro de stand commence par un préfixe"""
+        column = self.exhibitor_columns["booth_number"]
+        for index, string_id in enumerate(column):
+            if self.strings[string_id].startswith(prefix):
+                yield ExhibitorRow(self, index)
+
+    def event_range(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                    include_start: bool = True) -> range:
+        """Indices des événements commençant dans [start, end] (recherche dichotomique)"""
+        starts = self.event_columns["start_ts"]
+        if start is None:
+            low = 0
+        elif include_start:
+            low = bisect_left(starts, to_epoch(start))
+        else:
+            low = bisect_right(starts, to_epoch(start))
+        high = bisect_right(starts, to_epoch(end)) if end else len(starts)
+        return range(low, high)
+
+    def nbytes(self) -> int:
+        """Estimation de la mémoire occupée par l'instantané"""
+        total = getattr(self.strings, "nbytes", None) or sum(sys.getsizeof(s) for s in self.strings)
+        for columns in (self.exhibitor_columns, self.event_columns):
+            total += sum(column.itemsize * len(column) for column in columns.values())
+        return total
@@ -6,7 +6,7 @@ import asyncio
 from app.config import settings
 from app.utils.logger import setup_logger
 
-logger = setup_logger(_name_)
+logger = setup_logger(__name__)
 
 # Configuration SQLAlchemy
 if settings.DATABASE_URL.startswith("sqlite"):
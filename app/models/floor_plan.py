@@ -0,0 +1,352 @@
+import hashlib
+import math
+from html import escape
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from pydantic import BaseModel, Field, validator
+
+# Plan par défaut, utilisé quand les données du salon ne décrivent pas le lieu
+ZONE_NAMES = {
+    "A": "Hall Principal",
+    "B": "Technologie",
+    "C": "Services",
+    "D": "Innovation",
+    "E": "Restauration"
+}
+
+# Liaisons entre zones (distance en mètres entre leurs allées centrales)
+ZONE_CONNECTIONS = [
+    ("A", "B", 50.0),
+    ("A", "C", 80.0),
+    ("B", "C", 30.0),
+    ("B", "D", 60.0),
+    ("C", "D", 40.0),
+    ("C", "E", 70.0),
+    ("D", "E", 50.0)
+]
+
+# Services de chaque zone (distance en mètres depuis l'allée centrale)
+FACILITY_LAYOUT = {
+    "A": [("Entrée principale", 20.0), ("Accueil", 10.0), ("Information", 10.0), ("Toilettes", 15.0)],
+    "B": [("Démonstrations", 10.0)],
+    "C": [("Espace détente", 10.0)],
+    "D": [("Laboratoire", 10.0), ("Sortie de secours", 20.0)],
+    "E": [("Restaurant", 10.0), ("Café", 10.0), ("Toilettes", 15.0)]
+}
+
+# Indications depuis l'entrée
+ZONE_DIRECTIONS = {
+    "A": "Depuis l'entrée, continuez tout droit",
+    "B": "Depuis l'entrée, tournez à droite après l'accueil",
+    "C": "Depuis l'entrée, prenez à gauche après la zone B",
+    "D": "Au fond du salon, après la zone C",
+    "E": "Tout au fond, suivez les panneaux restauration"
+}
+
+# Rendu texte : largeur intérieure du cadre et lignes de stands par zone
+ASCII_WIDTH = 44
+ASCII_BOOTH_LINES = 3
+
+# Rendu SVG : pixels par mètre et taille d'une zone sans géométrie connue (mètres)
+SVG_SCALE = 8.0
+SVG_ZONE_SIZE = (60.0, 20.0)
+SVG_BOOTH_SIZE = 3.0
+
+class FacilityLayout(BaseModel):
+    """Service d'une zone (toilettes, café, accueil...)"""
+    name: str = Field(..., description="Nom du service")
+    distance: Optional[float] = Field(None, description="Distance à l'allée centrale (mètres, par défaut d'après la position)")
+    x: Optional[float] = Field(None, description="Position X sur le plan (mètres)")
+    y: Optional[float] = Field(None, description="Position Y sur le plan (mètres)")
+
+class ZoneLayout(BaseModel):
+    """Zone du plan et sa géométrie (optionnelle)"""
+    id: str = Field(..., description="Identifiant de la zone (A, B...)")
+    name: str = Field(..., description="Nom de la zone")
+    directions: Optional[str] = Field(None, description="Indications depuis l'entrée")
+    booths: List[str] = Field(default_factory=list, description="Stands de la zone")
+    facilities: List[FacilityLayout] = Field(default_factory=list, description="Services de la zone")
+    x: Optional[float] = Field(None, description="Coin supérieur gauche X (mètres)")
+    y: Optional[float] = Field(None, description="Coin supérieur gauche Y (mètres)")
+    width: Optional[float] = Field(None, description="Largeur (mètres)")
+    height: Optional[float] = Field(None, description="Hauteur (mètres)")
+
+    @validator('id')
+    def validate_id(cls, v):
+        return v.strip().upper()
+
+    @validator('booths', each_item=True)
+    def validate_booths(cls, v):
+        return v.strip().upper()
+
+    @property
+    def bounds(self) -> Optional[Tuple[float, float, float, float]]:
+        if None in (self.x, self.y, self.width, self.height):
+            return None
+        return (self.x, self.y, self.x + self.width, self.y + self.height)
+
+class ZoneConnection(BaseModel):
+    """Passage entre deux zones"""
+    a: str = Field(..., alias="from", description="Zone de départ")
+    b: str = Field(..., alias="to", description="Zone d'arrivée")
+    distance: float = Field(..., description="Distance entre les allées centrales (mètres)")
+
+    class Config:
+        allow_population_by_field_name = True
+
+class FloorPlanLayout(BaseModel):
+    """Description du lieu dans les données du salon"""
+    zones: List[ZoneLayout] = Field(default_factory=list, description="Zones du salon")
+    connections: List[ZoneConnection] = Field(default_factory=list, description="Passages entre zones")
+
+    @classmethod
+    def default(cls) -> "FloorPlanLayout":
+        """Plan par défaut (cinq zones en enfilade)"""
+        return cls(
+            zones=[
+                ZoneLayout(id=zone, name=name, directions=ZONE_DIRECTIONS.get(zone),
+                           facilities=[FacilityLayout(name=label, distance=distance)
+                                       for label, distance in FACILITY_LAYOUT.get(zone, [])])
+                for zone, name in ZONE_NAMES.items()
+            ],
+            connections=[ZoneConnection(a=a, b=b, distance=distance) for a, b, distance in ZONE_CONNECTIONS]
+        )
+
+class BoothPlacement(NamedTuple):
+    """Stand placé sur le plan"""
+    booth_number: str
+    name: str
+    zone: str
+    x: Optional[float]
+    y: Optional[float]
+
+class FloorPlan:
+    """Plan compilé d'un salon pour une version du plan donnée.
+
+    La zone de chaque stand est résolue une fois à la construction (champ zone
+    de l'exposant, liste des stands de la zone, géométrie de la zone, puis
+    préfixe du numéro de stand). Les rendus texte et SVG sont produits au
+    premier appel puis servis tels quels : le plan est reconstruit (et ses
+    rendus avec lui) quand le plan du salon change (stands, positions, salles).
+    """
+
+    def __init__(self, layout: FloorPlanLayout, layout_version: int = 0):
+        self.layout_version = layout_version
+        self.zones: Dict[str, ZoneLayout] = {zone.id: zone for zone in layout.zones}
+        self.connections: List[Tuple[str, str, float]] = [
+            (c.a.upper(), c.b.upper(), c.distance) for c in layout.connections
+            if c.a.upper() in self.zones and c.b.upper() in self.zones
+        ]
+        self._listed: Dict[str, str] = {
+            booth: zone.id for zone in layout.zones for booth in zone.booths
+        }
+        self._booth_zones: Dict[str, str] = {}
+        self._booths: Dict[str, List[BoothPlacement]] = {zone: [] for zone in self.zones}
+        self._ascii: Optional[str] = None
+        self._svg: Optional[str] = None
+        self._etags: Dict[bool, str] = {}
+
+    @classmethod
+    def from_salon(cls, salon: Any) -> "FloorPlan":
+        """Plan du salon (plan par défaut si les données n'en décrivent pas)"""
+        layout = getattr(salon, "layout", None)
+        plan = cls(layout if layout is not None and layout.zones else FloorPlanLayout.default(),
+                   salon.layout_version)
+        for exhibitor in salon.exhibitors:
+            plan.place(exhibitor)
+        return plan
+
+    @property
+    def default_zone(self) -> str:
+        return next(iter(self.zones))
+
+    def zone_name(self, zone: str) -> str:
+        layout = self.zones.get(zone)
+        return layout.name if layout else zone
+
+    def zone_of(self, exhibitor: Any) -> str:
+        """Zone d'un exposant selon le plan (sans l'y placer)"""
+        zone = (getattr(exhibitor, "zone", None) or "").strip().upper()
+        if zone in self.zones:
+            return zone
+        booth = exhibitor.booth_number.upper()
+        if booth in self._listed:
+            return self._listed[booth]
+        x, y = getattr(exhibitor, "location_x", None), getattr(exhibitor, "location_y", None)
+        if x is not None and y is not None:
+            for layout in self.zones.values():
+                bounds = layout.bounds
+                if bounds and bounds[0] <= x <= bounds[2] and bounds[1] <= y <= bounds[3]:
+                    return layout.id
+        for length in range(len(booth), 0, -1):
+            if booth[:length] in self.zones:
+                return booth[:length]
+        return self.default_zone
+
+    def place(self, exhibitor: Any) -> str:
+        """Place le stand d'un exposant et retourne sa zone"""
+        zone = self.zone_of(exhibitor)
+        booth = exhibitor.booth_number.upper()
+        self._booth_zones[booth] = zone
+        self._booths[zone].append(BoothPlacement(
+            booth, exhibitor.name, zone,
+            getattr(exhibitor, "location_x", None), getattr(exhibitor, "location_y", None)
+        ))
+        return zone
+
+    def booth_zone(self, booth_number: str) -> Optional[str]:
+        """Zone d'un stand (None si le stand est inconnu)"""
+        return self._booth_zones.get(booth_number.upper())
+
+    def zone_booths(self, zone: str) -> List[BoothPlacement]:
+        """Stands d'une zone, dans l'ordre des données"""
+        return self._booths.get(zone, [])
+
+    def directions(self, zone: str) -> str:
+        layout = self.zones.get(zone)
+        return (layout.directions if layout else None) or "Consultez le plan à l'accueil"
+
+    def facilities(self, zone: str) -> List[FacilityLayout]:
+        layout = self.zones.get(zone)
+        return layout.facilities if layout else []
+
+    # Rendus
+
+    def render_ascii(self) -> str:
+        """Plan texte (chat et borne), calculé une fois par version"""
+        if self._ascii is None:
+            self._ascii = self._build_ascii()
+        return self._ascii
+
+    def render_svg(self) -> str:
+        """Plan SVG (tableau de bord), calculé une fois par version"""
+        if self._svg is None:
+            self._svg = self._build_svg()
+        return self._svg
+
+    def etag(self, svg: bool) -> str:
+        """ETag d'un rendu : empreinte de son contenu, stable d'un processus à l'autre"""
+        if svg not in self._etags:
+            content = self.render_svg() if svg else self.render_ascii()
+            self._etags[svg] = '"%s"' % hashlib.sha256(content.encode("utf-8")).hexdigest()[:32]
+        return self._etags[svg]
+
+    def _build_ascii(self) -> str:
+        width = ASCII_WIDTH
+
+        def line(text: str = "") -> str:
+            return f"│ {text[:width - 2].ljust(width - 2)} │"
+
+        def wrap(words: List[str], separator: str = " ") -> List[str]:
+            rows, current = [], ""
+            for word in words:
+                if current and len(current) + len(separator) + len(word) > width - 2:
+                    rows.append(current + separator.rstrip())
+                    current = word
+                else:
+                    current = f"{current}{separator}{word}" if current else word
+            if current:
+                rows.append(current)
+            return rows
+
+        separator = "├" + "─" * width + "┤"
+        lines = ["┌" + "─" * width + "┐"]
+        for index, (zone, layout) in enumerate(self.zones.items()):
+            if index:
+                lines.append(separator)
+            lines.append(line(f"ZONE {zone} - {layout.name.upper()}"))
+
+            booths = [f"[{booth.booth_number}]" for booth in self._booths[zone]]
+            rows = wrap(booths)
+            if len(rows) > ASCII_BOOTH_LINES:
+                shown = sum(len(row.split()) for row in rows[:ASCII_BOOTH_LINES])
+                rows = rows[:ASCII_BOOTH_LINES] + [f"... et {len(booths) - shown} autres stands"]
+            lines.extend(line(row) for row in rows)
+
+            if layout.facilities:
+                names = [f.name for f in layout.facilities]
+                lines.extend(line(row) for row in wrap([f"Services : {names[0]}"] + names[1:], ", "))
+        lines.append("└" + "─" * width + "┘")
+        return "\n".join(lines)
+
+    def _zone_rectangles(self) -> Dict[str, Tuple[float, float, float, float]]:
+        """Rectangle de chaque zone : géométrie des données, sinon emprise des
+        stands situés, sinon empilement sous les zones déjà placées"""
+        rectangles: Dict[str, Tuple[float, float, float, float]] = {}
+        for zone, layout in self.zones.items():
+            if layout.bounds:
+                rectangles[zone] = layout.bounds
+                continue
+            located = [b for b in self._booths[zone] if b.x is not None and b.y is not None]
+            if located:
+                margin = 2 * SVG_BOOTH_SIZE
+                rectangles[zone] = (min(b.x for b in located) - margin, min(b.y for b in located) - margin,
+                                    max(b.x for b in located) + margin, max(b.y for b in located) + margin)
+
+        width, height = SVG_ZONE_SIZE
+        columns = max(1, int(width / (SVG_BOOTH_SIZE * 1.5)))
+        bottom = max((r[3] for r in rectangles.values()), default=0.0)
+        for zone in self.zones:
+            if zone not in rectangles:
+                # Assez haute pour la grille de ses stands
+                rows = math.ceil(len(self._booths[zone]) / columns)
+                zone_height = max(height, 5 * SVG_BOOTH_SIZE + rows * SVG_BOOTH_SIZE * 1.5)
+                rectangles[zone] = (0.0, bottom, width, bottom + zone_height)
+                bottom += zone_height
+        return rectangles
+
+    def _build_svg(self) -> str:
+        rectangles = self._zone_rectangles()
+        min_x = min(r[0] for r in rectangles.values())
+        min_y = min(r[1] for r in rectangles.values())
+        max_x = max(r[2] for r in rectangles.values())
+        max_y = max(r[3] for r in rectangles.values())
+
+        def px(value: float, origin: float) -> float:
+            return round((value - origin) * SVG_SCALE + SVG_SCALE, 1)
+
+        size = SVG_BOOTH_SIZE * SVG_SCALE
+        parts = [
+            f'<svg xmlns="http://www.w3.org/2000/svg" '
+            f'width="{px(max_x, min_x) + SVG_SCALE}" height="{px(max_y, min_y) + SVG_SCALE}" '
+            f'font-family="sans-serif" font-size="11">'
+        ]
+        for zone, (x0, y0, x1, y1) in rectangles.items():
+            parts.append(
+                f'<g class="zone" data-zone="{escape(zone)}">'
+                f'<rect x="{px(x0, min_x)}" y="{px(y0, min_y)}" '
+                f'width="{round((x1 - x0) * SVG_SCALE, 1)}" height="{round((y1 - y0) * SVG_SCALE, 1)}" '
+                f'fill="#f4f6f8" stroke="#607080"/>'
+                f'<text x="{px(x0, min_x) + 4}" y="{px(y0, min_y) + 14}" font-weight="bold">'
+                f'Zone {escape(zone)} - {escape(self.zone_name(zone))}</text>'
+            )
+
+            # Stands sans coordonnées : rangés en grille dans la zone
+            columns = max(1, int((x1 - x0) / (SVG_BOOTH_SIZE * 1.5)))
+            unplaced = 0
+            for booth in self._booths[zone]:
+                if booth.x is not None and booth.y is not None:
+                    bx, by = booth.x - SVG_BOOTH_SIZE / 2, booth.y - SVG_BOOTH_SIZE / 2
+                else:
+                    bx = x0 + SVG_BOOTH_SIZE / 2 + (unplaced % columns) * SVG_BOOTH_SIZE * 1.5
+                    by = y0 + 3 * SVG_BOOTH_SIZE + (unplaced // columns) * SVG_BOOTH_SIZE * 1.5
+                    unplaced += 1
+                parts.append(
+                    f'<rect class="booth" data-booth="{escape(booth.booth_number)}" '
+                    f'x="{px(bx, min_x)}" y="{px(by, min_y)}" width="{size}" height="{size}" '
+                    f'fill="#cfe3ff" stroke="#3a6ea5"><title>{escape(booth.booth_number)} - '
+                    f'{escape(booth.name)}</title></rect>'
+                )
+
+            # Services : position des données, sinon le long du bord inférieur
+            for index, facility in enumerate(self.zones[zone].facilities):
+                fx = facility.x if facility.x is not None else x0 + SVG_BOOTH_SIZE + index * 2 * SVG_BOOTH_SIZE
+                fy = facility.y if facility.y is not None else y1 - SVG_BOOTH_SIZE
+                parts.append(
+                    f'<circle class="facility" cx="{px(fx, min_x)}" cy="{px(fy, min_y)}" '
+                    f'r="{size / 3}" fill="#ffb347"><title>{escape(facility.name)}</title></circle>'
+                )
+            parts.append('</g>')
+        parts.append('</svg>')
+        return "".join(parts)
+
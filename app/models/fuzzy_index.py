@@ -0,0 +1,131 @@
+import heapq
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set
+
+from app.utils.helpers import normalize_text
+
+class FuzzyMatch(NamedTuple):
+    """Résultat d'une recherche approximative"""
+    label: str
+    kind: str
+    target: Any
+    score: float
+
+def _trigrams(text: str) -> Set[str]:
+    """Trigrammes d'un texte normalisé (mots bornés par des espaces)"""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def levenshtein_distance(a: str, b: str, max_distance: Optional[int] = None) -> int:
+    """Distance d'édition entre deux chaînes (arrêt anticipé au-delà de max_distance)"""
+    if a == b:
+        return 0
+    if len(a) < len(b):
+        a, b = b, a
+    if max_distance is not None and len(a) - len(b) > max_distance:
+        return max_distance + 1
+
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b)
+            ))
+        if max_distance is not None and min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+def similarity(query: str, key: str) -> float:
+    """Similarité (0 à 1) entre une requête et une clé normalisées"""
+    words = key.split()
+    forms = {key}
+    # Fenêtres de mots autour de la longueur de la requête (requêtes partielles)
+    for size in {len(query.split()), len(query.split()) - 1}:
+        for i in range(len(words) - size + 1):
+            if size > 0:
+                forms.add(" ".join(words[i:i + size]))
+
+    # La reconnaissance vocale coupe ou colle souvent les mots : on compare sans espaces
+    compact_query = query.replace(" ", "")
+    best = 0.0
+    for form in forms:
+        compact_form = form.replace(" ", "")
+        longest = max(len(compact_query), len(compact_form)) or 1
+        best = max(best, 1 - levenshtein_distance(compact_query, compact_form) / longest)
+    return best
+
+class FuzzyIndex:
+    """Index de trigrammes pour la correspondance approximative de noms"""
+
+    # Nombre de candidats retenus par les trigrammes avant le calcul de distance
+    MAX_CANDIDATES = 50
+
+    def __init__(self, min_score: float = 0.5):
+        self.min_score = min_score
+        self._postings: Dict[str, Set[str]] = defaultdict(set)
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._refcounts: Dict[str, int] = defaultdict(int)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, key: str, label: str, kind: str, target: Any = None):
+        """Ajoute une entrée (les ajouts répétés d'une même clé sont comptés)"""
+        self._refcounts[key] += 1
+        if key in self._entries:
+            return
+
+        text = normalize_text(label).strip()
+        grams = _trigrams(text)
+        self._entries[key] = {"label": label, "kind": kind, "target": target,
+                              "text": text, "trigrams": grams}
+        for gram in grams:
+            self._postings[gram].add(key)
+
+    def remove(self, key: str):
+        """Retire une entrée lorsque plus aucun enregistrement n'y fait référence"""
+        if key not in self._entries:
+            return
+        self._refcounts[key] -= 1
+        if self._refcounts[key] > 0:
+            return
+
+        del self._refcounts[key]
+        entry = self._entries.pop(key)
+        for gram in entry["trigrams"]:
+            keys = self._postings.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._postings[gram]
+
+    def search(self, query: str, limit: int = 3, kinds: Optional[Iterable[str]] = None) -> List[FuzzyMatch]:
+        """Retourne les meilleures correspondances approximatives"""
+        text = normalize_text(query).strip()
+        if not text:
+            return []
+        kinds = set(kinds) if kinds else None
+
+        # Génération des candidats : seules les entrées partageant des trigrammes
+        shared: Dict[str, int] = defaultdict(int)
+        for gram in _trigrams(text):
+            for key in self._postings.get(gram, ()):
+                if kinds is None or self._entries[key]["kind"] in kinds:
+                    shared[key] += 1
+        if not shared:
+            return []
+
+        candidates = heapq.nlargest(self.MAX_CANDIDATES, shared.items(), key=lambda x: x[1])
+
+        matches = []
+        for key, _ in candidates:
+            entry = self._entries[key]
+            score = similarity(text, entry["text"])
+            if score >= self.min_score:
+                matches.append(FuzzyMatch(entry["label"], entry["kind"], entry["target"], round(score, 3)))
+
+        return heapq.nlargest(limit, matches, key=lambda m: m.score)
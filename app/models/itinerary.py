@@ -0,0 +1,181 @@
+import math
+from datetime import datetime, timedelta
+from typing import List, NamedTuple, Optional, Tuple
+
+from app.models.venue_graph import WALKING_SPEED, VenueGraph
+
+# Durée d'une visite de stand (minutes)
+DEFAULT_BOOTH_VISIT = 10.0
+
+# Retard toléré à l'arrivée d'un événement (minutes)
+EVENT_LATE_TOLERANCE = 5.0
+
+class TourStop(NamedTuple):
+    """Étape demandée : stand (durée de visite) ou événement (horaire imposé)"""
+    key: str
+    label: str
+    visit_minutes: float = DEFAULT_BOOTH_VISIT
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
+
+    @property
+    def is_event(self) -> bool:
+        return self.start_time is not None
+
+class ScheduledStop(NamedTuple):
+    """Étape planifiée avec ses horaires"""
+    stop: TourStop
+    arrival: datetime
+    departure: datetime
+    walk_minutes: float
+
+class Tour(NamedTuple):
+    """Parcours planifié et étapes qui n'ont pas pu y entrer"""
+    stops: List[ScheduledStop]
+    unscheduled: List[Tuple[TourStop, str]]
+    distance: float
+
+class TourPlanner:
+    """Ordonnancement d'une visite (voyageur de commerce avec fenêtres de temps).
+
+    Les événements sont des étapes à horaire imposé ; les stands sont insérés
+    un à un à la position faisable la moins coûteuse (insertion du plus
+    proche), puis l'ordre est amélioré par 2-opt. Une tournée est faisable si
+    chaque événement est atteint au plus tard à son début (avec une petite
+    tolérance).
+    """
+
+    def __init__(self, graph: VenueGraph, visit_minutes: float = DEFAULT_BOOTH_VISIT,
+                 late_tolerance: float = EVENT_LATE_TOLERANCE):
+        self.graph = graph
+        self.visit_minutes = visit_minutes
+        self.late_tolerance = late_tolerance
+
+    def plan(self, origin_key: str, stops: List[TourStop], start_time: datetime) -> Tour:
+        """Planifie la visite des étapes à partir d'un point et d'une heure de départ"""
+        unscheduled: List[Tuple[TourStop, str]] = []
+        candidates = []
+        for stop in stops:
+            if stop.key not in self.graph:
+                unscheduled.append((stop, "lieu inconnu"))
+            elif stop.is_event and stop.end_time <= start_time:
+                unscheduled.append((stop, "déjà terminé"))
+            elif any(stop.key == other.key and stop.start_time == other.start_time for other in candidates):
+                continue
+            else:
+                candidates.append(stop)
+
+        # Matrices des coûts (pondérés par l'affluence) et des longueurs réelles (0 = point de départ)
+        keys = [origin_key] + [stop.key for stop in candidates]
+        size = len(keys)
+        self._distance = [[0.0] * size for _ in range(size)]
+        self._meters = [[0.0] * size for _ in range(size)]
+        for i in range(size):
+            for j in range(i + 1, size):
+                length, cost = self.graph.measure(keys[i], keys[j])
+                self._distance[i][j] = self._distance[j][i] = cost
+                self._meters[i][j] = self._meters[j][i] = length
+        self._stops = [None] + candidates
+        self._start = start_time
+
+        # Squelette : événements dans l'ordre chronologique, sans chevauchement
+        route: List[int] = []
+        for index in sorted((i for i in range(1, size) if self._stops[i].is_event),
+                            key=lambda i: self._stops[i].start_time):
+            if self._feasible(route + [index]):
+                route.append(index)
+            else:
+                unscheduled.append((self._stops[index], "conflit d'horaire"))
+
+        # Insertion des stands, du plus proche de la tournée au plus éloigné
+        pending = [i for i in range(1, size) if not self._stops[i].is_event]
+        while pending:
+            nearest = min(pending, key=lambda i: min(self._distance[i][j] for j in [0] + route))
+            pending.remove(nearest)
+            position = self._cheapest_insertion(route, nearest)
+            if position is None:
+                unscheduled.append((self._stops[nearest], "pas de créneau avant les événements"))
+            else:
+                route.insert(position, nearest)
+
+        route = self._two_opt(route)
+        return Tour(self._schedule(route), unscheduled, self._length(route, self._meters))
+
+    def _walk_minutes(self, a: int, b: int) -> float:
+        return self._distance[a][b] / WALKING_SPEED
+
+    def _length(self, route: List[int], matrix: List[List[float]]) -> float:
+        previous, total = 0, 0.0
+        for index in route:
+            total += matrix[previous][index]
+            previous = index
+        return total
+
+    def _feasible(self, route: List[int]) -> bool:
+        """Vérifie que chaque événement est atteint à temps"""
+        clock, previous = 0.0, 0
+        for index in route:
+            clock += self._walk_minutes(previous, index)
+            stop = self._stops[index]
+            if stop.is_event:
+                begins = (stop.start_time - self._start).total_seconds() / 60
+                ends = (stop.end_time - self._start).total_seconds() / 60
+                if clock > max(begins, 0.0) + self.late_tolerance:
+                    return False
+                clock = max(clock, ends)
+            else:
+                clock += stop.visit_minutes
+            previous = index
+        return True
+
+    def _cheapest_insertion(self, route: List[int], index: int) -> Optional[int]:
+        """Position faisable qui allonge le moins la tournée"""
+        best_position, best_cost = None, math.inf
+        for position in range(len(route) + 1):
+            previous = route[position - 1] if position else 0
+            added = self._distance[previous][index]
+            if position < len(route):
+                following = route[position]
+                added += self._distance[index][following] - self._distance[previous][following]
+            if added < best_cost and self._feasible(route[:position] + [index] + route[position:]):
+                best_position, best_cost = position, added
+        return best_position
+
+    def _two_opt(self, route: List[int]) -> List[int]:
+        """Inversions de segments tant qu'elles raccourcissent la tournée (parcours ouvert)"""
+        distance = self._distance
+        improved = True
+        while improved:
+            improved = False
+            for i in range(len(route) - 1):
+                before = route[i - 1] if i else 0
+                for j in range(i + 1, len(route)):
+                    after = route[j + 1] if j + 1 < len(route) else None
+                    delta = distance[before][route[j]] - distance[before][route[i]]
+                    if after is not None:
+                        delta += distance[route[i]][after] - distance[route[j]][after]
+                    if delta < -1e-9:
+                        candidate = route[:i] + route[i:j + 1][::-1] + route[j + 1:]
+                        if self._feasible(candidate):
+                            route = candidate
+                            improved = True
+                            break
+                if improved:
+                    break
+        return route
+
+    def _schedule(self, route: List[int]) -> List[ScheduledStop]:
+        """Horaires d'arrivée et de départ de chaque étape"""
+        clock, previous = self._start, 0
+        scheduled = []
+        for index in route:
+            walk = self._walk_minutes(previous, index)
+            arrival = clock + timedelta(minutes=walk)
+            stop = self._stops[index]
+            if stop.is_event:
+                departure = max(arrival, stop.end_time)
+            else:
+                departure = arrival + timedelta(minutes=stop.visit_minutes)
+            scheduled.append(ScheduledStop(stop, arrival, departure, walk))
+            clock, previous = departure, index
+        return scheduled
@@ -0,0 +1,98 @@
+import re
+from typing import Any, Dict, List, Optional
+
+from app.utils.helpers import normalize_text
+
+_BOOTH_SEPARATORS = re.compile(r"[\s\-_./]+")
+_WORD_PATTERN = re.compile(r"[a-z0-9]+")
+# Mot écrit d'un seul tenant, séparateurs de stand compris ("a-12", "b.08")
+_CHUNK_PATTERN = re.compile(r"[a-z0-9]+(?:[\-_./][a-z0-9]+)*")
+_LETTER = re.compile(r"[a-z]")
+_DIGIT = re.compile(r"[0-9]")
+
+# Mots qui annoncent un numéro de stand dicté en plusieurs mots ("stand a 12")
+BOOTH_CUES = frozenset({"stand", "stands", "booth", "allee"})
+BOOTH_NUMBER_WORDS = frozenset({"numero", "no", "n"})
+
+def normalize_booth(booth_number: str) -> str:
+    """Normalise un numéro de stand ("a-12", "A 12" -> "A12")"""
+    return _BOOTH_SEPARATORS.sub("", booth_number).upper()
+
+def normalize_name(name: str) -> str:
+    """Normalise un nom (minuscules, sans accents ni ponctuation)"""
+    return " ".join(_WORD_PATTERN.findall(normalize_text(name)))
+
+class ExhibitorLookup:
+    """Tables de correspondance (stand, identifiant, nom) partagées par les outils"""
+
+    def __init__(self, exhibitors: Optional[list] = None):
+        self.by_id: Dict[str, Any] = {}
+        self.by_booth: Dict[str, Any] = {}
+        self.by_name: Dict[str, Any] = {}
+        self._max_booth_words = 1
+        for exhibitor in exhibitors or []:
+            self.add(exhibitor)
+
+    def __len__(self) -> int:
+        return len(self.by_id)
+
+    def add(self, exhibitor: Any):
+        """Enregistre un exposant dans toutes les tables"""
+        self.by_id[exhibitor.id] = exhibitor
+        self.by_booth[normalize_booth(exhibitor.booth_number)] = exhibitor
+        self.by_name[normalize_name(exhibitor.name)] = exhibitor
+        self._max_booth_words = max(
+            self._max_booth_words,
+            len(_WORD_PATTERN.findall(normalize_text(exhibitor.booth_number)))
+        )
+
+    def remove(self, exhibitor: Any):
+        """Retire un exposant de toutes les tables"""
+        self.by_id.pop(exhibitor.id, None)
+        booth = normalize_booth(exhibitor.booth_number)
+        if self.by_booth.get(booth) is exhibitor:
+            del self.by_booth[booth]
+        name = normalize_name(exhibitor.name)
+        if self.by_name.get(name) is exhibitor:
+            del self.by_name[name]
+
+    def get_by_id(self, exhibitor_id: str) -> Optional[Any]:
+        return self.by_id.get(exhibitor_id)
+
+    def get_by_booth(self, booth_number: str) -> Optional[Any]:
+        return self.by_booth.get(normalize_booth(booth_number))
+
+    def get_by_name(self, name: str) -> Optional[Any]:
+        return self.by_name.get(normalize_name(name))
+
+    def find_booth_in_text(self, text: str) -> Optional[Any]:
+        """Trouve le premier numéro de stand cité dans une phrase ("stand a 12 svp", "où est A-12 ?").
+
+        Un mot seul compte s'il a la forme d'un code de stand (lettres et
+        chiffres, "A12", "b-08"). Les numéros dictés en plusieurs mots ("a 12")
+        ou purement numériques ne sont reconnus qu'après "stand", "booth" ou
+        "allée" : "il y a 12 exposants" et "à 12 heures" ne désignent aucun stand.
+        """
+        words = _CHUNK_PATTERN.findall(normalize_text(text))
+        for i, word in enumerate(words):
+            cued = self._follows_cue(words, i)
+            if cued or (_LETTER.search(word) and _DIGIT.search(word)):
+                exhibitor = self.by_booth.get(normalize_booth(word))
+                if exhibitor is not None:
+                    return exhibitor
+            if not cued:
+                continue
+            for size in range(2, self._max_booth_words + 2):
+                if i + size > len(words):
+                    break
+                exhibitor = self.by_booth.get(normalize_booth("".join(words[i:i + size])))
+                if exhibitor is not None:
+                    return exhibitor
+        return None
+
+    @staticmethod
+    def _follows_cue(words: List[str], i: int) -> bool:
+        """Vrai si le mot i suit "stand" (éventuellement "stand numéro")"""
+        if i >= 1 and words[i - 1] in BOOTH_CUES:
+            return True
+        return i >= 2 and words[i - 1] in BOOTH_NUMBER_WORDS and words[i - 2] in BOOTH_CUES
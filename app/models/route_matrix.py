@@ -0,0 +1,202 @@
+import threading
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+# Taille maximale d'un lot de trajets (API)
+MAX_BATCH_PAIRS = 20000
+
+class RouteBatchRequest(BaseModel):
+    """Lot de trajets à évaluer (clés du plan ou numéros de stand)"""
+    pairs: List[Tuple[str, str]] = Field(..., description="Couples (origine, destination)")
+    paths: bool = Field(default=False, description="Inclure les étapes de chaque trajet")
+
+class BatchRoutes(NamedTuple):
+    """Résultat d'un lot : tableaux alignés sur les couples demandés"""
+    distance: np.ndarray
+    cost: np.ndarray
+    known: np.ndarray
+
+def _floyd_warshall(weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Toutes paires (vectorisé ligne/colonne du pivot) avec matrice du prochain saut"""
+    size = len(weights)
+    distance = weights.copy()
+    next_hop = np.where(np.isfinite(weights), np.arange(size)[None, :], -1).astype(np.int32)
+    np.fill_diagonal(next_hop, np.arange(size))
+    for k in range(size):
+        through = distance[:, k:k + 1] + distance[k:k + 1, :]
+        better = through < distance
+        if better.any():
+            distance = np.where(better, through, distance)
+            next_hop = np.where(better, next_hop[:, k:k + 1], next_hop)
+    return distance, next_hop
+
+class RouteMatrix:
+    """Distances et prochains sauts entre tous les nœuds du plan.
+
+    Les blocs d'une zone sont calculés par Floyd-Warshall vectorisé sur les
+    seuls nœuds de la zone ; les blocs entre zones s'obtiennent par diffusion
+    (nœud → allée centrale → zones → allée centrale → nœud). L'affluence est
+    appliquée à la lecture à partir de la table des zones du graphe : la
+    matrice n'est jamais recalculée quand les relevés changent.
+    """
+
+    def __init__(self, graph: Any):
+        self.graph = graph
+        size = len(graph.nodes)
+        self.keys = [node.key for node in graph.nodes]
+        self.index: Dict[str, int] = {key: i for i, key in enumerate(self.keys)}
+        self.zones = list(graph._hubs)
+        self._zone_ids = {zone: i for i, zone in enumerate(self.zones)}
+        self.zone_of = np.array([self._zone_ids[node.zone] for node in graph.nodes], dtype=np.int32)
+        self.hubs = np.array([graph._hubs[zone] for zone in self.zones], dtype=np.int32)
+        self.hub_distance = np.array(graph._hub_distance, dtype=np.float64)
+
+        self.distance = np.full((size, size), np.inf, dtype=np.float32)
+        self.next_hop = np.full((size, size), -1, dtype=np.int32)
+
+        members = [np.flatnonzero(self.zone_of == z) for z in range(len(self.zones))]
+        toward_hub = np.arange(size, dtype=np.int32)
+        for z, nodes in enumerate(members):
+            local = {int(node): i for i, node in enumerate(nodes)}
+            weights = np.full((len(nodes), len(nodes)), np.inf)
+            np.fill_diagonal(weights, 0.0)
+            for node in nodes:
+                for neighbor, weight in graph._adjacency[node]:
+                    if neighbor in local:
+                        i, j = local[int(node)], local[neighbor]
+                        weights[i, j] = min(weights[i, j], weight)
+            block, hops = _floyd_warshall(weights)
+            block_ix = np.ix_(nodes, nodes)
+            self.distance[block_ix] = block
+            self.next_hop[block_ix] = np.where(hops >= 0, nodes[np.maximum(hops, 0)], -1)
+            toward_hub[nodes] = self.next_hop[nodes, self.hubs[z]]
+
+        # Blocs entre zones (sans affluence) : le premier pas mène à l'allée centrale
+        base = graph._solve_zones({zone: 1.0 for zone in self.zones})
+        for a, sources in enumerate(members):
+            for b, targets in enumerate(members):
+                if a == b:
+                    continue
+                between = base.distance.get((self.zones[a], self.zones[b]), np.inf)
+                self.distance[np.ix_(sources, targets)] = (
+                    self.hub_distance[sources][:, None] + between + self.hub_distance[targets][None, :]
+                )
+                hops = np.repeat(toward_hub[sources][:, None], len(targets), axis=1)
+                if np.isfinite(between):
+                    hub_row = np.flatnonzero(sources == self.hubs[a])
+                    hops[hub_row, :] = self.hubs[self._zone_ids[base.next_zone[(self.zones[a], self.zones[b])]]]
+                self.next_hop[np.ix_(sources, targets)] = hops
+
+        self._lock = threading.Lock()
+        self._table = None
+        self._zone_terms: Tuple[np.ndarray, np.ndarray, np.ndarray] = (
+            np.ones(len(self.zones)), np.zeros((len(self.zones),) * 2), np.zeros((len(self.zones),) * 2)
+        )
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @property
+    def nbytes(self) -> int:
+        return self.distance.nbytes + self.next_hop.nbytes
+
+    @staticmethod
+    def estimate_nbytes(size: int) -> int:
+        """Taille de la matrice d'un plan de size nœuds, sans la construire"""
+        return size * size * (np.dtype(np.float32).itemsize + np.dtype(np.int32).itemsize)
+
+    def _zone_state(self) -> Tuple[Any, np.ndarray, np.ndarray, np.ndarray]:
+        """Pénalités, coûts et longueurs réelles entre zones pour la table d'affluence courante"""
+        table = self.graph._zones
+        if table is not self._table:
+            with self._lock:
+                if table is not self._table:
+                    count = len(self.zones)
+                    penalties = np.array([table.penalties.get(z, 1.0) for z in self.zones])
+                    cost = np.full((count, count), np.inf)
+                    length = np.full((count, count), np.inf)
+                    for a, za in enumerate(self.zones):
+                        for b, zb in enumerate(self.zones):
+                            if np.isfinite(table.distance.get((za, zb), np.inf)):
+                                path = self.graph._zone_path(table, za, zb)
+                                cost[a, b] = table.distance[(za, zb)]
+                                length[a, b] = sum(self.graph._zone_edges[edge] for edge in zip(path, path[1:]))
+                    self._zone_terms = (penalties, cost, length)
+                    self._table = table
+        return (table,) + self._zone_terms
+
+    def resolve(self, key: str) -> Optional[int]:
+        """Indice d'un nœud (clé du plan ou numéro de stand)"""
+        found = self.index.get(key)
+        if found is None:
+            found = self.index.get(f"booth:{key.strip().upper()}")
+        return found
+
+    def measure(self, sources: np.ndarray, targets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Distances réelles et coûts (affluence comprise) pour des tableaux d'indices alignés"""
+        _, penalties, zone_cost, zone_length = self._zone_state()
+        zs, zt = self.zone_of[sources], self.zone_of[targets]
+        same = zs == zt
+        within = self.distance[sources, targets].astype(np.float64)
+        hub_s, hub_t = self.hub_distance[sources], self.hub_distance[targets]
+        distance = np.where(same, within, hub_s + zone_length[zs, zt] + hub_t)
+        cost = np.where(same, within * penalties[zs],
+                        hub_s * penalties[zs] + zone_cost[zs, zt] + hub_t * penalties[zt])
+        return distance, cost
+
+    def measure_pairs(self, pairs: Sequence[Tuple[str, str]]) -> BatchRoutes:
+        """Évalue un lot de couples (origine, destination) ; known indique les couples résolus"""
+        count = len(pairs)
+        index = self.index
+        sources = np.fromiter((index.get(origin, -1) for origin, _ in pairs), np.int32, count)
+        targets = np.fromiter((index.get(destination, -1) for _, destination in pairs), np.int32, count)
+
+        # Numéros de stand et clés mal formées : résolution au cas par cas
+        for column, position in ((sources, 0), (targets, 1)):
+            for i in np.flatnonzero(column < 0):
+                found = self.resolve(pairs[i][position])
+                if found is not None:
+                    column[i] = found
+        known = (sources >= 0) & (targets >= 0)
+        sources[~known] = 0
+        targets[~known] = 0
+        distance, cost = self.measure(sources, targets)
+        distance[~known] = np.inf
+        cost[~known] = np.inf
+        return BatchRoutes(distance, cost, known)
+
+    def rank_from(self, origin: str, kind: Optional[str] = "booth",
+                  limit: Optional[int] = None) -> List[Tuple[str, float, float]]:
+        """Nœuds (d'un type donné) classés par coût depuis une origine : (clé, distance, coût)"""
+        source = self.resolve(origin)
+        if source is None:
+            return []
+        targets = np.array([i for i, node in enumerate(self.graph.nodes)
+                            if (kind is None or node.kind == kind) and i != source], dtype=np.int32)
+        if not len(targets):
+            return []
+        distance, cost = self.measure(np.full(len(targets), source, dtype=np.int32), targets)
+        order = np.argsort(cost, kind="stable")
+        order = order[np.isfinite(cost[order])]
+        if limit is not None:
+            order = order[:limit]
+        return [(self.keys[targets[i]], float(distance[i]), float(cost[i])) for i in order]
+
+    def path(self, source: int, target: int) -> List[int]:
+        """Étapes du trajet le moins coûteux (prochains sauts, affluence comprise)"""
+        table = self._zone_state()[0]
+        if not np.isfinite(self.measure(np.array([source]), np.array([target]))[1][0]):
+            return []
+        path = [source]
+        current = source
+        while current != target:
+            zone, target_zone = self.zone_of[current], self.zone_of[target]
+            if zone != target_zone and current == self.hubs[zone]:
+                following = table.next_zone[(self.zones[zone], self.zones[target_zone])]
+                current = int(self.hubs[self._zone_ids[following]])
+            else:
+                current = int(self.next_hop[current, target])
+            path.append(current)
+        return path
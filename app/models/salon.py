@@ -1,8 +1,18 @@
-from datetime import datetime
-from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field, validator
+from datetime import datetime, timedelta
+from typing import List, Optional, Dict, Any, Callable, Set, Tuple
+from pydantic import BaseModel, Field, PrivateAttr, root_validator, validator
 from enum import Enum
 
+from app.models.search_index import SearchIndex
+from app.models.time_index import EventTimeIndex
+from app.models.fuzzy_index import FuzzyIndex, FuzzyMatch
+from app.models.lookup import ExhibitorLookup
+from app.models.catalog import CatalogSnapshot
+from app.models.venue_graph import VenueGraph, booth_key
+from app.models.floor_plan import FloorPlan, FloorPlanLayout
+from app.models.spatial_index import SpatialEntry, SpatialIndex
+from app.utils.helpers import normalize_text
+
 class ExhibitorCategory(str, Enum):
     """Catégories d'exposants"""
     TECHNOLOGY = "Technologie"
@@ -39,6 +49,19 @@ class Exhibitor(BaseModel):
     logo_url: Optional[str] = Field(None, description="URL du logo")
     is_sponsor: bool = Field(default=False, description="Est-ce un sponsor")
     sponsor_level: Optional[str] = Field(None, description="Niveau de sponsoring")
+    location_x: Optional[float] = Field(None, description="Position X sur le plan (mètres)")
+    location_y: Optional[float] = Field(None, description="Position Y sur le plan (mètres)")
+    zone: Optional[str] = Field(None, description="Zone du salon")
+    
+    @root_validator(pre=True)
+    def unpack_location(cls, values):
+        # Format des fichiers de données : "location": {"x": .., "y": .., "zone": ..}
+        location = values.pop('location', None)
+        if isinstance(location, dict):
+            values.setdefault('location_x', location.get('x'))
+            values.setdefault('location_y', location.get('y'))
+            values.setdefault('zone', location.get('zone'))
+        return values
     
     @validator('booth_number')
     def validate_booth_number(cls, v):
@@ -117,6 +140,54 @@ class Venue(BaseModel):
         """Adresse complète formatée"""
         return f"{self.address}, {self.postal_code} {self.city}, {self.country}"
 
+# Priorité des champs pour le classement des recherches
+EXHIBITOR_FIELD_WEIGHTS = {"name": 5.0, "description": 3.0, "tags": 2.0, "category": 1.0}
+EVENT_FIELD_WEIGHTS = {"title": 5.0, "description": 3.0, "speaker": 2.0, "tags": 2.0, "category": 1.0}
+# Descriptions d'une phrase : leur longueur ne dit rien de la pertinence (pas de normalisation BM25)
+CATALOG_FIELD_B = {"description": 0.0}
+
+def _add_exhibitor_document(index: SearchIndex, exhibitor: Exhibitor):
+    """Indexe les champs textuels d'un exposant"""
+    index.add(exhibitor.id, {
+        "name": exhibitor.name,
+        "description": exhibitor.description,
+        "tags": exhibitor.tags,
+        "category": exhibitor.category
+    }, exhibitor)
+
+def _add_event_document(index: SearchIndex, event: Event):
+    """Indexe les champs textuels d'un événement"""
+    index.add(event.id, {
+        "title": event.title,
+        "description": event.description,
+        "speaker": [event.speaker, *event.additional_speakers],
+        "tags": event.tags,
+        "category": event.category
+    }, event, sort_key=-event.start_time.timestamp())  # À score égal : les plus tardifs d'abord
+
+def _add_exhibitor_names(index: FuzzyIndex, exhibitor: Exhibitor):
+    """Ajoute le nom et le stand d'un exposant à l'index approximatif"""
+    index.add(f"exhibitor:{exhibitor.id}", exhibitor.name, "exhibitor", exhibitor)
+    index.add(f"booth:{exhibitor.id}", exhibitor.booth_number, "booth", exhibitor)
+
+def _add_speaker_names(index: FuzzyIndex, event: Event):
+    """Ajoute les intervenants d'un événement à l'index approximatif"""
+    for speaker in [event.speaker, *event.additional_speakers]:
+        index.add(f"speaker:{normalize_text(speaker)}", speaker, "speaker", speaker)
+
+def _booth_placement(exhibitor: Exhibitor) -> Tuple:
+    """Champs d'un exposant utilisés par le plan et le graphe des déplacements"""
+    return (exhibitor.booth_number, exhibitor.name, exhibitor.zone, exhibitor.location_x, exhibitor.location_y)
+
+def _add_exhibitor_position(index: SpatialIndex, exhibitor: Exhibitor, zone: str):
+    """Place le stand d'un exposant dans l'index spatial (s'il a des coordonnées)"""
+    if exhibitor.location_x is not None and exhibitor.location_y is not None:
+        index.add(SpatialEntry(
+            booth_key(exhibitor.booth_number), "booth",
+            f"Stand {exhibitor.booth_number} ({exhibitor.name})", zone,
+            exhibitor.location_x, exhibitor.location_y, exhibitor
+        ))
+
 class SalonStats(BaseModel):
     """Statistiques du salon"""
     total_exhibitors: int = Field(default=0, description="Nombre total d'exposants")
@@ -147,6 +218,22 @@ class Salon(BaseModel):
     is_active: bool = Field(default=True, description="Salon actif")
     created_at: datetime = Field(default_factory=datetime.now, description="Date de création")
     updated_at: datetime = Field(default_factory=datetime.now, description="Dernière modification")
+    layout: Optional[FloorPlanLayout] = Field(None, description="Plan du lieu (zones, stands, services)")
+    
+    # Index de recherche construits à la demande
+    _exhibitor_index: Optional[SearchIndex] = PrivateAttr(default=None)
+    _event_index: Optional[SearchIndex] = PrivateAttr(default=None)
+    _time_index: Optional[EventTimeIndex] = PrivateAttr(default=None)
+    _fuzzy_index: Optional[FuzzyIndex] = PrivateAttr(default=None)
+    _lookup: Optional[ExhibitorLookup] = PrivateAttr(default=None)
+    _version: int = PrivateAttr(default=0)
+    _layout_version: int = PrivateAttr(default=0)
+    _catalog: Optional[CatalogSnapshot] = PrivateAttr(default=None)
+    _floor_plan: Optional[FloorPlan] = PrivateAttr(default=None)
+    _venue_graph: Optional[VenueGraph] = PrivateAttr(default=None)
+    _spatial_index: Optional[SpatialIndex] = PrivateAttr(default=None)
+    _congestion: Dict[str, float] = PrivateAttr(default_factory=dict)
+    _listeners: List[Callable[["Salon"], None]] = PrivateAttr(default_factory=list)
     
     @validator('end_date')
     def validate_end_date(cls, v, values):
@@ -175,28 +262,51 @@ class Salon(BaseModel):
     
     def get_exhibitor_by_booth(self, booth_number: str) -> Optional[Exhibitor]:
         """Trouve un exposant par numéro de stand"""
-        for exhibitor in self.exhibitors:
-            if exhibitor.booth_number.upper() == booth_number.upper():
-                return exhibitor
-        return None
+        return self.lookup.get_by_booth(booth_number)
+    
+    def get_exhibitor_by_id(self, exhibitor_id: str) -> Optional[Exhibitor]:
+        """Trouve un exposant par identifiant"""
+        return self.lookup.get_by_id(exhibitor_id)
+    
+    def get_exhibitor_by_name(self, name: str) -> Optional[Exhibitor]:
+        """Trouve un exposant par nom exact (casse et accents ignorés)"""
+        return self.lookup.get_by_name(name)
+    
+    def find_exhibitor_by_booth_in_text(self, text: str) -> Optional[Exhibitor]:
+        """Trouve l'exposant dont le numéro de stand est cité dans une phrase"""
+        return self.lookup.find_booth_in_text(text)
     
     def get_exhibitors_by_category(self, category: ExhibitorCategory) -> List[Exhibitor]:
         """Filtre les exposants par catégorie"""
         return [e for e in self.exhibitors if e.category == category]
     
     def get_events_by_date(self, date: datetime) -> List[Event]:
-        """Filtre les événements par date"""
-        return [e for e in self.events if e.start_time.date() == date.date()]
+        """Filtre les événements par date (triés par heure de début)"""
+        return self.time_index.on_day(date)
     
-    def get_current_events(self) -> List[Event]:
+    def get_current_events(self, now: Optional[datetime] = None) -> List[Event]:
         """Retourne les événements en cours"""
-        return [e for e in self.events if e.is_now]
+        return self.time_index.running_at(now or datetime.now())
     
-    def get_upcoming_events(self, hours: int = 24) -> List[Event]:
+    def get_upcoming_events(self, hours: int = 24, now: Optional[datetime] = None) -> List[Event]:
         """Retourne les événements à venir dans les X heures"""
-        now = datetime.now()
+        now = now or datetime.now()
         cutoff = now + timedelta(hours=hours)
-        return [e for e in self.events if now < e.start_time <= cutoff]
+        return self.time_index.between(now, cutoff, include_start=False)
+    
+    def get_events_between(self, start: datetime, end: datetime) -> List[Event]:
+        """Retourne les événements commençant entre deux instants (bornes incluses)"""
+        return self.time_index.between(start, end)
+    
+    @property
+    def version(self) -> int:
+        """Compteur incrémenté à chaque modification du catalogue"""
+        return self._version
+    
+    @property
+    def layout_version(self) -> int:
+        """Compteur incrémenté quand le plan change (stands, positions, salles, reindex)"""
+        return self._layout_version
     
     def update_stats(self):
         """Met à jour les statistiques du salon"""
@@ -204,77 +314,259 @@ class Salon(BaseModel):
         self.stats.total_events = len(self.events)
         self.stats.last_updated = datetime.now()
         self.updated_at = datetime.now()
+        self._version += 1
+        for listener in list(self._listeners):
+            listener(self)
     
-    def search_exhibitors(self, query: str) -> List[Exhibitor]:
-        """Recherche d'exposants par mots-clés"""
-        query_lower = query.lower()
-        results = []
-        
-        for exhibitor in self.exhibitors:
-            score = 0
-            
-            # Recherche dans le nom (priorité haute)
-            if query_lower in exhibitor.name.lower():
-                score += 5
-            
-            # Recherche dans la description
-            if query_lower in exhibitor.description.lower():
-                score += 3
-            
-            # Recherche dans les tags
-            for tag in exhibitor.tags:
-                if query_lower in tag.lower():
-                    score += 2
-            
-            # Recherche dans la catégorie
-            if query_lower in exhibitor.category.lower():
-                score += 1
-            
-            if score > 0:
-                results.append((exhibitor, score))
+    def subscribe(self, listener: Callable[["Salon"], None]):
+        """Appelle listener(salon) après chaque modification du catalogue"""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+    
+    def unsubscribe(self, listener: Callable[["Salon"], None]):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+    
+    @property
+    def catalog(self) -> CatalogSnapshot:
+        """Instantané en colonnes du catalogue, reconstruit quand la version change"""
+        if self._catalog is None or self._catalog.version != self._version:
+            self._catalog = CatalogSnapshot.from_salon(self)
+        return self._catalog
+    
+    @property
+    def floor_plan(self) -> FloorPlan:
+        """Plan du lieu (zones des stands et rendus), reconstruit quand le plan change"""
+        if self._floor_plan is None or self._floor_plan.layout_version != self._layout_version:
+            self._floor_plan = FloorPlan.from_salon(self)
+        return self._floor_plan
+    
+    @property
+    def venue_graph(self) -> VenueGraph:
+        """Graphe des déplacements dans le lieu, reconstruit quand le plan change
+        (pas à chaque modification du catalogue : la matrice des trajets est coûteuse)"""
+        if self._venue_graph is None or self._venue_graph.layout_version != self._layout_version:
+            graph = VenueGraph.from_salon(self, self.floor_plan)
+            graph.set_congestion(self._congestion)
+            self._venue_graph = graph
+        return self._venue_graph
+
+    def set_zone_congestion(self, penalties: Dict[str, float]) -> bool:
+        """Applique les pénalités d'affluence par zone au graphe des déplacements.
+
+        Ne change pas la version du salon : seule la table des distances entre
+        zones est mise à jour, et la pénalité est conservée si le graphe est
+        reconstruit.
+        """
+        self._congestion = dict(penalties)
+        graph = self._venue_graph
+        if graph is None:
+            return False
+        return graph.set_congestion(self._congestion)
+    
+    @property
+    def lookup(self) -> ExhibitorLookup:
+        """Tables de correspondance des exposants (construites au premier accès)"""
+        if self._lookup is None:
+            self._lookup = ExhibitorLookup(self.exhibitors)
+        return self._lookup
+    
+    @property
+    def exhibitor_index(self) -> SearchIndex:
+        """Index de recherche des exposants (construit au premier accès)"""
+        if self._exhibitor_index is None:
+            index = SearchIndex(EXHIBITOR_FIELD_WEIGHTS, field_b=CATALOG_FIELD_B)
+            for exhibitor in self.exhibitors:
+                _add_exhibitor_document(index, exhibitor)
+            self._exhibitor_index = index
+        return self._exhibitor_index
+    
+    @property
+    def event_index(self) -> SearchIndex:
+        """Index de recherche des événements (construit au premier accès)"""
+        if self._event_index is None:
+            index = SearchIndex(EVENT_FIELD_WEIGHTS, field_b=CATALOG_FIELD_B)
+            for event in self.events:
+                _add_event_document(index, event)
+            self._event_index = index
+        return self._event_index
+    
+    @property
+    def time_index(self) -> EventTimeIndex:
+        """Index temporel des événements (construit au premier accès)"""
+        if self._time_index is None:
+            self._time_index = EventTimeIndex(self.events)
+        return self._time_index
+    
+    @property
+    def fuzzy_index(self) -> FuzzyIndex:
+        """Index approximatif des noms d'exposants, stands et intervenants"""
+        if self._fuzzy_index is None:
+            index = FuzzyIndex()
+            for exhibitor in self.exhibitors:
+                _add_exhibitor_names(index, exhibitor)
+            for event in self.events:
+                _add_speaker_names(index, event)
+            self._fuzzy_index = index
+        return self._fuzzy_index
+    
+    @property
+    def spatial_index(self) -> SpatialIndex:
+        """Index spatial des stands et services situés sur le plan"""
+        if self._spatial_index is None:
+            index = SpatialIndex()
+            plan = self.floor_plan
+            for exhibitor in self.exhibitors:
+                _add_exhibitor_position(index, exhibitor, plan.booth_zone(exhibitor.booth_number))
+            for node in self.venue_graph.nodes:
+                if node.kind == "facility" and node.x is not None:
+                    index.add(SpatialEntry(node.key, node.kind, node.label, node.zone, node.x, node.y))
+            self._spatial_index = index
+        return self._spatial_index
+    
+    def _index_exhibitor(self, exhibitor: Exhibitor):
+        """Ajoute un exposant aux index déjà construits"""
+        if self._exhibitor_index is not None:
+            _add_exhibitor_document(self._exhibitor_index, exhibitor)
+        if self._fuzzy_index is not None:
+            _add_exhibitor_names(self._fuzzy_index, exhibitor)
+        if self._lookup is not None:
+            self._lookup.add(exhibitor)
+        if self._spatial_index is not None:
+            _add_exhibitor_position(self._spatial_index, exhibitor, self.floor_plan.zone_of(exhibitor))
+    
+    def _unindex_exhibitor(self, exhibitor: Exhibitor):
+        """Retire un exposant des index déjà construits"""
+        if self._exhibitor_index is not None:
+            self._exhibitor_index.remove(exhibitor.id)
+        if self._fuzzy_index is not None:
+            self._fuzzy_index.remove(f"exhibitor:{exhibitor.id}")
+            self._fuzzy_index.remove(f"booth:{exhibitor.id}")
+        if self._lookup is not None:
+            self._lookup.remove(exhibitor)
+        if self._spatial_index is not None:
+            self._spatial_index.remove(booth_key(exhibitor.booth_number))
+    
+    def _index_event(self, event: Event):
+        """Ajoute un événement aux index déjà construits"""
+        if self._event_index is not None:
+            _add_event_document(self._event_index, event)
+        if self._time_index is not None:
+            self._time_index.add(event)
+        if self._fuzzy_index is not None:
+            _add_speaker_names(self._fuzzy_index, event)
+    
+    def _unindex_event(self, event: Event):
+        """Retire un événement des index déjà construits"""
+        if self._event_index is not None:
+            self._event_index.remove(event.id)
+        if self._time_index is not None:
+            self._time_index.remove(event)
+        if self._fuzzy_index is not None:
+            for speaker in [event.speaker, *event.additional_speakers]:
+                self._fuzzy_index.remove(f"speaker:{normalize_text(speaker)}")
+    
+    def add_exhibitor(self, exhibitor: Exhibitor):
+        """Ajoute ou remplace un exposant et met à jour les index"""
+        existing = self.lookup.get_by_id(exhibitor.id)
+        if existing is not None:
+            self._unindex_exhibitor(existing)
+            self.exhibitors[self.exhibitors.index(existing)] = exhibitor
+        else:
+            self.exhibitors.append(exhibitor)
         
-        # Trier par score de pertinence
-        results.sort(key=lambda x: x[1], reverse=True)
-        return [r[0] for r in results]
+        if existing is None or _booth_placement(existing) != _booth_placement(exhibitor):
+            self._layout_version += 1
+        self._index_exhibitor(exhibitor)
+        self.update_stats()
     
-    def search_events(self, query: str) -> List[Event]:
-        """Recherche d'événements par mots-clés"""
-        query_lower = query.lower()
-        results = []
+    def update_exhibitor(self, exhibitor: Exhibitor):
+        """Met à jour un exposant existant"""
+        self.add_exhibitor(exhibitor)
+    
+    def remove_exhibitor(self, exhibitor_id: str) -> Optional[Exhibitor]:
+        """Supprime un exposant par identifiant"""
+        exhibitor = self.lookup.get_by_id(exhibitor_id)
+        if exhibitor is None:
+            return None
         
-        for event in self.events:
-            score = 0
-            
-            # Recherche dans le titre
-            if query_lower in event.title.lower():
-                score += 5
-            
-            # Recherche dans la description
-            if query_lower in event.description.lower():
-                score += 3
-            
-            # Recherche dans l'intervenant
-            if query_lower in event.speaker.lower():
-                score += 2
-            
-            # Recherche dans les tags
-            for tag in event.tags:
-                if query_lower in tag.lower():
-                    score += 2
-            
-            # Recherche dans la catégorie
-            if query_lower in event.category.lower():
-                score += 1
-            
-            if score > 0:
-                results.append((event, score))
+        self._unindex_exhibitor(exhibitor)
+        self.exhibitors.remove(exhibitor)
+        self._layout_version += 1
+        self.update_stats()
+        return exhibitor
+    
+    def add_event(self, event: Event):
+        """Ajoute ou remplace un événement et met à jour les index"""
+        rooms = self._event_rooms()
+        for i, existing in enumerate(self.events):
+            if existing.id == event.id:
+                self._unindex_event(existing)
+                self.events[i] = event
+                break
+        else:
+            self.events.append(event)
         
-        # Trier par score puis par date
-        results.sort(key=lambda x: (x[1], x[0].start_time), reverse=True)
-        return [r[0] for r in results]
+        if self._event_rooms() != rooms:
+            self._layout_version += 1
+        self._index_event(event)
+        self.update_stats()
+    
+    def update_event(self, event: Event):
+        """Met à jour un événement existant"""
+        self.add_event(event)
+    
+    def remove_event(self, event_id: str) -> Optional[Event]:
+        """Supprime un événement par identifiant"""
+        for i, event in enumerate(self.events):
+            if event.id == event_id:
+                self._unindex_event(event)
+                del self.events[i]
+                if all(other.location != event.location for other in self.events):
+                    self._layout_version += 1
+                self.update_stats()
+                return event
+        return None
+    
+    def _event_rooms(self) -> Set[str]:
+        """Salles utilisées par les événements (nœuds du graphe des déplacements)"""
+        return {event.location for event in self.events}
+    
+    def reindex(self):
+        """Invalide les index (après une modification directe des listes ou du plan)"""
+        self._layout_version += 1
+        self.update_stats()
+        self._exhibitor_index = None
+        self._event_index = None
+        self._time_index = None
+        self._fuzzy_index = None
+        self._lookup = None
+        self._spatial_index = None
+    
+    def suggest(self, query: str, limit: int = 3, kinds: Optional[List[str]] = None) -> List[FuzzyMatch]:
+        """Suggestions tolérantes aux fautes (noms d'exposants, stands, intervenants)"""
+        return self.fuzzy_index.search(query, limit, kinds)
+    
+    def search_exhibitors_scored(self, query: str, limit: Optional[int] = None) -> List[Tuple[Exhibitor, float]]:
+        """Recherche d'exposants avec leur score de pertinence (à égalité : ordre du catalogue)"""
+        return self.exhibitor_index.search(query, limit)
+    
+    def search_exhibitors(self, query: str, limit: Optional[int] = None) -> List[Exhibitor]:
+        """Recherche d'exposants par mots-clés"""
+        return [exhibitor for exhibitor, _ in self.search_exhibitors_scored(query, limit)]
+    
+    def search_events_scored(self, query: str, limit: Optional[int] = None) -> List[Tuple[Event, float]]:
+        """Recherche d'événements avec leur score de pertinence (à égalité : les plus tardifs d'abord)"""
+        return self.event_index.search(query, limit)
+    
+    def search_events(self, query: str, limit: Optional[int] = None) -> List[Event]:
+        """Recherche d'événements par mots-clés"""
+        return [event for event, _ in self.search_events_scored(query, limit)]
     
     class Config:
         use_enum_values = True
         json_encoders = {
             datetime: lambda v: v.isoformat()
-        }
\ No newline at end of file
+        }
+        # Les outils de l'agent référencent le salon (champ salon_data) : pas de copie, index et abonnés partagés
+        copy_on_model_validation = "none"
\ No newline at end of file
@@ -0,0 +1,192 @@
+import re
+import heapq
+import math
+from bisect import bisect_left, insort
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.utils.helpers import normalize_text
+
+# Mots vides français (et quelques anglais) ignorés à l'indexation
+FRENCH_STOPWORDS = frozenset({
+    "a", "au", "aux", "avec", "c", "ce", "ces", "d", "dans", "de", "des", "du",
+    "en", "et", "j", "l", "la", "le", "les", "leur", "m", "n", "ne", "ou", "par",
+    "pas", "pour", "qu", "que", "qui", "s", "sa", "se", "ses", "son", "sur", "t",
+    "un", "une", "y", "the", "of", "and", "for",
+})
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+_WORD_PATTERN = re.compile(r"\w+")
+_CAMEL_CASE_BOUNDARY = re.compile(r"(?<=[a-z])(?=[A-Z])")
+
+def tokenize(text: str) -> List[str]:
+    """Découpe un texte en tokens français normalisés (sans accents ni mots vides)"""
+    return [
+        token for token in _TOKEN_PATTERN.findall(normalize_text(text))
+        if token not in FRENCH_STOPWORDS
+    ]
+
+def compound_parts(text: str) -> List[str]:
+    """Extrait les composants des noms accolés (ex. "EcoTech" -> "eco", "tech")"""
+    parts = []
+    for word in _WORD_PATTERN.findall(text):
+        pieces = _CAMEL_CASE_BOUNDARY.split(word)
+        if len(pieces) > 1:
+            parts.extend(token for piece in pieces for token in tokenize(piece))
+    return parts
+
+class SearchIndex:
+    """Index inversé avec classement BM25F (BM25 pondéré par champ).
+
+    La fréquence d'un terme est calculée champ par champ, normalisée par la
+    longueur du champ rapportée à sa moyenne (paramètre b, réglable par
+    champ), multipliée par le poids du champ (nom avant description...),
+    puis saturée par k1 et pondérée par l'IDF du terme. À score égal, les
+    documents restent dans l'ordre de leur clé de tri, puis d'insertion.
+    """
+
+    # Pénalité appliquée aux termes trouvés par préfixe plutôt qu'à l'identique
+    PREFIX_MATCH_WEIGHT = 0.5
+
+    def __init__(self, field_weights: Dict[str, float], k1: float = 1.2, b: float = 0.75,
+                 field_b: Optional[Dict[str, float]] = None):
+        self.field_weights = field_weights
+        self.k1 = k1
+        self.b = b
+        self.field_b = dict(field_b or {})
+        # terme -> {doc_id: {champ: fréquence}}
+        self._postings: Dict[str, Dict[str, Dict[str, int]]] = defaultdict(dict)
+        self._doc_terms: Dict[str, Tuple[str, ...]] = {}
+        self._field_lengths: Dict[str, Dict[str, int]] = {}
+        self._total_field_lengths: Dict[str, int] = defaultdict(int)
+        self._doc_order: Dict[str, Tuple[Any, int]] = {}
+        self._documents: Dict[str, Any] = {}
+        self._vocabulary: List[str] = []
+        self._next_order = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._doc_terms
+
+    def add(self, doc_id: str, fields: Dict[str, Iterable[str]], document: Any = None, sort_key: Any = 0):
+        """Indexe (ou réindexe) un document à partir de ses champs textuels"""
+        insertion = None
+        if doc_id in self._doc_terms:
+            insertion = self._doc_order[doc_id][1]
+            self.remove(doc_id)
+
+        frequencies: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        lengths: Dict[str, int] = {}
+        for field, values in fields.items():
+            if isinstance(values, str):
+                values = [values]
+            length = 0
+            for value in values:
+                for token in tokenize(value) + compound_parts(value):
+                    frequencies[token][field] += 1
+                    length += 1
+            lengths[field] = length
+            self._total_field_lengths[field] += length
+
+        for term, by_field in frequencies.items():
+            postings = self._postings[term]
+            if not postings:
+                insort(self._vocabulary, term)
+            postings[doc_id] = dict(by_field)
+
+        self._doc_terms[doc_id] = tuple(frequencies)
+        self._field_lengths[doc_id] = lengths
+        self._documents[doc_id] = document if document is not None else doc_id
+        if insertion is None:
+            insertion = self._next_order
+            self._next_order += 1
+        self._doc_order[doc_id] = (sort_key, insertion)
+
+    def remove(self, doc_id: str):
+        """Retire un document de l'index"""
+        if doc_id not in self._doc_terms:
+            return
+
+        for term in self._doc_terms.pop(doc_id):
+            postings = self._postings[term]
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+                position = bisect_left(self._vocabulary, term)
+                if position < len(self._vocabulary) and self._vocabulary[position] == term:
+                    del self._vocabulary[position]
+
+        for field, length in self._field_lengths.pop(doc_id).items():
+            self._total_field_lengths[field] -= length
+        self._documents.pop(doc_id, None)
+        self._doc_order.pop(doc_id, None)
+
+    def clear(self):
+        """Vide l'index"""
+        self._postings.clear()
+        self._doc_terms.clear()
+        self._field_lengths.clear()
+        self._total_field_lengths.clear()
+        self._doc_order.clear()
+        self._documents.clear()
+        self._vocabulary.clear()
+        self._next_order = 0
+
+    def search(self, query: str, limit: Optional[int] = 10) -> List[Tuple[Any, float]]:
+        """Retourne les meilleurs documents (document, score) pour une requête"""
+        if not self._doc_terms:
+            return []
+
+        scores: Dict[str, float] = defaultdict(float)
+        for token in set(tokenize(query)):
+            # Un mot de la requête compte une fois par document (meilleur terme trouvé)
+            best: Dict[str, float] = {}
+            for term, weight in self._expand(token):
+                for doc_id, score in self._term_scores(term).items():
+                    best[doc_id] = max(best.get(doc_id, 0.0), weight * score)
+            for doc_id, score in best.items():
+                scores[doc_id] += score
+
+        if not scores:
+            return []
+
+        def sort_key(item: Tuple[str, float]):
+            # Score décroissant, puis clé de tri et ordre d'insertion croissants
+            return (-item[1], self._doc_order[item[0]])
+
+        if limit is None or limit >= len(scores):
+            ranked = sorted(scores.items(), key=sort_key)
+        else:
+            ranked = heapq.nsmallest(limit, scores.items(), key=sort_key)
+        return [(self._documents[doc_id], score) for doc_id, score in ranked]
+
+    def _expand(self, token: str) -> List[Tuple[str, float]]:
+        """Étend un token de requête aux termes du vocabulaire qui le prolongent"""
+        matches = []
+        position = bisect_left(self._vocabulary, token)
+        while position < len(self._vocabulary) and self._vocabulary[position].startswith(token):
+            term = self._vocabulary[position]
+            matches.append((term, 1.0 if term == token else self.PREFIX_MATCH_WEIGHT))
+            position += 1
+        return matches
+
+    def _term_scores(self, term: str) -> Dict[str, float]:
+        """Contribution BM25F d'un terme à chaque document qui le contient"""
+        postings = self._postings.get(term)
+        if not postings:
+            return {}
+
+        total_docs = len(self._doc_terms)
+        idf = math.log(1 + (total_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+        scores = {}
+        for doc_id, by_field in postings.items():
+            lengths = self._field_lengths[doc_id]
+            frequency = 0.0
+            for field, count in by_field.items():
+                b = self.field_b.get(field, self.b)
+                average = self._total_field_lengths[field] / total_docs or 1.0
+                frequency += self.field_weights.get(field, 1.0) * count / (1 - b + b * lengths[field] / average)
+            scores[doc_id] = idf * frequency * (self.k1 + 1) / (frequency + self.k1)
+        return scores
@@ -0,0 +1,169 @@
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from typing import Any, Dict, Optional
+
+from app.models.catalog import CatalogSnapshot
+from app.utils.exceptions import SnapshotError
+
+# En-tête fixe : signature, version du format, longueur de l'en-tête JSON
+MAGIC = b"SALONCAT"
+FORMAT_VERSION = 1
+_PREAMBLE = struct.Struct("<8sII")
+_ALIGNMENT = 8
+
+def _aligned(offset: int) -> int:
+    return (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+class MappedStringTable:
+    """Table de chaînes lue dans un fichier projeté en mémoire.
+
+    Les chaînes restent encodées en UTF-8 dans le fichier et ne sont décodées
+    qu'à la lecture, sans copie préalable de la table.
+    """
+
+    def __init__(self, offsets: memoryview, blob: memoryview):
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, string_id: int) -> str:
+        if not 0 <= string_id < len(self._offsets) - 1:
+            raise IndexError(string_id)
+        return str(self._blob[self._offsets[string_id]:self._offsets[string_id + 1]], "utf-8")
+
+    @property
+    def nbytes(self) -> int:
+        return self._offsets.nbytes + self._blob.nbytes
+
+    def release(self):
+        self._offsets.release()
+        self._blob.release()
+
+class MappedCatalogSnapshot(CatalogSnapshot):
+    """Instantané du catalogue servi directement depuis un fichier projeté (lecture seule).
+
+    Les pages du fichier sont partagées par tous les processus qui le projettent :
+    plusieurs workers ne consomment qu'une copie physique du catalogue.
+    """
+
+    def __init__(self, path: str, mapping: mmap.mmap, info: Dict[str, Any], **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self.info = info
+        self._mapping = mapping
+
+    def close(self):
+        """Libère la projection (les lignes déjà obtenues deviennent invalides)"""
+        self.strings.release()
+        for columns in (self.exhibitor_columns, self.event_columns):
+            for column in columns.values():
+                column.release()
+        self._mapping.close()
+
+def write_snapshot(catalog: CatalogSnapshot, path: str, info: Optional[Dict[str, Any]] = None) -> int:
+    """Écrit l'instantané dans un fichier binaire et retourne sa taille.
+
+    L'écriture passe par un fichier temporaire renommé à la fin : les processus
+    qui projettent l'ancienne version ne sont pas affectés.
+    """
+    encoded = [value.encode("utf-8") for value in catalog.strings]
+    string_offsets = array("q", [0])
+    for value in encoded:
+        string_offsets.append(string_offsets[-1] + len(value))
+
+    sections = [("strings", "offsets", string_offsets), ("strings", "blob", b"".join(encoded))]
+    for table, columns in (("exhibitors", catalog.exhibitor_columns), ("events", catalog.event_columns)):
+        for name, column in columns.items():
+            sections.append((table, name, column))
+
+    # Les positions dépendent de la taille de l'en-tête : on la stabilise par itérations
+    header_size = 0
+    while True:
+        position = _aligned(_PREAMBLE.size + header_size)
+        layout = []
+        for table, name, data in sections:
+            typecode, itemsize = (data.typecode, data.itemsize) if isinstance(data, array) else ("B", 1)
+            nbytes = len(data) * itemsize
+            layout.append({"table": table, "name": name, "typecode": typecode,
+                           "itemsize": itemsize, "offset": position, "nbytes": nbytes})
+            position = _aligned(position + nbytes)
+        header = json.dumps({
+            "salon_id": catalog.salon_id,
+            "version": catalog.version,
+            "byteorder": sys.byteorder,
+            "info": info or {},
+            "sections": layout
+        }, ensure_ascii=False, default=str).encode("utf-8")
+        if len(header) == header_size:
+            break
+        header_size = len(header)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)))
+            f.write(header)
+            for (_, _, data), section in zip(sections, layout):
+                f.write(b"\0" * (section["offset"] - f.tell()))
+                f.write(data if isinstance(data, bytes) else data.tobytes())
+        os.replace(temp_path, path)
+    except Exception:
+        os.unlink(temp_path)
+        raise
+
+    return os.path.getsize(path)
+
+def load_snapshot(path: str) -> MappedCatalogSnapshot:
+    """Projette un fichier d'instantané en mémoire et retourne des vues sans copie"""
+    try:
+        with open(path, "rb") as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError) as e:
+        raise SnapshotError(f"Impossible de projeter l'instantané {path}: {e}")
+
+    sections: Dict[str, Dict[str, memoryview]] = {"strings": {}, "exhibitors": {}, "events": {}}
+    try:
+        magic, format_version, header_size = _PREAMBLE.unpack_from(mapping, 0)
+        if magic != MAGIC:
+            raise SnapshotError(f"Fichier d'instantané invalide: {path}")
+        if format_version != FORMAT_VERSION:
+            raise SnapshotError(f"Version de format non supportée ({format_version}): {path}")
+        header = json.loads(mapping[_PREAMBLE.size:_PREAMBLE.size + header_size].decode("utf-8"))
+        if header["byteorder"] != sys.byteorder:
+            raise SnapshotError(f"Ordre des octets incompatible ({header['byteorder']}): {path}")
+
+        with memoryview(mapping) as view:
+            for section in header["sections"]:
+                if array(section["typecode"]).itemsize != section["itemsize"]:
+                    raise SnapshotError(f"Taille d'entier incompatible pour {section['name']}: {path}")
+                if section["offset"] + section["nbytes"] > len(mapping):
+                    raise SnapshotError(f"Instantané tronqué ({section['name']}): {path}")
+                with view[section["offset"]:section["offset"] + section["nbytes"]] as data:
+                    sections[section["table"]][section["name"]] = data.cast(section["typecode"])
+    except Exception as e:
+        for views in sections.values():
+            for data in views.values():
+                data.release()
+        mapping.close()
+        if isinstance(e, SnapshotError):
+            raise
+        raise SnapshotError(f"Fichier d'instantané illisible {path}: {e}")
+
+    strings = MappedStringTable(sections["strings"]["offsets"], sections["strings"]["blob"])
+    return MappedCatalogSnapshot(
+        path, mapping, header["info"],
+        strings=strings,
+        exhibitor_columns=sections["exhibitors"],
+        event_columns=sections["events"],
+        version=header["version"],
+        salon_id=header["salon_id"]
+    )
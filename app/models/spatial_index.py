@@ -0,0 +1,150 @@
+import heapq
+import math
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+# Taille des cellules de la grille (mètres), de l'ordre de quelques stands
+DEFAULT_CELL_SIZE = 10.0
+
+class SpatialEntry(NamedTuple):
+    """Point indexé : stand ou service, avec ses coordonnées sur le plan"""
+    key: str
+    kind: str
+    label: str
+    zone: str
+    x: float
+    y: float
+    target: Any = None
+
+class SpatialMatch(NamedTuple):
+    """Résultat d'une requête de proximité"""
+    entry: SpatialEntry
+    distance: float
+
+class SpatialIndex:
+    """Grille uniforme sur les coordonnées des stands et des services.
+
+    Chaque point est rangé dans la cellule qui le contient : l'insertion, le
+    retrait et le déplacement d'un point sont en O(1), et les requêtes ne
+    parcourent que les cellules voisines du point de référence.
+    """
+
+    def __init__(self, cell_size: float = DEFAULT_CELL_SIZE):
+        self.cell_size = cell_size
+        self._entries: Dict[str, SpatialEntry] = {}
+        self._cells: Dict[Tuple[int, int], Dict[str, SpatialEntry]] = {}
+        self._bounds: Optional[List[int]] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def get(self, key: str) -> Optional[SpatialEntry]:
+        return self._entries.get(key)
+
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        return (math.floor(x / self.cell_size), math.floor(y / self.cell_size))
+
+    def add(self, entry: SpatialEntry):
+        """Ajoute un point (ou le déplace s'il existe déjà)"""
+        self.remove(entry.key)
+        cell = self._cell(entry.x, entry.y)
+        self._entries[entry.key] = entry
+        self._cells.setdefault(cell, {})[entry.key] = entry
+
+        # Bornes (en cellules) de la zone occupée, pour arrêter les recherches
+        if self._bounds is None:
+            self._bounds = [cell[0], cell[1], cell[0], cell[1]]
+        else:
+            self._bounds[0] = min(self._bounds[0], cell[0])
+            self._bounds[1] = min(self._bounds[1], cell[1])
+            self._bounds[2] = max(self._bounds[2], cell[0])
+            self._bounds[3] = max(self._bounds[3], cell[1])
+
+    def move(self, key: str, x: float, y: float) -> bool:
+        """Déplace un point existant"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False
+        self.add(entry._replace(x=x, y=y))
+        return True
+
+    def remove(self, key: str) -> bool:
+        """Retire un point"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        cell = self._cell(entry.x, entry.y)
+        bucket = self._cells[cell]
+        del bucket[key]
+        if not bucket:
+            del self._cells[cell]
+        return True
+
+    def _ring(self, center: Tuple[int, int], radius: int) -> Iterator[Tuple[int, int]]:
+        """Cellules à distance de Tchebychev exactement radius de la cellule centrale"""
+        cx, cy = center
+        if radius == 0:
+            yield center
+            return
+        for dx in range(-radius, radius + 1):
+            yield (cx + dx, cy - radius)
+            yield (cx + dx, cy + radius)
+        for dy in range(-radius + 1, radius):
+            yield (cx - radius, cy + dy)
+            yield (cx + radius, cy + dy)
+
+    def nearest(self, x: float, y: float, k: int = 5,
+                predicate: Optional[Callable[[SpatialEntry], bool]] = None) -> List[SpatialMatch]:
+        """Les k points les plus proches (optionnellement filtrés), du plus proche au plus loin"""
+        if not self._entries or k <= 0:
+            return []
+
+        center = self._cell(x, y)
+        min_x, min_y, max_x, max_y = self._bounds
+        max_radius = max(abs(center[0] - min_x), abs(center[0] - max_x),
+                         abs(center[1] - min_y), abs(center[1] - max_y))
+
+        # Tas max (distances négatives) des k meilleurs candidats
+        best: List[Tuple[float, str, SpatialEntry]] = []
+        for radius in range(max_radius + 1):
+            for cell in self._ring(center, radius):
+                for entry in self._cells.get(cell, {}).values():
+                    if predicate is not None and not predicate(entry):
+                        continue
+                    distance = math.hypot(entry.x - x, entry.y - y)
+                    item = (-distance, entry.key, entry)
+                    if len(best) < k:
+                        heapq.heappush(best, item)
+                    elif distance < -best[0][0]:
+                        heapq.heapreplace(best, item)
+            # Les cellules des anneaux suivants sont à au moins radius * cell_size
+            if len(best) == k and -best[0][0] <= radius * self.cell_size:
+                break
+
+        return [SpatialMatch(entry, -distance) for distance, _, entry in sorted(best, reverse=True)]
+
+    def within(self, x: float, y: float, radius: float,
+               predicate: Optional[Callable[[SpatialEntry], bool]] = None) -> List[SpatialMatch]:
+        """Points situés à moins de radius mètres, du plus proche au plus loin"""
+        if not self._entries:
+            return []
+        low_x, low_y = self._cell(x - radius, y - radius)
+        high_x, high_y = self._cell(x + radius, y + radius)
+        min_x, min_y, max_x, max_y = self._bounds
+        low_x, low_y = max(low_x, min_x), max(low_y, min_y)
+        high_x, high_y = min(high_x, max_x), min(high_y, max_y)
+
+        matches = []
+        for cx in range(low_x, high_x + 1):
+            for cy in range(low_y, high_y + 1):
+                for entry in self._cells.get((cx, cy), {}).values():
+                    if predicate is not None and not predicate(entry):
+                        continue
+                    distance = math.hypot(entry.x - x, entry.y - y)
+                    if distance <= radius:
+                        matches.append(SpatialMatch(entry, distance))
+
+        matches.sort(key=lambda match: (match.distance, match.entry.key))
+        return matches
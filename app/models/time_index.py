@@ -0,0 +1,158 @@
+import heapq
+from bisect import bisect_left, bisect_right, insort
+from datetime import date, datetime, time, timedelta
+from itertools import takewhile
+from typing import Any, Iterator, List, Optional, Union
+
+class _IntervalNode:
+    """Nœud d'arbre d'intervalles centré"""
+
+    __slots__ = ("center", "by_start", "max_end", "left", "right")
+
+    def __init__(self, center: datetime, by_start: list, max_end: Optional[datetime],
+                 left: Optional["_IntervalNode"], right: Optional["_IntervalNode"]):
+        self.center = center
+        self.by_start = by_start
+        self.max_end = max_end
+        self.left = left
+        self.right = right
+
+def _build_interval_tree(entries: list) -> Optional[_IntervalNode]:
+    """Construit un arbre d'intervalles centré sur [start_time, end_time].
+
+    entries : couples (rang, événement) dans l'ordre chronologique de l'index ;
+    chaque nœud garde cet ordre, ses résultats se fusionnent sans tri.
+    """
+    if not entries:
+        return None
+
+    endpoints = sorted([e.start_time for _, e in entries] + [e.end_time for _, e in entries])
+    center = endpoints[len(endpoints) // 2]
+
+    left, right, overlapping = [], [], []
+    for entry in entries:
+        event = entry[1]
+        if event.end_time < center:
+            left.append(entry)
+        elif event.start_time > center:
+            right.append(entry)
+        else:
+            overlapping.append(entry)
+
+    return _IntervalNode(
+        center,
+        overlapping,
+        max((e.end_time for _, e in overlapping), default=None),
+        _build_interval_tree(left),
+        _build_interval_tree(right)
+    )
+
+class EventTimeIndex:
+    """Index temporel des événements : débuts triés (bisect) et arbre d'intervalles"""
+
+    def __init__(self, events: Optional[list] = None):
+        self._start_keys: List[datetime] = []
+        self._by_start: List[Any] = []
+        self._end_keys: List[datetime] = []
+        self._tree: Optional[_IntervalNode] = None
+        self._tree_dirty = False
+        for event in events or []:
+            self.add(event)
+
+    def __len__(self) -> int:
+        return len(self._by_start)
+
+    def add(self, event: Any):
+        """Insère un événement à sa place dans l'ordre chronologique"""
+        position = bisect_right(self._start_keys, event.start_time)
+        self._start_keys.insert(position, event.start_time)
+        self._by_start.insert(position, event)
+        insort(self._end_keys, event.end_time)
+        self._tree_dirty = True
+
+    def remove(self, event: Any) -> bool:
+        """Retire un événement (recherché par identifiant)"""
+        position = bisect_left(self._start_keys, event.start_time)
+        while position < len(self._start_keys) and self._start_keys[position] == event.start_time:
+            if self._by_start[position].id == event.id:
+                del self._start_keys[position]
+                del self._by_start[position]
+                del self._end_keys[bisect_left(self._end_keys, event.end_time)]
+                self._tree_dirty = True
+                return True
+            position += 1
+        return False
+
+    def all(self) -> List[Any]:
+        """Tous les événements triés par heure de début"""
+        return list(self._by_start)
+
+    def iter_from(self, moment: datetime, reverse: bool = False) -> Iterator[Any]:
+        """Parcourt paresseusement les événements commençant après un instant
+        (ou, avec reverse, ceux commençant avant ou à cet instant, du plus récent au plus ancien)"""
+        position = bisect_right(self._start_keys, moment)
+        if reverse:
+            for i in range(position - 1, -1, -1):
+                yield self._by_start[i]
+        else:
+            for i in range(position, len(self._by_start)):
+                yield self._by_start[i]
+
+    def between(self, start: datetime, end: datetime, include_start: bool = True) -> List[Any]:
+        """Événements commençant entre deux instants (bornes incluses)"""
+        if include_start:
+            low = bisect_left(self._start_keys, start)
+        else:
+            low = bisect_right(self._start_keys, start)
+        high = bisect_right(self._start_keys, end)
+        return self._by_start[low:high]
+
+    def on_day(self, day: Union[date, datetime]) -> List[Any]:
+        """Événements commençant un jour donné"""
+        if isinstance(day, datetime):
+            day = day.date()
+        day_start = datetime.combine(day, time.min)
+        low = bisect_left(self._start_keys, day_start)
+        high = bisect_left(self._start_keys, day_start + timedelta(days=1))
+        return self._by_start[low:high]
+
+    def next_change(self, after: datetime, lead: Optional[timedelta] = None) -> Optional[datetime]:
+        """Prochain début ou fin d'événement après un instant (et début - lead si fourni)"""
+        candidates = []
+        position = bisect_right(self._start_keys, after)
+        if position < len(self._start_keys):
+            candidates.append(self._start_keys[position])
+        position = bisect_right(self._end_keys, after)
+        if position < len(self._end_keys):
+            candidates.append(self._end_keys[position])
+        if lead:
+            position = bisect_right(self._start_keys, after + lead)
+            if position < len(self._start_keys):
+                candidates.append(self._start_keys[position] - lead)
+        return min(candidates) if candidates else None
+
+    def running_at(self, moment: datetime) -> List[Any]:
+        """Événements en cours à un instant donné (start_time <= instant <= end_time),
+        triés par heure de début"""
+        if self._tree_dirty:
+            self._tree = _build_interval_tree(list(enumerate(self._by_start)))
+            self._tree_dirty = False
+
+        hits = []
+        node = self._tree
+        while node is not None:
+            if moment < node.center:
+                # Les événements du nœud finissent tous après le centre : seul le début compte
+                hits.append(list(takewhile(lambda entry: entry[1].start_time <= moment, node.by_start)))
+                node = node.left
+            elif moment > node.center:
+                # Ils commencent tous avant le centre : seule la fin compte
+                if node.max_end is not None and node.max_end >= moment:
+                    hits.append([entry for entry in node.by_start if entry[1].end_time >= moment])
+                node = node.right
+            else:
+                hits.append(node.by_start)
+                break
+
+        # Listes déjà triées par rang : fusion, pas de tri
+        return [event for _, event in heapq.merge(*hits)]
@@ -0,0 +1,447 @@
+import heapq
+import math
+import re
+import threading
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from app.models.floor_plan import ZONE_NAMES, FloorPlan, FloorPlanLayout
+from app.models.route_matrix import RouteMatrix
+from app.utils.intent_matcher import intent_matcher
+
+# Distance d'un stand sans coordonnées à l'allée centrale de sa zone
+DEFAULT_BOOTH_DISTANCE = 10.0
+
+# Distance d'une salle d'événement à l'allée centrale de sa zone
+DEFAULT_ROOM_DISTANCE = 20.0
+
+_ROOM_ZONE_PATTERN = re.compile(r"\b([A-Z]{1,2})\s*$")
+
+# Vitesse de marche dans les allées d'un salon (mètres par minute)
+WALKING_SPEED = 25.0
+
+def estimate_node_count(salon: Any) -> int:
+    """Nombre de nœuds du graphe d'un salon (allées, stands, services, salles), sans le construire"""
+    layout = getattr(salon, "layout", None)
+    if layout is None or not layout.zones:
+        layout = FloorPlanLayout.default()
+    return (len(layout.zones)
+            + sum(len({facility.name for facility in zone.facilities}) for zone in layout.zones)
+            + len({exhibitor.booth_number for exhibitor in salon.exhibitors})
+            + len({event.location for event in getattr(salon, "events", [])}))
+
+class VenueNode(NamedTuple):
+    """Point du plan : stand, service ou allée centrale d'une zone"""
+    key: str
+    kind: str
+    label: str
+    zone: str
+    x: Optional[float]
+    y: Optional[float]
+
+class Route(NamedTuple):
+    """Itinéraire calculé dans le graphe du lieu.
+
+    distance est la longueur réelle en mètres ; cost la longueur pondérée par
+    l'affluence des zones traversées, qui détermine le choix et la durée.
+    """
+    nodes: List[VenueNode]
+    distance: float
+    cost: Optional[float] = None
+
+    @property
+    def minutes(self) -> int:
+        return max(1, math.ceil((self.cost or self.distance) / WALKING_SPEED))
+
+class _ZoneTable(NamedTuple):
+    """Distances entre zones pour un état d'affluence donné (jamais modifié après création)"""
+    penalties: Dict[str, float]
+    distance: Dict[Tuple[str, str], float]
+    next_zone: Dict[Tuple[str, str], str]
+
+def booth_key(booth_number: str) -> str:
+    return f"booth:{booth_number.upper()}"
+
+def zone_key(zone: str) -> str:
+    return f"zone:{zone.upper()}"
+
+def facility_key(zone: str, label: str) -> str:
+    return f"facility:{zone}:{label}"
+
+def room_key(location: str) -> str:
+    return f"room:{location.strip().lower()}"
+
+def location_zone(location: str, zones: Iterable[str] = ZONE_NAMES) -> str:
+    """Zone d'une salle : identifiant final ("Salle d'Atelier B"), sinon mots-clés,
+    sinon la première zone"""
+    zones = list(zones)
+    found = _ROOM_ZONE_PATTERN.search(location.strip())
+    if found and found.group(1) in zones:
+        return found.group(1)
+    matched = [zone for zone in intent_matcher.match(location).zones if zone in zones]
+    return min(matched) if matched else zones[0]
+
+class VenueGraph:
+    """Graphe pondéré du lieu (stands, allées, services, zones).
+
+    Les stands d'une zone sont reliés le long de l'allée et à l'allée centrale
+    de la zone ; les zones ne communiquent que par leurs allées centrales.
+    Les distances entre zones (toutes paires) et l'arbre des plus courts
+    chemins de chaque allée centrale vers les nœuds de sa zone sont
+    précalculés : un itinéraire entre deux zones se lit sans recherche,
+    un itinéraire dans une zone est calculé par A*.
+    """
+
+    def __init__(self, layout_version: int = 0):
+        self.layout_version = layout_version
+        self.nodes: List[VenueNode] = []
+        self._ids: Dict[str, int] = {}
+        self._adjacency: List[List[Tuple[int, float]]] = []
+        self._hubs: Dict[str, int] = {}
+        self._hub_distance: List[float] = []
+        self._hub_parent: List[int] = []
+        self._zone_edges: Dict[Tuple[str, str], float] = {}
+        self._zones = _ZoneTable({}, {}, {})
+        self._update_lock = threading.Lock()
+        self._matrix: Optional[RouteMatrix] = None
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._ids
+
+    def node(self, key: str) -> Optional[VenueNode]:
+        node_id = self._ids.get(key)
+        return self.nodes[node_id] if node_id is not None else None
+
+    def add_node(self, key: str, kind: str, label: str, zone: str,
+                 x: Optional[float] = None, y: Optional[float] = None) -> int:
+        """Ajoute un nœud (ou retourne celui qui porte déjà cette clé)"""
+        node_id = self._ids.get(key)
+        if node_id is None:
+            node_id = len(self.nodes)
+            self.nodes.append(VenueNode(key, kind, label, zone, x, y))
+            self._ids[key] = node_id
+            self._adjacency.append([])
+            if kind == "zone":
+                self._hubs[zone] = node_id
+        return node_id
+
+    def add_edge(self, a: int, b: int, weight: Optional[float] = None):
+        """Relie deux nœuds (distance euclidienne par défaut)"""
+        if weight is None:
+            weight = self._euclidean(a, b)
+            if weight is None:
+                weight = DEFAULT_BOOTH_DISTANCE
+        self._adjacency[a].append((b, weight))
+        self._adjacency[b].append((a, weight))
+
+    def _euclidean(self, a: int, b: int) -> Optional[float]:
+        na, nb = self.nodes[a], self.nodes[b]
+        if na.x is None or nb.x is None:
+            return None
+        return math.hypot(na.x - nb.x, na.y - nb.y)
+
+    @classmethod
+    def from_salon(cls, salon: Any, plan: Optional[FloorPlan] = None) -> "VenueGraph":
+        """Construit le graphe à partir du plan du salon et des coordonnées des stands"""
+        plan = plan or FloorPlan.from_salon(salon)
+        graph = cls(salon.layout_version)
+
+        by_zone: Dict[str, List[Any]] = {zone: [] for zone in plan.zones}
+        for exhibitor in salon.exhibitors:
+            by_zone[plan.booth_zone(exhibitor.booth_number) or plan.default_zone].append(exhibitor)
+
+        for zone, exhibitors in by_zone.items():
+            label = f"Zone {zone} - {plan.zone_name(zone)}"
+            located = [e for e in exhibitors if e.location_x is not None and e.location_y is not None]
+            bounds = plan.zones[zone].bounds
+            # Allée centrale au barycentre des stands situés, sinon au centre de la zone
+            if located:
+                hub = graph.add_node(zone_key(zone), "zone", label, zone,
+                                     sum(e.location_x for e in located) / len(located),
+                                     sum(e.location_y for e in located) / len(located))
+            elif bounds:
+                hub = graph.add_node(zone_key(zone), "zone", label, zone,
+                                     (bounds[0] + bounds[2]) / 2, (bounds[1] + bounds[3]) / 2)
+            else:
+                hub = graph.add_node(zone_key(zone), "zone", label, zone)
+
+            # Stands situés : reliés le long de l'allée et à l'allée centrale
+            previous = None
+            for exhibitor in sorted(located, key=lambda e: (e.location_x, e.location_y)):
+                booth = graph.add_node(booth_key(exhibitor.booth_number), "booth",
+                                       f"Stand {exhibitor.booth_number} ({exhibitor.name})", zone,
+                                       exhibitor.location_x, exhibitor.location_y)
+                graph.add_edge(booth, hub)
+                if previous is not None:
+                    graph.add_edge(previous, booth)
+                previous = booth
+
+            for exhibitor in exhibitors:
+                if exhibitor.location_x is None or exhibitor.location_y is None:
+                    booth = graph.add_node(booth_key(exhibitor.booth_number), "booth",
+                                           f"Stand {exhibitor.booth_number} ({exhibitor.name})", zone)
+                    graph.add_edge(booth, hub, DEFAULT_BOOTH_DISTANCE)
+
+            # Services : position du plan, sinon à l'allée centrale
+            hub_node = graph.nodes[hub]
+            for facility in plan.facilities(zone):
+                if facility.x is not None and facility.y is not None:
+                    x, y = facility.x, facility.y
+                else:
+                    x, y = hub_node.x, hub_node.y
+                node = graph.add_node(facility_key(zone, facility.name), "facility", facility.name, zone, x, y)
+                graph.add_edge(node, hub, facility.distance)
+
+        # Salles des événements
+        for location in {event.location for event in getattr(salon, "events", [])}:
+            zone = location_zone(location, plan.zones)
+            hub_node = graph.nodes[graph._hubs[zone]]
+            room = graph.add_node(room_key(location), "room", location, zone, hub_node.x, hub_node.y)
+            graph.add_edge(room, graph._hubs[zone], DEFAULT_ROOM_DISTANCE)
+
+        for a, b, distance in plan.connections:
+            graph.add_edge(graph._hubs[a], graph._hubs[b], distance)
+
+        graph.precompute()
+        return graph
+
+    def precompute(self):
+        """Précalcule les arbres des allées centrales et les distances entre zones"""
+        size = len(self.nodes)
+        self._hub_distance = [math.inf] * size
+        self._hub_parent = [-1] * size
+
+        # Dijkstra depuis chaque allée centrale, limité à sa zone
+        for zone, hub in self._hubs.items():
+            self._hub_distance[hub] = 0.0
+            heap = [(0.0, hub)]
+            while heap:
+                distance, current = heapq.heappop(heap)
+                if distance > self._hub_distance[current]:
+                    continue
+                for neighbor, weight in self._adjacency[current]:
+                    node = self.nodes[neighbor]
+                    if node.zone != zone or node.kind == "zone":
+                        continue
+                    candidate = distance + weight
+                    if candidate < self._hub_distance[neighbor]:
+                        self._hub_distance[neighbor] = candidate
+                        self._hub_parent[neighbor] = current
+                        heapq.heappush(heap, (candidate, neighbor))
+
+        # Liaisons entre zones (longueurs réelles)
+        self._zone_edges = {}
+        for zone, hub in self._hubs.items():
+            for neighbor, weight in self._adjacency[hub]:
+                node = self.nodes[neighbor]
+                if node.kind == "zone":
+                    key = (zone, node.zone)
+                    self._zone_edges[key] = min(weight, self._zone_edges.get(key, math.inf))
+
+        self._zones = self._solve_zones({zone: 1.0 for zone in self._hubs})
+
+    def _edge_cost(self, a: str, b: str, penalties: Dict[str, float]) -> float:
+        """Coût d'une liaison entre zones : moitié dans chaque zone"""
+        return self._zone_edges[(a, b)] * (penalties[a] + penalties[b]) / 2
+
+    def _solve_zones(self, penalties: Dict[str, float]) -> _ZoneTable:
+        """Toutes paires de zones (Floyd-Warshall sur les allées centrales)"""
+        zones = list(self._hubs)
+        distance = {(a, b): 0.0 if a == b else math.inf for a in zones for b in zones}
+        next_zone = {(a, a): a for a in zones}
+        for (a, b) in self._zone_edges:
+            cost = self._edge_cost(a, b, penalties)
+            if cost < distance[(a, b)]:
+                distance[(a, b)] = cost
+                next_zone[(a, b)] = b
+        for k in zones:
+            for i in zones:
+                for j in zones:
+                    if distance[(i, k)] + distance[(k, j)] < distance[(i, j)]:
+                        distance[(i, j)] = distance[(i, k)] + distance[(k, j)]
+                        next_zone[(i, j)] = next_zone[(i, k)]
+        return _ZoneTable(penalties, distance, next_zone)
+
+    def _relax_zones(self, table: _ZoneTable, penalties: Dict[str, float],
+                     changed: Iterable[str]) -> _ZoneTable:
+        """Mise à jour incrémentale après des baisses de coût : seules les
+        liaisons des zones modifiées sont relâchées sur la table existante"""
+        distance = dict(table.distance)
+        next_zone = dict(table.next_zone)
+        zones = list(self._hubs)
+        changed = set(changed)
+        for (a, b) in self._zone_edges:
+            if a not in changed and b not in changed:
+                continue
+            cost = self._edge_cost(a, b, penalties)
+            for i in zones:
+                through = distance[(i, a)] + cost
+                if through >= distance[(i, b)]:
+                    continue
+                for j in zones:
+                    candidate = through + distance[(b, j)]
+                    if candidate < distance[(i, j)] - 1e-9:
+                        distance[(i, j)] = candidate
+                        next_zone[(i, j)] = b if i == a else next_zone[(i, a)]
+        return _ZoneTable(penalties, distance, next_zone)
+
+    def set_congestion(self, penalties: Dict[str, float]) -> bool:
+        """Applique des pénalités d'affluence par zone (1.0 = fluide).
+
+        Le coût des allées d'une zone est multiplié uniformément : les arbres
+        précalculés dans chaque zone restent valables et seule la table des
+        distances entre zones est mise à jour (relâchement incrémental si les
+        coûts baissent, recalcul de la petite table sinon). La nouvelle table
+        remplace l'ancienne d'un bloc : les recherches en cours ne sont
+        jamais bloquées.
+        """
+        with self._update_lock:
+            current = self._zones
+            updated = {zone: max(1.0, float(penalties.get(zone, 1.0))) for zone in self._hubs}
+            changed = [zone for zone in self._hubs if updated[zone] != current.penalties.get(zone, 1.0)]
+            if not changed:
+                return False
+            if all(updated[zone] < current.penalties.get(zone, 1.0) for zone in changed):
+                self._zones = self._relax_zones(current, updated, changed)
+            else:
+                self._zones = self._solve_zones(updated)
+            return True
+
+    @property
+    def congestion(self) -> Dict[str, float]:
+        """Pénalités d'affluence appliquées"""
+        return dict(self._zones.penalties)
+
+    @property
+    def matrix(self) -> RouteMatrix:
+        """Matrice des distances entre tous les nœuds (calculée une fois par graphe)"""
+        if self._matrix is None:
+            with self._update_lock:
+                if self._matrix is None:
+                    self._matrix = RouteMatrix(self)
+        return self._matrix
+
+    def zone_distance(self, a: str, b: str) -> float:
+        """Coût (distance pondérée par l'affluence) entre les allées centrales de deux zones"""
+        return self._zones.distance.get((a, b), math.inf)
+
+    def zone_neighbors(self, zone: str) -> List[Tuple[str, float]]:
+        """Zones directement reliées à une zone, avec leur distance"""
+        hub = self._hubs.get(zone)
+        if hub is None:
+            return []
+        return [(self.nodes[n].zone, w) for n, w in self._adjacency[hub] if self.nodes[n].kind == "zone"]
+
+    def _path_to_hub(self, node_id: int) -> List[int]:
+        """Chemin d'un nœud vers l'allée centrale de sa zone"""
+        path = [node_id]
+        while self._hub_parent[path[-1]] != -1:
+            path.append(self._hub_parent[path[-1]])
+        return path
+
+    def _zone_path(self, table: _ZoneTable, a: str, b: str) -> List[str]:
+        """Zones traversées d'une zone à une autre"""
+        path = [a]
+        while a != b:
+            a = table.next_zone[(a, b)]
+            path.append(a)
+        return path
+
+    def _astar_in_zone(self, source: int, target: int) -> Optional[Route]:
+        """A* limité à une zone (heuristique euclidienne quand les coordonnées sont connues)"""
+        zone = self.nodes[source].zone
+
+        def heuristic(node_id: int) -> float:
+            return self._euclidean(node_id, target) or 0.0
+
+        best = {source: 0.0}
+        parent = {source: -1}
+        heap = [(heuristic(source), 0.0, source)]
+        while heap:
+            _, distance, current = heapq.heappop(heap)
+            if current == target:
+                path = [current]
+                while parent[path[-1]] != -1:
+                    path.append(parent[path[-1]])
+                return Route([self.nodes[i] for i in reversed(path)], distance)
+            if distance > best[current]:
+                continue
+            for neighbor, weight in self._adjacency[current]:
+                if self.nodes[neighbor].zone != zone:
+                    continue
+                candidate = distance + weight
+                if candidate < best.get(neighbor, math.inf):
+                    best[neighbor] = candidate
+                    parent[neighbor] = current
+                    heapq.heappush(heap, (candidate + heuristic(neighbor), candidate, neighbor))
+        return None
+
+    def shortest_path(self, source_key: str, target_key: str) -> Optional[Route]:
+        """Itinéraire le moins coûteux entre deux nœuds (clés booth:, zone:, facility:, room:)"""
+        source, target = self._ids.get(source_key), self._ids.get(target_key)
+        if source is None or target is None:
+            return None
+
+        table = self._zones
+        source_zone, target_zone = self.nodes[source].zone, self.nodes[target].zone
+        if source_zone == target_zone:
+            route = self._astar_in_zone(source, target)
+            if route is None:
+                return None
+            return route._replace(cost=route.distance * table.penalties[source_zone])
+
+        cost = self._cross_zone_cost(table, source, target)
+        if math.isinf(cost):
+            return None
+
+        # Nœud → allée centrale → zones intermédiaires → allée centrale → nœud
+        zones = self._zone_path(table, source_zone, target_zone)
+        path = self._path_to_hub(source)[:-1]
+        path += [self._hubs[zone] for zone in zones]
+        path += list(reversed(self._path_to_hub(target)))[1:]
+        distance = self._hub_distance[source] + self._hub_distance[target]
+        distance += sum(self._zone_edges[(a, b)] for a, b in zip(zones, zones[1:]))
+        return Route([self.nodes[i] for i in path], distance, cost)
+
+    def _cross_zone_cost(self, table: _ZoneTable, source: int, target: int) -> float:
+        source_zone, target_zone = self.nodes[source].zone, self.nodes[target].zone
+        return (self._hub_distance[source] * table.penalties[source_zone]
+                + table.distance.get((source_zone, target_zone), math.inf)
+                + self._hub_distance[target] * table.penalties[target_zone])
+
+    def measure(self, source_key: str, target_key: str) -> Tuple[float, float]:
+        """Distance réelle et coût du meilleur itinéraire, sans reconstruire le chemin
+        quand les deux nœuds sont dans des zones différentes"""
+        source, target = self._ids.get(source_key), self._ids.get(target_key)
+        if source is None or target is None:
+            return math.inf, math.inf
+        if source == target:
+            return 0.0, 0.0
+
+        table = self._zones
+        source_zone, target_zone = self.nodes[source].zone, self.nodes[target].zone
+        if source_zone == target_zone:
+            route = self._astar_in_zone(source, target)
+            if route is None:
+                return math.inf, math.inf
+            return route.distance, route.distance * table.penalties[source_zone]
+
+        cost = self._cross_zone_cost(table, source, target)
+        if math.isinf(cost):
+            return math.inf, math.inf
+        zones = self._zone_path(table, source_zone, target_zone)
+        distance = self._hub_distance[source] + self._hub_distance[target]
+        distance += sum(self._zone_edges[(a, b)] for a, b in zip(zones, zones[1:]))
+        return distance, cost
+
+    def nearest(self, source_key: str, target_keys: Iterable[str]) -> Optional[Route]:
+        """Itinéraire vers la plus proche des destinations"""
+        routes = [self.shortest_path(source_key, key) for key in target_keys]
+        routes = [route for route in routes if route is not None]
+        return min(routes, key=lambda route: route.cost) if routes else None
+
+    def facility_keys(self, label: str) -> List[str]:
+        """Clés des services portant un nom donné"""
+        return [node.key for node in self.nodes if node.kind == "facility" and node.label == label]
@@ -0,0 +1,252 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from app.config import settings
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Au-delà de cette part d'entrées périmées, le tas est recompacté
+STALE_COMPACT_RATIO = 0.5
+
+class Announcement(NamedTuple):
+    """Annonce prête à diffuser (écrans et synthèse vocale)"""
+    salon_id: str
+    event_id: str
+    kind: str
+    message: str
+
+class _Trigger(NamedTuple):
+    at: float
+    seq: int
+    salon_id: str
+    generation: int
+    event_id: str
+    kind: str
+    lead: int
+    signature: Tuple[Any, ...]
+
+def _signature(event: Any) -> Tuple[Any, ...]:
+    """Champs d'un événement dont dépendent ses annonces"""
+    return (event.start_time, event.end_time, event.title, event.location, event.speaker)
+
+def format_announcement(event: Any, kind: str, lead: int = 0) -> str:
+    """Texte d'une annonce : rappel, début ou fin d'un événement"""
+    if kind == "reminder":
+        return f"📢 « {event.title} » commence dans {lead} minutes — {event.location}. Ne le manquez pas !"
+    if kind == "start":
+        return f"🎤 « {event.title} » commence maintenant — {event.location}, avec {event.speaker} !"
+    return f"👏 « {event.title} » est terminé. Merci à {event.speaker} et à tous les participants !"
+
+class AnnouncementScheduler:
+    """Annonces des événements, déclenchées par un tas de minuteries.
+
+    Chaque événement d'un salon chargé donne des déclencheurs (rappels
+    lead_minutes avant le début, début, fin) rangés dans un tas par échéance.
+    La boucle dort exactement jusqu'au prochain déclencheur ; une
+    modification du programme (Salon.subscribe) ou du registre la réveille
+    pour ne recalculer que les événements ajoutés, modifiés ou retirés. Les
+    entrées devenues caduques restent dans le tas et sont ignorées au
+    dépilement (leur signature ne correspond plus, ou elles datent d'un
+    chargement précédent du salon).
+    """
+
+    def __init__(self, lead_minutes: Sequence[int] = (10,), announce_end: bool = True):
+        self.lead_minutes = sorted({int(m) for m in lead_minutes if m > 0}, reverse=True)
+        self.announce_end = announce_end
+        self._heap: List[_Trigger] = []
+        self._seq = itertools.count()
+        self._salons: Dict[str, Any] = {}
+        self._schedules: Dict[str, Dict[str, Tuple[Any, ...]]] = {}
+        # Chargement courant de chaque salon suivi (un salon rechargé n'hérite pas des anciens déclencheurs)
+        self._generations: Dict[str, int] = {}
+        self._stale = 0
+        self._dirty: Set[str] = set()
+        self._reconcile = True
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.sent: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    # Notifications (appelables depuis n'importe quel thread)
+
+    def _wakeup(self):
+        if self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def _salon_changed(self, salon: Any):
+        with self._lock:
+            self._dirty.add(salon.id)
+        self._wakeup()
+
+    def salons_changed(self):
+        """À appeler quand des salons sont chargés ou évincés"""
+        with self._lock:
+            self._reconcile = True
+        self._wakeup()
+
+    # Tenue du tas
+
+    def _push(self, salon_id: str, event: Any, signature: Tuple[Any, ...], now: float):
+        start, end = event.start_time.timestamp(), event.end_time.timestamp()
+        triggers = [(start - lead * 60, "reminder", lead) for lead in self.lead_minutes]
+        triggers.append((start, "start", 0))
+        if self.announce_end:
+            triggers.append((end, "end", 0))
+        for at, kind, lead in triggers:
+            if at > now:
+                heapq.heappush(self._heap, _Trigger(at, next(self._seq), salon_id, self._generations[salon_id],
+                                                    event.id, kind, lead, signature))
+
+    def _sync(self, salon: Any, now: float) -> int:
+        """Répercute les changements du programme d'un salon ; retourne le nombre d'événements recalculés"""
+        known = self._schedules.setdefault(salon.id, {})
+        current = {event.id: event for event in salon.events}
+        changed = 0
+        for event_id in [e for e in known if e not in current]:
+            del known[event_id]
+            self._stale += 1
+            changed += 1
+        for event_id, event in current.items():
+            signature = _signature(event)
+            if known.get(event_id) == signature:
+                continue
+            if event_id in known:
+                self._stale += 1
+            known[event_id] = signature
+            self._push(salon.id, event, signature, now)
+            changed += 1
+        return changed
+
+    def _watch(self, salons: Iterable[Any], now: float):
+        """Suit les salons chargés (nouveaux, rechargés) et oublie les salons évincés"""
+        loaded = {salon.id: salon for salon in salons}
+        for salon_id in [s for s in self._salons if s not in loaded or self._salons[s] is not loaded[s]]:
+            self._salons.pop(salon_id).unsubscribe(self._salon_changed)
+            self._generations.pop(salon_id, None)
+            self._stale += len(self._schedules.pop(salon_id, {}))
+        for salon_id, salon in loaded.items():
+            if salon_id not in self._salons:
+                self._salons[salon_id] = salon
+                self._generations[salon_id] = next(self._seq)
+                salon.subscribe(self._salon_changed)
+                self._sync(salon, now)
+
+    def _compact(self):
+        """Retire les entrées caduques quand elles dominent le tas"""
+        if self._stale and self._stale > len(self._heap) * STALE_COMPACT_RATIO:
+            self._heap = [t for t in self._heap if self._current(t)]
+            heapq.heapify(self._heap)
+            self._stale = 0
+
+    def _current(self, trigger: _Trigger) -> bool:
+        return (self._generations.get(trigger.salon_id) == trigger.generation and
+                self._schedules.get(trigger.salon_id, {}).get(trigger.event_id) == trigger.signature)
+
+    def refresh(self, salons: Iterable[Any], now: Optional[float] = None):
+        """Applique les changements signalés depuis le dernier passage"""
+        now = now if now is not None else time.time()
+        with self._lock:
+            reconcile, self._reconcile = self._reconcile, False
+            dirty, self._dirty = self._dirty, set()
+        if reconcile:
+            self._watch(salons, now)
+        for salon_id in dirty:
+            salon = self._salons.get(salon_id)
+            if salon is not None:
+                self._sync(salon, now)
+        self._compact()
+
+    def due(self, now: Optional[float] = None) -> List[Announcement]:
+        """Dépile les déclencheurs échus et retourne leurs annonces"""
+        now = now if now is not None else time.time()
+        announcements = []
+        while self._heap and self._heap[0].at <= now:
+            trigger = heapq.heappop(self._heap)
+            if not self._current(trigger):
+                self._stale = max(0, self._stale - 1)
+                continue
+            event = next((e for e in self._salons[trigger.salon_id].events if e.id == trigger.event_id), None)
+            if event is None:
+                continue
+            announcements.append(Announcement(trigger.salon_id, trigger.event_id, trigger.kind,
+                                              format_announcement(event, trigger.kind, trigger.lead)))
+        return announcements
+
+    def next_at(self) -> Optional[float]:
+        """Échéance du prochain déclencheur valide (les caduques en tête sont retirées)"""
+        while self._heap and not self._current(self._heap[0]):
+            heapq.heappop(self._heap)
+            self._stale = max(0, self._stale - 1)
+        return self._heap[0].at if self._heap else None
+
+    # Boucle de fond
+
+    async def run(self, salons: Callable[[], Iterable[Any]],
+                  sinks: Sequence[Callable[[Announcement], Awaitable[None]]]):
+        """Dort jusqu'au prochain déclencheur (ou jusqu'à un changement), puis diffuse les annonces"""
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self.salons_changed()
+        while True:
+            self._wake.clear()
+            try:
+                self.refresh(salons())
+                for announcement in self.due():
+                    self.sent[announcement.kind] = self.sent.get(announcement.kind, 0) + 1
+                    logger.info(f"📢 Announcement ({announcement.salon_id}): {announcement.message}")
+                    for sink in sinks:
+                        try:
+                            await sink(announcement)
+                        except Exception as e:
+                            logger.error(f"❌ Announcement delivery failed: {e}")
+            except Exception as e:
+                logger.error(f"❌ Announcement scheduling failed: {e}")
+
+            next_at = self.next_at()
+            timeout = None if next_at is None else max(0.0, next_at - time.time())
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self, salons: Callable[[], Iterable[Any]],
+              sinks: Sequence[Callable[[Announcement], Awaitable[None]]]):
+        """Lance la boucle d'annonces en tâche de fond"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self.run(salons, sinks))
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for salon in self._salons.values():
+            salon.unsubscribe(self._salon_changed)
+        self._salons.clear()
+        self._schedules.clear()
+        self._generations.clear()
+        self._heap.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Déclencheurs en attente, prochaine échéance et annonces diffusées"""
+        next_at = self._heap[0].at if self._heap else None
+        return {
+            "salons": len(self._salons),
+            "pending_triggers": len(self._heap),
+            "stale_triggers": self._stale,
+            "next_in_seconds": round(next_at - time.time(), 1) if next_at is not None else None,
+            "sent": dict(self.sent)
+        }
+
+announcement_scheduler = AnnouncementScheduler(
+    settings.ANNOUNCEMENT_LEAD_MINUTES,
+    announce_end=settings.ANNOUNCE_EVENT_END
+)
@@ -0,0 +1,111 @@
+import asyncio
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from app.config import settings
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Pénalité de déplacement par niveau de densité (VisionService.analyze_crowd_density)
+DENSITY_PENALTIES = {0: 1.0, 1: 1.0, 2: 1.3, 3: 1.8, 4: 3.0}
+
+class CrowdService:
+    """Relevés d'affluence des caméras, convertis en pénalités de routage.
+
+    Chaque caméra est associée à une zone (ou à l'allée centrale d'une zone).
+    Le niveau retenu pour une zone est le plus élevé de ses caméras ; un relevé
+    plus ancien que reading_ttl est ignoré, pour qu'une caméra en panne ne
+    bloque pas une zone indéfiniment.
+    """
+
+    def __init__(self, camera_zones: Optional[Dict[str, str]] = None,
+                 reading_ttl: float = 60.0):
+        self.camera_zones = {
+            str(camera): self._zone_name(zone)
+            for camera, zone in (camera_zones or {}).items()
+        }
+        self.reading_ttl = timedelta(seconds=reading_ttl)
+        self._readings: Dict[str, Tuple[int, datetime]] = {}
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _zone_name(zone: str) -> str:
+        # "A", "zone A" ou "zone:A"
+        return zone.strip().split(":")[-1].split()[-1].upper()
+
+    def record(self, camera_id: Any, reading: Dict[str, Any],
+               now: Optional[datetime] = None) -> Optional[str]:
+        """Enregistre un relevé de densité ; retourne la zone concernée"""
+        zone = self.camera_zones.get(str(camera_id))
+        if zone is None or reading.get("density") == "unknown":
+            return None
+        level = max(0, min(int(reading.get("level", 0)), max(DENSITY_PENALTIES)))
+        with self._lock:
+            self._readings[str(camera_id)] = (level, now or datetime.now())
+        return zone
+
+    def zone_levels(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Niveau de densité courant de chaque zone équipée d'une caméra"""
+        now = now or datetime.now()
+        levels: Dict[str, int] = {}
+        with self._lock:
+            readings = list(self._readings.items())
+        for camera_id, (level, taken_at) in readings:
+            if now - taken_at > self.reading_ttl:
+                continue
+            zone = self.camera_zones[camera_id]
+            levels[zone] = max(level, levels.get(zone, 0))
+        return levels
+
+    def zone_penalties(self, now: Optional[datetime] = None) -> Dict[str, float]:
+        """Multiplicateur du coût de traversée de chaque zone (1.0 = fluide)"""
+        return {zone: DENSITY_PENALTIES[level] for zone, level in self.zone_levels(now).items()}
+
+    def apply(self, salons: Iterable[Any]) -> int:
+        """Applique les pénalités courantes aux salons ; retourne le nombre de graphes mis à jour"""
+        penalties = self.zone_penalties()
+        return sum(1 for salon in salons if salon.set_zone_congestion(penalties))
+
+    async def run(self, vision_service: Any, salons: Callable[[], Iterable[Any]],
+                  interval: float = 5.0):
+        """Boucle de relevé : la caméra est lue hors de la boucle d'événements,
+        puis les graphes des salons chargés sont mis à jour"""
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                if vision_service.is_camera_available():
+                    reading = await loop.run_in_executor(None, vision_service.analyze_crowd_density)
+                    self.record(settings.CAMERA_INDEX, reading)
+                updated = self.apply(salons())
+                if updated:
+                    logger.debug(f"Congestion updated on {updated} salon(s): {self.zone_levels()}")
+            except Exception as e:
+                logger.error(f"❌ Crowd density refresh failed: {e}")
+            await asyncio.sleep(interval)
+
+    def start(self, vision_service: Any, salons: Callable[[], Iterable[Any]],
+              interval: float = 5.0):
+        """Lance la boucle de relevé en tâche de fond"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self.run(vision_service, salons, interval))
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Niveaux et pénalités courants par zone"""
+        levels = self.zone_levels()
+        return {
+            zone: {"level": level, "penalty": DENSITY_PENALTIES[level]}
+            for zone, level in sorted(levels.items())
+        }
+
+crowd_service = CrowdService(
+    settings.CROWD_CAMERA_ZONES,
+    reading_ttl=settings.CROWD_READING_TTL_SECONDS
+)
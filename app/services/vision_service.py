@@ -11,11 +11,12 @@ from PIL import Image
 from app.config import settings
 from app.utils.exceptions import VisionServiceError
 from app.utils.logger import setup_logger
+from app.utils.metrics import VISION_FRAME_SECONDS
 
-logger = setup_logger(_name_)
+logger = setup_logger(__name__)
 
 class VisionService:
-    def _init_(self):
+    def __init__(self):
         self.camera = None
         self.face_cascade = None
         self.is_running = False
@@ -68,11 +69,15 @@ class VisionService:
     
     async def detect_visitors_async(self) -> Dict[str, any]:
         """Détection asynchrone des visiteurs"""
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         return await loop.run_in_executor(None, self.detect_visitors)
     
     def detect_visitors(self) -> Dict[str, any]:
         """Détecte les visiteurs dans le champ de vision"""
+        with VISION_FRAME_SECONDS.labels("detect").time():
+            return self._detect_visitors()
+    
+    def _detect_visitors(self) -> Dict[str, any]:
         if not self.is_camera_available():
             return {"count": 0, "faces": [], "error": "Camera not available"}
         
@@ -127,11 +132,15 @@ class VisionService:
     
     async def capture_scene_async(self) -> Optional[str]:
         """Capture asynchrone de la scène"""
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         return await loop.run_in_executor(None, self.capture_scene)
     
     def capture_scene(self) -> Optional[str]:
         """Capture la scène actuelle en base64"""
+        with VISION_FRAME_SECONDS.labels("capture").time():
+            return self._capture_scene()
+    
+    def _capture_scene(self) -> Optional[str]:
         if not self.is_camera_available():
             return None
         
@@ -1,13 +1,59 @@
 import asyncio
 import logging
-from typing import Optional
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
 import speech_recognition as sr
 import pyttsx3
 from app.config import settings
 from app.utils.exceptions import VoiceServiceError
+from app.utils.metrics import STT_SECONDS, TTS_FIRST_WORD_SECONDS, TTS_SECONDS
 
 logger = logging.getLogger(__name__)
 
+# Nombre de mesures conservées pour le délai avant le premier mot
+FIRST_WORD_SAMPLES = 200
+
+class SpeechStream:
+    """Phrases prononcées dans l'ordre, dès leur arrivée.
+
+    La synthèse de la première phrase commence pendant que la suite est
+    encore générée ; le délai entre started (réception de la demande) et le
+    début de la première phrase est mesuré.
+    """
+
+    def __init__(self, service: "VoiceService", started: float, measured: bool = True):
+        self.service = service
+        self.started = started
+        self.measured = measured
+        self.first_word_delay: Optional[float] = None
+        self._queue: "asyncio.Queue[Optional[str]]" = asyncio.Queue()
+        self._task = asyncio.ensure_future(self._run())
+
+    def say(self, sentence: str):
+        """Ajoute une phrase à prononcer"""
+        self._queue.put_nowait(sentence)
+
+    async def finish(self) -> Optional[float]:
+        """Attend la fin de la lecture ; retourne le délai avant le premier mot (secondes)"""
+        self._queue.put_nowait(None)
+        await self._task
+        return self.first_word_delay
+
+    async def _run(self):
+        while True:
+            sentence = await self._queue.get()
+            if sentence is None:
+                return
+            if self.first_word_delay is None and self.measured:
+                self.first_word_delay = time.perf_counter() - self.started
+                self.service._record_first_word(self.first_word_delay)
+            try:
+                await self.service.speak_async(sentence)
+            except VoiceServiceError as e:
+                logger.error(f"Streamed speech interrupted: {e}")
+
 class VoiceService:
     def __init__(self):
         self.recognizer = sr.Recognizer()
@@ -15,6 +61,10 @@ class VoiceService:
         self.tts_engine = pyttsx3.init()
         self._setup_voice()
         self._is_listening = False
+        # Le moteur de synthèse n'accepte qu'une lecture à la fois
+        self._speech_lock = threading.Lock()
+        self._first_word_delays: "deque[float]" = deque(maxlen=FIRST_WORD_SAMPLES)
+        self._announcements: Optional[SpeechStream] = None
     
     def _setup_voice(self):
         """Configure la voix de synthèse"""
@@ -34,7 +84,7 @@ class VoiceService:
     
     async def listen_async(self, timeout: int = 5) -> Optional[str]:
         """Écoute asynchrone"""
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         return await loop.run_in_executor(None, self._listen_sync, timeout)
     
     def _listen_sync(self, timeout: int) -> Optional[str]:
@@ -45,10 +95,11 @@ class VoiceService:
                 logger.info("🎤 Listening...")
                 audio = self.recognizer.listen(source, timeout=timeout, phrase_time_limit=10)
             
-            text = self.recognizer.recognize_google(
-                audio, 
-                language=settings.VOICE_LANGUAGE
-            )
+            with STT_SECONDS.time():
+                text = self.recognizer.recognize_google(
+                    audio, 
+                    language=settings.VOICE_LANGUAGE
+                )
             logger.info(f"👤 Recognized: {text}")
             return text
             
@@ -63,15 +114,42 @@ class VoiceService:
     
     async def speak_async(self, text: str):
         """Synthèse vocale asynchrone"""
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         await loop.run_in_executor(None, self._speak_sync, text)
     
     def _speak_sync(self, text: str):
         """Synthèse vocale synchrone"""
         try:
             logger.info(f"🤖 Speaking: {text}")
-            self.tts_engine.say(text)
-            self.tts_engine.runAndWait()
+            with self._speech_lock, TTS_SECONDS.time():
+                self.tts_engine.say(text)
+                self.tts_engine.runAndWait()
         except Exception as e:
             logger.error(f"TTS error: {e}")
-            raise VoiceServiceError(f"Speech synthesis failed: {e}")
\ No newline at end of file
+            raise VoiceServiceError(f"Speech synthesis failed: {e}")
+    
+    def speech_stream(self, started: Optional[float] = None) -> SpeechStream:
+        """Lecture au fil de l'eau d'une réponse produite phrase par phrase"""
+        return SpeechStream(self, started if started is not None else time.perf_counter())
+    
+    async def announce(self, text: str):
+        """Met une annonce dans la file de lecture (retour immédiat, lue dans l'ordre d'arrivée)"""
+        if self._announcements is None:
+            self._announcements = SpeechStream(self, time.perf_counter(), measured=False)
+        self._announcements.say(text)
+    
+    def _record_first_word(self, delay: float):
+        self._first_word_delays.append(delay)
+        TTS_FIRST_WORD_SECONDS.observe(delay)
+        logger.info(f"🔊 First word after {delay * 1000:.0f} ms")
+    
+    def speech_stats(self) -> Dict[str, Any]:
+        """Délai avant le premier mot prononcé (moyenne et 95e centile, en ms)"""
+        delays = sorted(self._first_word_delays)
+        if not delays:
+            return {"samples": 0, "first_word_avg_ms": None, "first_word_p95_ms": None}
+        return {
+            "samples": len(delays),
+            "first_word_avg_ms": round(sum(delays) * 1000 / len(delays), 1),
+            "first_word_p95_ms": round(delays[min(len(delays) - 1, int(len(delays) * 0.95))] * 1000, 1)
+        }
@@ -1,53 +1,73 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from datetime import datetime, timedelta
 from langchain.tools import BaseTool
 from app.models.salon import Salon, Event
 from app.utils.logger import setup_logger
+from app.utils.intent_matcher import intent_matcher
+from app.utils.cache import cached_output
+from app.tools.executor import run_tool
+from app.utils.pagination import (
+    DEFAULT_PAGE_SIZE, INVALID_CURSOR_MESSAGE, PageRequest, group_lines, paginate, parse_page_request,
+    render_page_footer
+)
 
-logger = setup_logger(_name_)
+logger = setup_logger(__name__)
+
+# Délai sous lequel un événement est signalé comme imminent
+SOON_THRESHOLD = timedelta(hours=1)
+
+def _next_status_change(tool: BaseTool, now: datetime) -> datetime:
+    """Prochain instant où un statut d'événement ou la date du jour change"""
+    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+    change = tool.salon_data.time_index.next_change(now, lead=SOON_THRESHOLD)
+    return min(change, midnight) if change else midnight
 
 class EventScheduleTool(BaseTool):
     """Outil pour consulter le programme des événements"""
     
     name = "event_schedule"
-    description = "Récupère le programme des événements du salon avec filtrage par date/heure"
+    description = ("Récupère le programme des événements du salon avec filtrage par date/heure. "
+                   "Programme complet paginé : ajoutez 'cursor=<jeton>' pour obtenir la suite")
+    salon_data: Salon
+    
+    def __init__(self, salon_data: Salon):
+        super().__init__(salon_data=salon_data)
     
-    def _init_(self, salon_data: Salon):
-        super()._init_()
-        self.salon_data = salon_data
+    async def _arun(self, query: str = "today") -> str:
+        """Version asynchrone : exécutée dans le pool des outils"""
+        return await run_tool(self._run, query)
     
     def _run(self, query: str = "today") -> str:
         """Retourne le programme des événements"""
-        query_lower = query.lower().strip()
-        
-        if query_lower in ["today", "aujourd'hui", "maintenant"]:
+        try:
+            request = parse_page_request(query)
+        except ValueError:
+            return INVALID_CURSOR_MESSAGE
+        query = request.query or "today"
+        match = intent_matcher.match(query)
+        
+        if match.is_exactly("schedule.today"):
             return self._get_today_events()
-        elif query_lower in ["all", "tous", "complet"]:
-            return self._get_all_events()
-        elif "demain" in query_lower:
+        elif match.is_exactly("schedule.all"):
+            return self._get_all_events(request.offset, request.limit)
+        elif match.has("schedule.tomorrow"):
             return self._get_tomorrow_events()
         else:
             return self._search_events(query)
     
+    @cached_output(valid_until=_next_status_change)
     def _get_today_events(self) -> str:
         """Événements d'aujourd'hui"""
         now = datetime.now()
-        today_events = []
-        
-        for event in self.salon_data.events:
-            if event.start_time.date() == now.date():
-                today_events.append(event)
+        today_events = self.salon_data.get_events_by_date(now)
         
         if not today_events:
             return "📅 Aucun événement prévu aujourd'hui."
         
-        # Trier par heure
-        today_events.sort(key=lambda x: x.start_time)
-        
         result = f"📅 *Programme d'aujourd'hui* ({len(today_events)} événements)\n\n"
         
         for event in today_events:
-            status = self._get_event_status(event)
+            status = self._get_event_status(event, now)
             result += f"{status} *{event.title}*\n"
             result += f"   🕐 {event.start_time.strftime('%H:%M')} - {event.end_time.strftime('%H:%M')}\n"
             result += f"   📍 {event.location}\n"
@@ -56,49 +76,36 @@ class EventScheduleTool(BaseTool):
         
         return result
     
-    def _get_all_events(self) -> str:
+    def _iter_all_events(self) -> Iterator[Tuple[str, str]]:
+        """Produit paresseusement les lignes (jour, événement) dans l'ordre chronologique"""
+        for event in self.salon_data.catalog.events:
+            day = f"📆 *{event.start_time.strftime('%A %d/%m/%Y')}*"
+            line = f"  🕐 {event.start_time.strftime('%H:%M')} - *{event.title}*\n"
+            line += f"     📍 {event.location} • 👤 {event.speaker}"
+            yield day, line
+    
+    @cached_output()
+    def _get_all_events(self, offset: int = 0, limit: int = DEFAULT_PAGE_SIZE) -> str:
         """Tous les événements du salon"""
         if not self.salon_data.events:
             return "📅 Aucun événement programmé pour ce salon."
         
-        # Grouper par jour
-        events_by_day = {}
-        for event in self.salon_data.events:
-            day_key = event.start_time.strftime('%Y-%m-%d')
-            if day_key not in events_by_day:
-                events_by_day[day_key] = []
-            events_by_day[day_key].append(event)
-        
-        result = f"📅 *Programme complet* ({len(self.salon_data.events)} événements)\n\n"
-        
-        for day_key, events in sorted(events_by_day.items()):
-            day_date = datetime.strptime(day_key, '%Y-%m-%d')
-            result += f"📆 *{day_date.strftime('%A %d/%m/%Y')}*\n"
-            
-            # Trier par heure
-            events.sort(key=lambda x: x.start_time)
-            
-            for event in events:
-                result += f"  🕐 {event.start_time.strftime('%H:%M')} - *{event.title}*\n"
-                result += f"     📍 {event.location} • 👤 {event.speaker}\n"
-            result += "\n"
+        page = paginate(self._iter_all_events(), PageRequest("", offset, limit))
         
-        return result
+        lines = [f"📅 *Programme complet* ({len(self.salon_data.events)} événements)", ""]
+        lines.extend(group_lines(page.items))
+        lines.append(render_page_footer(page))
+        return "\n".join(lines)
     
+    @cached_output(valid_until=_next_status_change)
     def _get_tomorrow_events(self) -> str:
         """Événements de demain"""
         tomorrow = datetime.now() + timedelta(days=1)
-        tomorrow_events = []
-        
-        for event in self.salon_data.events:
-            if event.start_time.date() == tomorrow.date():
-                tomorrow_events.append(event)
+        tomorrow_events = self.salon_data.get_events_by_date(tomorrow)
         
         if not tomorrow_events:
             return "📅 Aucun événement prévu demain."
         
-        tomorrow_events.sort(key=lambda x: x.start_time)
-        
         result = f"📅 *Programme de demain* ({len(tomorrow_events)} événements)\n\n"
         
         for event in tomorrow_events:
@@ -109,37 +116,21 @@ class EventScheduleTool(BaseTool):
         
         return result
     
+    @cached_output(valid_until=_next_status_change)
     def _search_events(self, query: str) -> str:
         """Recherche d'événements par mots-clés"""
-        matching_events = []
-        query_words = query.lower().split()
-        
-        for event in self.salon_data.events:
-            score = 0
-            
-            # Recherche dans le titre
-            for word in query_words:
-                if word in event.title.lower():
-                    score += 3
-                if word in event.description.lower():
-                    score += 2
-                if word in event.speaker.lower():
-                    score += 1
-                if word in event.category.lower():
-                    score += 1
-            
-            if score > 0:
-                matching_events.append((event, score))
+        # L'outil présente les ex æquo dans l'ordre du programme
+        matching_events = sorted(self.salon_data.search_events_scored(query),
+                                 key=lambda x: (-x[1], x[0].start_time))
         
         if not matching_events:
             return f"Aucun événement trouvé pour '{query}'"
         
-        matching_events.sort(key=lambda x: x[1], reverse=True)
-        
         result = f"🔍 *Événements trouvés pour '{query}'* ({len(matching_events)} résultats)\n\n"
         
+        now = datetime.now()
         for event, score in matching_events:
-            status = self._get_event_status(event)
+            status = self._get_event_status(event, now)
             result += f"{status} *{event.title}*\n"
             result += f"   🕐 {event.start_time.strftime('%d/%m %H:%M')} - {event.end_time.strftime('%H:%M')}\n"
             result += f"   📍 {event.location} • 👤 {event.speaker}\n"
@@ -147,13 +138,13 @@ class EventScheduleTool(BaseTool):
         
         return result
     
-    def _get_event_status(self, event: Event) -> str:
+    def _get_event_status(self, event: Event, now: Optional[datetime] = None) -> str:
         """Détermine le statut de l'événement"""
-        now = datetime.now()
+        now = now or datetime.now()
         
         if now < event.start_time:
             delta = event.start_time - now
-            if delta.total_seconds() < 3600:  # Moins d'1h
+            if delta < SOON_THRESHOLD:  # Moins d'1h
                 return "🔜"
             else:
                 return "⏳"
@@ -167,10 +158,14 @@ class EventReminderTool(BaseTool):
     
     name = "event_reminder"
     description = "Gère les rappels et notifications pour les événements à venir"
+    salon_data: Salon
+    
+    def __init__(self, salon_data: Salon):
+        super().__init__(salon_data=salon_data)
     
-    def _init_(self, salon_data: Salon):
-        super()._init_()
-        self.salon_data = salon_data
+    async def _arun(self, timeframe: str = "30min") -> str:
+        """Version asynchrone : exécutée dans le pool des outils"""
+        return await run_tool(self._run, timeframe)
     
     def _run(self, timeframe: str = "30min") -> str:
         """Retourne les événements à venir dans la période spécifiée"""
@@ -180,17 +175,11 @@ class EventReminderTool(BaseTool):
         minutes = self._parse_timeframe(timeframe)
         target_time = now + timedelta(minutes=minutes)
         
-        upcoming_events = []
-        
-        for event in self.salon_data.events:
-            if now <= event.start_time <= target_time:
-                upcoming_events.append(event)
+        upcoming_events = self.salon_data.get_events_between(now, target_time)
         
         if not upcoming_events:
             return f"Aucun événement dans les {minutes} prochaines minutes."
         
-        upcoming_events.sort(key=lambda x: x.start_time)
-        
         result = f"⏰ *Événements à venir* (dans les {minutes} prochaines minutes)\n\n"
         
         for event in upcoming_events:
@@ -226,39 +215,49 @@ class EventCategoryTool(BaseTool):
     """Outil pour filtrer les événements par catégorie"""
     
     name = "event_category"
-    description = "Filtre et liste les événements par catégorie (conférence, atelier, démonstration, etc.)"
+    description = ("Filtre et liste les événements par catégorie (conférence, atelier, démonstration, etc.). "
+                   "Résultats paginés : ajoutez 'cursor=<jeton>' pour obtenir la suite")
+    salon_data: Salon
+    
+    def __init__(self, salon_data: Salon):
+        super().__init__(salon_data=salon_data)
     
-    def _init_(self, salon_data: Salon):
-        super()._init_()
-        self.salon_data = salon_data
+    async def _arun(self, category: str = "all") -> str:
+        """Version asynchrone : exécutée dans le pool des outils"""
+        return await run_tool(self._run, category)
     
     def _run(self, category: str = "all") -> str:
-        """Filtre les événements par catégorie"""
+        """Filtre les événements par catégorie (paginé : page=N, limit=N ou cursor=jeton)"""
+        try:
+            request = parse_page_request(category)
+        except ValueError:
+            return INVALID_CURSOR_MESSAGE
+        category = request.query or "all"
+        
         if category.lower() in ["all", "tous"]:
             return self._list_all_categories()
         else:
-            return self._filter_by_category(category)
+            return self._filter_by_category(category, request.offset, request.limit)
     
+    @cached_output(valid_until=_next_status_change)
     def _list_all_categories(self) -> str:
         """Liste toutes les catégories d'événements"""
-        categories = {}
-        
-        for event in self.salon_data.events:
-            if event.category not in categories:
-                categories[event.category] = []
-            categories[event.category].append(event)
+        catalog = self.salon_data.catalog
+        categories = catalog.event_category_groups()
         
         if not categories:
             return "Aucune catégorie d'événement disponible."
         
+        # Les indices sont chronologiques : les événements à venir commencent ici
+        first_upcoming = catalog.event_range(datetime.now(), include_start=False).start
+        
         result = f"🏷️ *Catégories d'événements* ({len(categories)} catégories)\n\n"
         
-        for category, events in categories.items():
-            result += f"📂 *{category}* ({len(events)} événements)\n"
+        for category, indices in categories.items():
+            result += f"📂 *{category}* ({len(indices)} événements)\n"
             
             # Afficher les 3 prochains événements de cette catégorie
-            upcoming = [e for e in events if e.start_time > datetime.now()]
-            upcoming.sort(key=lambda x: x.start_time)
+            upcoming = [catalog.events[i] for i in indices if i >= first_upcoming]
             
             for event in upcoming[:3]:
                 result += f"   • {event.title} - {event.start_time.strftime('%d/%m %H:%M')}\n"
@@ -270,41 +269,30 @@ class EventCategoryTool(BaseTool):
         
         return result
     
-    def _filter_by_category(self, category: str) -> str:
+    def _iter_category(self, category: str, now: datetime) -> Iterator[Tuple[str, str]]:
+        """Produit paresseusement les événements d'une catégorie : à venir puis passés"""
+        catalog = self.salon_data.catalog
+        upcoming = catalog.event_range(now, include_start=False)
+        
+        for event in catalog.events_in_category(category, upcoming):
+            line = f"  🕐 {event.start_time.strftime('%d/%m %H:%M')} - *{event.title}*\n"
+            line += f"     📍 {event.location} • 👤 {event.speaker}"
+            yield "🔮 *À venir*", line
+        
+        for event in catalog.events_in_category(category, reversed(range(upcoming.start))):
+            yield "✅ *Passés*", f"  🕐 {event.start_time.strftime('%d/%m %H:%M')} - *{event.title}*"
+    
+    @cached_output(valid_until=_next_status_change)
+    def _filter_by_category(self, category: str, offset: int = 0, limit: int = DEFAULT_PAGE_SIZE) -> str:
         """Filtre les événements par catégorie spécifique"""
-        category_lower = category.lower()
-        matching_events = []
-        
-        for event in self.salon_data.events:
-            if category_lower in event.category.lower():
-                matching_events.append(event)
+        page = paginate(self._iter_category(category, datetime.now()), PageRequest(category, offset, limit))
         
-        if not matching_events:
+        if not page.items:
+            if offset:
+                return f"Plus d'événements dans la catégorie '{category}'"
             return f"Aucun événement trouvé dans la catégorie '{category}'"
         
-        # Séparer passés et à venir
-        now = datetime.now()
-        upcoming = [e for e in matching_events if e.start_time > now]
-        past = [e for e in matching_events if e.start_time <= now]
-        
-        upcoming.sort(key=lambda x: x.start_time)
-        past.sort(key=lambda x: x.start_time, reverse=True)
-        
-        result = f"🏷️ *Événements - {category}* ({len(matching_events)} total)\n\n"
-        
-        if upcoming:
-            result += f"🔮 *À venir* ({len(upcoming)})\n"
-            for event in upcoming:
-                result += f"  🕐 {event.start_time.strftime('%d/%m %H:%M')} - *{event.title}*\n"
-                result += f"     📍 {event.location} • 👤 {event.speaker}\n"
-            result += "\n"
-        
-        if past:
-            result += f"✅ *Passés* ({len(past)})\n"
-            for event in past[:5]:  # Afficher les 5 derniers
-                result += f"  🕐 {event.start_time.strftime('%d/%m %H:%M')} - *{event.title}*\n"
-            
-            if len(past) > 5:
-                result += f"  ... et {len(past) - 5} autres événements passés\n"
-        
-        return result
\ No newline at end of file
+        lines = [f"🏷️ *Événements - {category}*", ""]
+        lines.extend(group_lines(page.items))
+        lines.append(render_page_footer(page))
+        return "\n".join(lines)
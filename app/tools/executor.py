@@ -0,0 +1,28 @@
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from app.config import settings
+from app.utils.metrics import TOOL_ERRORS_TOTAL, TOOL_SECONDS
+
+# Pool dédié aux outils : un rendu lent n'occupe pas le pool par défaut (voix, vision)
+tool_executor = ThreadPoolExecutor(max_workers=settings.TOOL_WORKERS, thread_name_prefix="tool")
+
+def _timed(tool: str, call: Callable[[], str]) -> str:
+    """Exécute l'outil en mesurant sa durée (hors attente dans le pool)"""
+    started = time.perf_counter()
+    try:
+        return call()
+    except Exception:
+        TOOL_ERRORS_TOTAL.labels(tool).inc()
+        raise
+    finally:
+        TOOL_SECONDS.labels(tool).observe(time.perf_counter() - started)
+
+async def run_tool(method: Callable[..., str], *args: Any, **kwargs: Any) -> str:
+    """Exécute la méthode synchrone d'un outil dans le pool, sans bloquer la boucle d'événements"""
+    loop = asyncio.get_running_loop()
+    tool = getattr(getattr(method, "__self__", None), "name", method.__name__)
+    return await loop.run_in_executor(tool_executor, _timed, tool, functools.partial(method, *args, **kwargs))
@@ -1,60 +1,90 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Tuple
 from langchain.tools import BaseTool
 from app.models.salon import Salon, Exhibitor
 from app.utils.logger import setup_logger
+from app.utils.cache import cached_output
+from app.tools.executor import run_tool
+from app.utils.pagination import (
+    DEFAULT_PAGE_SIZE, INVALID_CURSOR_MESSAGE, PageRequest, group_lines, paginate, parse_page_request,
+    render_page_footer
+)
 
-logger = setup_logger(_name_)
+logger = setup_logger(__name__)
+
+# Score minimal pour retenir directement une correspondance approximative
+FUZZY_RESOLVE_SCORE = 0.8
 
 class ExhibitorInfoTool(BaseTool):
     """Outil pour récupérer les informations sur les exposants"""
     
     name = "exhibitor_info"
     description = "Récupère les informations détaillées sur un exposant spécifique par nom ou numéro de stand"
+    salon_data: Salon
+    
+    def __init__(self, salon_data: Salon):
+        super().__init__(salon_data=salon_data)
     
-    def _init_(self, salon_data: Salon):
-        super()._init_()
-        self.salon_data = salon_data
+    async def _arun(self, query: str) -> str:
+        """Version asynchrone : exécutée dans le pool des outils"""
+        return await run_tool(self._run, query)
     
     def _run(self, query: str) -> str:
         """Recherche un exposant par nom ou numéro de stand"""
         query_lower = query.lower().strip()
         
-        # Recherche par nom
-        for exhibitor in self.salon_data.exhibitors:
-            if (query_lower in exhibitor.name.lower() or 
-                query_lower == exhibitor.booth_number.lower()):
-                
-                info = f"""
+        # Recherche directe par numéro de stand ou par nom
+        exhibitor = (self.salon_data.get_exhibitor_by_booth(query_lower) or
+                     self.salon_data.get_exhibitor_by_name(query_lower) or
+                     self.salon_data.find_exhibitor_by_booth_in_text(query_lower))
+        if exhibitor:
+            return self._format_exhibitor(exhibitor)
+        
+        # Nom mal orthographié ou mal reconnu : correspondance approximative
+        matches = self.salon_data.suggest(query, kinds=["exhibitor", "booth"])
+        if matches and matches[0].score >= FUZZY_RESOLVE_SCORE and (
+                len(matches) == 1 or matches[1].score < matches[0].score):
+            return self._format_exhibitor(matches[0].target)
+        
+        # Si aucun exposant trouvé, proposer des suggestions
+        suggestions = self._get_suggestions(query_lower)
+        if suggestions:
+            return f"Exposant '{query}' non trouvé. Voulez-vous dire: {', '.join(suggestions[:3])} ?"
+        
+        return f"Aucun exposant trouvé pour '{query}'. Consultez la liste complète avec 'liste exposants'."
+    
+    def _format_exhibitor(self, exhibitor: Exhibitor) -> str:
+        """Fiche d'information d'un exposant"""
+        info = f"""
                 🏢 *{exhibitor.name}*
                 📍 Stand N°: {exhibitor.booth_number}
                 🏷️ Catégorie: {exhibitor.category}
                 📝 Description: {exhibitor.description}
                 👤 Contact: {exhibitor.contact_person}
                 """
-                
-                if exhibitor.special_offers:
-                    info += f"\n🎁 Offres spéciales: {', '.join(exhibitor.special_offers)}"
-                
-                return info.strip()
         
-        # Si aucun exposant trouvé, proposer des suggestions
-        suggestions = self._get_suggestions(query_lower)
-        if suggestions:
-            return f"Exposant '{query}' non trouvé. Voulez-vous dire: {', '.join(suggestions[:3])} ?"
+        if exhibitor.special_offers:
+            info += f"\n🎁 Offres spéciales: {', '.join(exhibitor.special_offers)}"
         
-        return f"Aucun exposant trouvé pour '{query}'. Consultez la liste complète avec 'liste exposants'."
+        return info.strip()
     
     def _get_suggestions(self, query: str) -> List[str]:
         """Propose des suggestions d'exposants similaires"""
         suggestions = []
         
-        for exhibitor in self.salon_data.exhibitors:
-            # Recherche par similarité dans le nom
-            if any(word in exhibitor.name.lower() for word in query.split()):
-                suggestions.append(exhibitor.name)
-            # Recherche par catégorie
-            elif query in exhibitor.category.lower():
-                suggestions.append(exhibitor.name)
+        # Noms, stands et intervenants proches (fautes de frappe, reconnaissance vocale)
+        for match in self.salon_data.suggest(query, limit=3):
+            if match.kind == "booth":
+                suggestion = f"Stand {match.label} ({match.target.name})"
+            elif match.kind == "speaker":
+                suggestion = f"{match.label} (intervenant)"
+            else:
+                suggestion = match.label
+            if suggestion not in suggestions:
+                suggestions.append(suggestion)
+        
+        # Sinon, recherche par mots-clés (catégorie, description)
+        if not suggestions:
+            suggestions = [e.name for e in self.salon_data.search_exhibitors(query, limit=3)]
         
         return suggestions
 
@@ -62,103 +92,101 @@ class ExhibitorListTool(BaseTool):
     """Outil pour lister les exposants par catégorie"""
     
     name = "exhibitor_list"
-    description = "Liste tous les exposants ou les exposants d'une catégorie spécifique"
+    description = ("Liste tous les exposants ou les exposants d'une catégorie spécifique. "
+                   "Résultats paginés : ajoutez 'cursor=<jeton>' pour obtenir la suite")
+    salon_data: Salon
     
-    def _init_(self, salon_data: Salon):
-        super()._init_()
-        self.salon_data = salon_data
+    def __init__(self, salon_data: Salon):
+        super().__init__(salon_data=salon_data)
+    
+    async def _arun(self, category: str = "all") -> str:
+        """Version asynchrone : exécutée dans le pool des outils"""
+        return await run_tool(self._run, category)
     
     def _run(self, category: str = "all") -> str:
-        """Liste les exposants"""
+        """Liste les exposants (paginé : page=N, limit=N ou cursor=jeton)"""
+        try:
+            request = parse_page_request(category)
+        except ValueError:
+            return INVALID_CURSOR_MESSAGE
+        category = request.query or "all"
+        
         if category.lower() in ["all", "tous", "tout"]:
-            return self._list_all_exhibitors()
+            return self._list_all_exhibitors(request.offset, request.limit)
         else:
-            return self._list_by_category(category)
+            return self._list_by_category(category, request.offset, request.limit)
     
-    def _list_all_exhibitors(self) -> str:
+    def _iter_all_exhibitors(self) -> Iterator[Tuple[str, str]]:
+        """Produit paresseusement les lignes (catégorie, exposant) groupées par catégorie"""
+        catalog = self.salon_data.catalog
+        
+        for category, indices in catalog.exhibitor_category_groups().items():
+            header = f"🏷️ *{category}* ({len(indices)} exposants)"
+            for index in indices:
+                exhibitor = catalog.exhibitors[index]
+                yield header, f"  • {exhibitor.name} - Stand {exhibitor.booth_number}"
+    
+    @cached_output()
+    def _list_all_exhibitors(self, offset: int = 0, limit: int = DEFAULT_PAGE_SIZE) -> str:
         """Liste tous les exposants"""
         if not self.salon_data.exhibitors:
             return "Aucun exposant enregistré pour ce salon."
         
-        # Grouper par catégorie
-        categories = {}
-        for exhibitor in self.salon_data.exhibitors:
-            if exhibitor.category not in categories:
-                categories[exhibitor.category] = []
-            categories[exhibitor.category].append(exhibitor)
-        
-        result = f"📋 *Liste des {len(self.salon_data.exhibitors)} exposants:*\n\n"
+        page = paginate(self._iter_all_exhibitors(), PageRequest("", offset, limit))
         
-        for category, exhibitors in categories.items():
-            result += f"🏷️ *{category}* ({len(exhibitors)} exposants)\n"
-            for exhibitor in exhibitors:
-                result += f"  • {exhibitor.name} - Stand {exhibitor.booth_number}\n"
-            result += "\n"
-        
-        return result
+        lines = [f"📋 *Liste des {len(self.salon_data.exhibitors)} exposants:*", ""]
+        lines.extend(group_lines(page.items))
+        lines.append(render_page_footer(page))
+        return "\n".join(lines)
+    
+    def _iter_category(self, category: str) -> Iterator[str]:
+        """Produit paresseusement les fiches des exposants d'une catégorie"""
+        for exhibitor in self.salon_data.catalog.exhibitors_in_category(category):
+            entry = f"🏢 *{exhibitor.name}* - Stand {exhibitor.booth_number}\n"
+            entry += f"   📝 {exhibitor.description[:100]}..."
+            if exhibitor.special_offers:
+                entry += f"\n   🎁 Offres: {', '.join(exhibitor.special_offers)}"
+            yield entry
     
-    def _list_by_category(self, category: str) -> str:
+    @cached_output()
+    def _list_by_category(self, category: str, offset: int = 0, limit: int = DEFAULT_PAGE_SIZE) -> str:
         """Liste les exposants d'une catégorie"""
-        category_lower = category.lower()
-        matching_exhibitors = []
-        
-        for exhibitor in self.salon_data.exhibitors:
-            if category_lower in exhibitor.category.lower():
-                matching_exhibitors.append(exhibitor)
+        page = paginate(self._iter_category(category), PageRequest(category, offset, limit))
         
-        if not matching_exhibitors:
+        if not page.items:
+            if offset:
+                return f"Plus d'exposants dans la catégorie '{category}'."
             return f"Aucun exposant trouvé dans la catégorie '{category}'."
         
-        result = f"🏷️ *Exposants - {category}* ({len(matching_exhibitors)} résultats)\n\n"
-        
-        for exhibitor in matching_exhibitors:
-            result += f"🏢 *{exhibitor.name}* - Stand {exhibitor.booth_number}\n"
-            result += f"   📝 {exhibitor.description[:100]}...\n"
-            if exhibitor.special_offers:
-                result += f"   🎁 Offres: {', '.join(exhibitor.special_offers)}\n"
-            result += "\n"
-        
-        return result
+        lines = [f"🏷️ *Exposants - {category}*", ""]
+        lines.append("\n\n".join(page.items))
+        lines.append(render_page_footer(page))
+        return "\n".join(lines)
 
 class ExhibitorSearchTool(BaseTool):
     """Outil de recherche avancée d'exposants"""
     
     name = "exhibitor_search"
     description = "Recherche avancée d'exposants par mots-clés, produits ou services"
+    salon_data: Salon
+    
+    def __init__(self, salon_data: Salon):
+        super().__init__(salon_data=salon_data)
     
-    def _init_(self, salon_data: Salon):
-        super()._init_()
-        self.salon_data = salon_data
+    async def _arun(self, keywords: str) -> str:
+        """Version asynchrone : exécutée dans le pool des outils"""
+        return await run_tool(self._run, keywords)
     
     def _run(self, keywords: str) -> str:
         """Recherche d'exposants par mots-clés"""
-        keywords_list = [kw.strip().lower() for kw in keywords.split(",")]
-        matching_exhibitors = []
-        
-        for exhibitor in self.salon_data.exhibitors:
-            score = 0
-            
-            # Recherche dans le nom
-            for kw in keywords_list:
-                if kw in exhibitor.name.lower():
-                    score += 3
-                
-                # Recherche dans la description
-                if kw in exhibitor.description.lower():
-                    score += 2
-                
-                # Recherche dans la catégorie
-                if kw in exhibitor.category.lower():
-                    score += 1
-            
-            if score > 0:
-                matching_exhibitors.append((exhibitor, score))
+        query = " ".join(kw.strip() for kw in keywords.split(","))
+        matching_exhibitors = self.salon_data.search_exhibitors_scored(query)
         
         if not matching_exhibitors:
             return f"Aucun exposant trouvé pour les mots-clés: {keywords}"
         
-        # Trier par score de pertinence
-        matching_exhibitors.sort(key=lambda x: x[1], reverse=True)
+        # Pertinence ramenée sur 5 par rapport au meilleur résultat
+        best_score = matching_exhibitors[0][1]
         
         result = f"🔍 *Résultats de recherche pour '{keywords}'* ({len(matching_exhibitors)} résultats)\n\n"
         
@@ -166,7 +194,7 @@ class ExhibitorSearchTool(BaseTool):
             result += f"🏢 *{exhibitor.name}* - Stand {exhibitor.booth_number}\n"
             result += f"   🏷️ {exhibitor.category}\n"
             result += f"   📝 {exhibitor.description[:100]}...\n"
-            result += f"   ⭐ Pertinence: {score}/5\n\n"
+            result += f"   ⭐ Pertinence: {round(5 * score / best_score, 1)}/5\n\n"
         
         if len(matching_exhibitors) > 10:
             result += f"... et {len(matching_exhibitors) - 10} autres résultats\n"
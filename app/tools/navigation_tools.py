@@ -1,122 +1,159 @@
+import re
+from datetime import datetime, timedelta
 from typing import List, Dict, Any, Tuple, Optional
 from langchain.tools import BaseTool
 from app.models.salon import Salon, Exhibitor, Event
 from app.utils.logger import setup_logger
+from app.utils.intent_matcher import intent_matcher
+from app.utils.cache import cached_output
+from app.tools.executor import run_tool
+from app.config import settings
+from app.models.venue_graph import Route, booth_key, room_key, zone_key
+from app.models.itinerary import TourPlanner, TourStop
 
-logger = setup_logger(_name_)
+logger = setup_logger(__name__)
+
+# Score minimal pour retenir une correspondance approximative de lieu
+FUZZY_RESOLVE_SCORE = 0.75
+
+# Services du plan correspondant à chaque intention de navigation
+FACILITY_INTENTS = {
+    "navigation.toilettes": ["Toilettes"],
+    "navigation.restauration": ["Restaurant", "Café"],
+    "navigation.accueil": ["Accueil", "Information"],
+    "navigation.sortie": ["Entrée principale", "Sortie de secours"]
+}
+
+# Présentation des services par type de demande (les emplacements viennent du plan)
+FACILITY_TITLES = {
+    "toilettes": "🚻 Toilettes",
+    "restauration": "🍽️ Restauration",
+    "accueil": "🏢 Accueil et information",
+    "sortie": "🚪 Entrées et sorties"
+}
+
+# Icône d'un service du plan (📍 par défaut)
+FACILITY_ICONS = {
+    "Toilettes": "🚻", "Restaurant": "🍽️", "Café": "☕", "Accueil": "🏢", "Information": "ℹ️",
+    "Entrée principale": "🚪", "Sortie de secours": "🚪", "Démonstrations": "🖥️",
+    "Espace détente": "🛋️", "Laboratoire": "🔬"
+}
+
+# Nombre de résultats des recherches de proximité ("les 5 cafés les plus proches")
+DEFAULT_NEARBY_COUNT = 5
+MAX_NEARBY_COUNT = 20
+_COUNT_PATTERN = re.compile(r"(?<!\w)(\d{1,2})(?!\w)")
+
+# Découpage d'une demande de parcours ("A12, EcoTech et l'atelier de 14h")
+_STOP_SEPARATOR = re.compile(r"\s*(?:,|;|\n|\bet\b|\bpuis\b)\s*", re.IGNORECASE)
+_ORIGIN_PATTERN = re.compile(r"^\s*(?:depuis|départ(?:\s+de)?)\s+([^,:;]+)[,:;]", re.IGNORECASE)
+_TIME_PATTERN = re.compile(r"(?<!\w)(\d{1,2})\s*(?:h|:)\s*(\d{2})?(?!\d)", re.IGNORECASE)
+
+# Point de départ par défaut des parcours
+DEFAULT_ORIGIN = "facility:A:Entrée principale"
+
+def _congestion_window(tool: BaseTool, now: datetime) -> datetime:
+    """Les rendus qui dépendent de l'affluence restent valables jusqu'au prochain relevé"""
+    return now + timedelta(seconds=settings.CROWD_REFRESH_SECONDS)
+
+def _location_nodes(salon: Salon, location: str) -> List[str]:
+    """Convertit un emplacement en nœuds du plan (stand, service ou zone)"""
+    # Direct zone reference
+    if location.upper() in salon.floor_plan.zones:
+        return [zone_key(location)]
+    
+    # Booth number or exhibitor name
+    exhibitor = (salon.find_exhibitor_by_booth_in_text(location) or
+                 salon.get_exhibitor_by_name(location))
+    if exhibitor:
+        return [booth_key(exhibitor.booth_number)]
+    
+    # Services (toilettes, restaurant...) puis zones par mots-clés
+    match = intent_matcher.match(location)
+    graph = salon.venue_graph
+    for intent, labels in FACILITY_INTENTS.items():
+        if match.has(intent):
+            return [key for label in labels for key in graph.facility_keys(label)]
+    if match.zones:
+        return [zone_key(min(match.zones))]
+    
+    # Nom ou stand mal orthographié : correspondance approximative
+    matches = salon.suggest(location, limit=1, kinds=["exhibitor", "booth"])
+    if matches and matches[0].score >= FUZZY_RESOLVE_SCORE:
+        return [booth_key(matches[0].target.booth_number)]
+    
+    return []
 
 class NavigationTool(BaseTool):
     """Outil pour la navigation et orientation dans le salon"""
     
     name = "navigation"
     description = "Aide à la navigation dans le salon : directions, distances, plans des stands"
+    salon_data: Salon
     
-    def _init_(self, salon_data: Salon):
-        super()._init_()
-        self.salon_data = salon_data
-        self._initialize_layout()
-    
-    def _initialize_layout(self):
-        """Initialise la disposition du salon"""
-        # Simulation d'un plan de salon avec zones
-        self.zones = {
-            "A": {"name": "Hall Principal", "booths": [], "facilities": ["Accueil", "Information"]},
-            "B": {"name": "Technologie", "booths": [], "facilities": ["Démonstrations"]},
-            "C": {"name": "Services", "booths": [], "facilities": ["Espace détente"]},
-            "D": {"name": "Innovation", "booths": [], "facilities": ["Laboratoire"]},
-            "E": {"name": "Restauration", "booths": [], "facilities": ["Restaurant", "Café"]}
-        }
-        
-        # Répartir les exposants par zones (simulation)
-        for i, exhibitor in enumerate(self.salon_data.exhibitors):
-            zone_key = list(self.zones.keys())[i % len(self.zones)]
-            self.zones[zone_key]["booths"].append(exhibitor.booth_number)
+    def __init__(self, salon_data: Salon):
+        super().__init__(salon_data=salon_data)
+    
+    async def _arun(self, query: str) -> str:
+        """Version asynchrone : exécutée dans le pool des outils"""
+        return await run_tool(self._run, query)
     
     def _run(self, query: str) -> str:
         """Traite une demande de navigation"""
-        query_lower = query.lower().strip()
+        match = intent_matcher.match(query)
         
-        if any(word in query_lower for word in ["plan", "carte", "layout"]):
+        if match.has("navigation.map"):
             return self._get_salon_map()
-        elif any(word in query_lower for word in ["toilettes", "wc", "restroom"]):
+        elif match.has("navigation.toilettes"):
             return self._get_facilities_info("toilettes")
-        elif any(word in query_lower for word in ["restaurant", "café", "manger", "boire"]):
+        elif match.has("navigation.restauration"):
             return self._get_facilities_info("restauration")
-        elif any(word in query_lower for word in ["accueil", "information", "aide"]):
+        elif match.has("navigation.accueil"):
             return self._get_facilities_info("accueil")
-        elif any(word in query_lower for word in ["sortie", "exit", "parking"]):
+        elif match.has("navigation.sortie"):
             return self._get_facilities_info("sortie")
-        elif "stand" in query_lower or any(char.isdigit() for char in query):
+        elif match.has("navigation.stand") or any(char.isdigit() for char in query):
             return self._find_booth_location(query)
         else:
             return self._general_navigation_help()
     
     def _get_salon_map(self) -> str:
-        """Retourne le plan du salon"""
+        """Retourne le plan du salon (rendu mis en cache par le plan pour chaque version)"""
+        plan = self.salon_data.floor_plan
         result = "🗺️ *Plan du salon*\n\n"
-        
-        layout = """
-        ┌─────────────────────────────────────┐
-        │  🚪 ENTRÉE PRINCIPALE               │
-        │  ↓                                  │
-        │  🏢 ACCUEIL & INFORMATION           │
-        ├─────────────────────────────────────┤
-        │  ZONE A - HALL PRINCIPAL            │
-        │  [A1] [A2] [A3] [A4] [A5]          │
-        ├─────────────────────────────────────┤
-        │  ZONE B - TECHNOLOGIE               │
-        │  [B1] [B2] [B3] [B4] [B5]          │
-        │       🖥️ DÉMONSTRATIONS             │
-        ├─────────────────────────────────────┤
-        │  ZONE C - SERVICES                  │
-        │  [C1] [C2] [C3] [C4] [C5]          │
-        │       🛋️ ESPACE DÉTENTE             │
-        ├─────────────────────────────────────┤
-        │  ZONE D - INNOVATION                │
-        │  [D1] [D2] [D3] [D4] [D5]          │
-        │       🔬 LABORATOIRE                │
-        ├─────────────────────────────────────┤
-        │  ZONE E - RESTAURATION              │
-        │  🍽️ RESTAURANT  ☕ CAFÉ            │
-        │  🚻 TOILETTES                       │
-        └─────────────────────────────────────┘
-        """
-        
-        result += layout + "\n"
+        result += plan.render_ascii() + "\n\n"
         
         # Ajouter les informations par zone
-        for zone_key, zone_info in self.zones.items():
-            if zone_info["booths"]:
-                result += f"📍 *Zone {zone_key} - {zone_info['name']}*\n"
-                result += f"   Stands: {', '.join(zone_info['booths'][:5])}\n"
-                if zone_info["facilities"]:
-                    result += f"   Services: {', '.join(zone_info['facilities'])}\n"
+        for zone, layout in plan.zones.items():
+            booths = plan.zone_booths(zone)
+            if booths:
+                result += f"📍 *Zone {zone} - {layout.name}*\n"
+                result += f"   Stands: {', '.join(booth.booth_number for booth in booths[:5])}\n"
+                if layout.facilities:
+                    result += f"   Services: {', '.join(facility.name for facility in layout.facilities)}\n"
                 result += "\n"
         
         return result
     
     def _find_booth_location(self, query: str) -> str:
         """Trouve l'emplacement d'un stand"""
-        # Extraire le numéro de stand
-        booth_number = None
-        for word in query.split():
-            if any(char.isdigit() for char in word):
-                booth_number = word.upper()
-                break
-        
-        if not booth_number:
-            return "Veuillez préciser le numéro de stand recherché."
-        
-        # Chercher l'exposant
-        exhibitor = None
-        for exp in self.salon_data.exhibitors:
-            if exp.booth_number.upper() == booth_number:
-                exhibitor = exp
-                break
+        # Chercher l'exposant dont le stand est cité
+        exhibitor = self.salon_data.find_exhibitor_by_booth_in_text(query)
         
         if not exhibitor:
+            # Extraire le numéro de stand pour le message d'erreur
+            booth_number = None
+            for word in query.split():
+                if any(char.isdigit() for char in word):
+                    booth_number = word.upper()
+                    break
+            
+            if not booth_number:
+                return "Veuillez préciser le numéro de stand recherché."
             return f"Stand {booth_number} non trouvé."
         
+        booth_number = exhibitor.booth_number
+        
         # Déterminer la zone
         zone_info = self._get_booth_zone(booth_number)
         
@@ -132,158 +169,189 @@ class NavigationTool(BaseTool):
         
         return result
     
-    def _get_booth_zone(self, booth_number: str) -> Dict[str, str]:
-        """Détermine la zone d'un stand"""
-        # Logique simplifiée basée sur le préfixe du stand
-        if booth_number.startswith('A'):
-            return {"zone": "A", "name": "Hall Principal"}
-        elif booth_number.startswith('B'):
-            return {"zone": "B", "name": "Technologie"}
-        elif booth_number.startswith('C'):
-            return {"zone": "C", "name": "Services"}
-        elif booth_number.startswith('D'):
-            return {"zone": "D", "name": "Innovation"}
-        elif booth_number.startswith('E'):
-            return {"zone": "E", "name": "Restauration"}
-        else:
-            return {"zone": "A", "name": "Hall Principal"}
+    def _get_booth_zone(self, booth_number: str) -> Dict[str, Any]:
+        """Détermine la zone d'un stand (précalculée par le plan du salon)"""
+        plan = self.salon_data.floor_plan
+        zone = plan.booth_zone(booth_number) or plan.default_zone
+        return {
+            "zone": zone,
+            "name": plan.zone_name(zone),
+            "facilities": [facility.name for facility in plan.facilities(zone)]
+        }
     
     def _get_directions_to_zone(self, zone: str) -> str:
         """Donne les directions vers une zone"""
-        directions = {
-            "A": "Depuis l'entrée, continuez tout droit",
-            "B": "Depuis l'entrée, tournez à droite après l'accueil",
-            "C": "Depuis l'entrée, prenez à gauche après la zone B",
-            "D": "Au fond du salon, après la zone C",
-            "E": "Tout au fond, suivez les panneaux restauration"
-        }
-        
-        return directions.get(zone, "Consultez le plan à l'accueil")
+        return self.salon_data.floor_plan.directions(zone)
     
+    @cached_output()
     def _get_facilities_info(self, facility_type: str) -> str:
-        """Informations sur les services du salon"""
-        facilities = {
-            "toilettes": {
-                "locations": ["Zone E (Restauration)", "Zone A (Accueil)"],
-                "description": "🚻 Toilettes disponibles dans 2 zones",
-                "access": "Accès libre, suivez la signalétique"
-            },
-            "restauration": {
-                "locations": ["Zone E"],
-                "description": "🍽️ Restaurant et café dans la zone E",
-                "access": "Ouvert de 8h à 18h, cartes acceptées"
-            },
-            "accueil": {
-                "locations": ["Zone A - Entrée principale"],
-                "description": "🏢 Bureau d'accueil et information",
-                "access": "Personnel disponible en permanence"
-            },
-            "sortie": {
-                "locations": ["Entrée principale", "Sortie de secours Zone D"],
-                "description": "🚪 Sorties et parking",
-                "access": "Parking gratuit, 500 places disponibles"
-            }
-        }
-        
-        info = facilities.get(facility_type)
-        if not info:
-            return "Service non reconnu. Services disponibles : toilettes, restauration, accueil, sortie"
-        
-        result = f"{info['description']}\n"
-        result += f"📍 Emplacement(s): {', '.join(info['locations'])}\n"
-        result += f"ℹ️ {info['access']}"
+        """Informations sur les services du salon, d'après le plan"""
+        labels = FACILITY_INTENTS.get(f"navigation.{facility_type}")
+        if not labels:
+            return f"Service non reconnu. Services disponibles : {', '.join(FACILITY_TITLES)}"
+        
+        plan = self.salon_data.floor_plan
+        locations = [
+            f"{facility.name} (Zone {zone} - {layout.name})"
+            for zone, layout in plan.zones.items()
+            for facility in plan.facilities(zone) if facility.name in labels
+        ]
+        if not locations:
+            return f"Aucun service « {facility_type} » indiqué sur le plan du salon. Renseignez-vous à l'accueil."
+        
+        result = f"{FACILITY_TITLES[facility_type]} ({len(locations)} emplacement(s))\n"
+        result += f"📍 Emplacement(s): {', '.join(locations)}\n"
+        
+        venue = self.salon_data.venue
+        if facility_type == "sortie" and venue.parking_info:
+            result += f"🅿️ {venue.parking_info}\n"
+        result += "ℹ️ Suivez la signalétique ou demandez le chemin : \"de [point A] à [point B]\""
         
         return result
     
+    @cached_output()
     def _general_navigation_help(self) -> str:
-        """Aide générale à la navigation"""
-        return """
-🧭 *Aide à la navigation*
-
-*Commandes disponibles:*
-* "plan" ou "carte" → Afficher le plan du salon
-* "stand X" → Localiser un stand spécifique
-* "toilettes" → Trouver les toilettes
-* "restaurant" → Espace restauration
-* "accueil" → Bureau d'information
-* "sortie" → Sorties et parking
-
-*Zones du salon:*
-🏢 Zone A - Hall Principal (Accueil)
-💻 Zone B - Technologie 
-🤝 Zone C - Services
-🔬 Zone D - Innovation
-🍽️ Zone E - Restauration
-
-*Services:*
-* Personnel d'accueil disponible en permanence
-* Wifi gratuit dans tout le salon
-* Parking gratuit (500 places)
-* Restauration ouverte 8h-18h
-        """
+        """Aide générale à la navigation (zones et services du plan)"""
+        plan = self.salon_data.floor_plan
+        result = "🧭 *Aide à la navigation*\n\n"
+        
+        result += "*Commandes disponibles:*\n"
+        result += "* \"plan\" ou \"carte\" → Afficher le plan du salon\n"
+        result += "* \"stand X\" → Localiser un stand spécifique\n"
+        result += "* \"toilettes\" → Trouver les toilettes\n"
+        result += "* \"restaurant\" → Espace restauration\n"
+        result += "* \"accueil\" → Bureau d'information\n"
+        result += "* \"sortie\" → Sorties et parking\n\n"
+        
+        result += "*Zones du salon:*\n"
+        for zone, layout in plan.zones.items():
+            services = [facility.name for facility in plan.facilities(zone)]
+            result += f"📍 Zone {zone} - {layout.name}"
+            result += f" ({', '.join(services)})\n" if services else "\n"
+        
+        venue = self.salon_data.venue
+        practical = [info for info in (venue.parking_info, venue.public_transport) if info]
+        if practical:
+            result += "\n*Infos pratiques:*\n"
+            for info in practical:
+                result += f"* {info}\n"
+        
+        return result
 
 class ProximityTool(BaseTool):
     """Outil pour trouver les stands ou services à proximité"""
     
     name = "proximity"
-    description = "Trouve les exposants ou services proches d'un point donné"
+    description = ("Trouve les exposants ou services proches d'un point donné "
+                   "(ex: 'les 3 cafés les plus proches du stand C15')")
+    salon_data: Salon
+    
+    def __init__(self, salon_data: Salon):
+        super().__init__(salon_data=salon_data)
     
-    def _init_(self, salon_data: Salon):
-        super()._init_()
-        self.salon_data = salon_data
+    async def _arun(self, location: str) -> str:
+        """Version asynchrone : exécutée dans le pool des outils"""
+        return await run_tool(self._run, location)
     
     def _run(self, location: str) -> str:
         """Trouve ce qui est proche d'un emplacement"""
         location_lower = location.lower().strip()
         
+        # Stand situé sur le plan : plus proches voisins par coordonnées
+        exhibitor = self.salon_data.find_exhibitor_by_booth_in_text(location_lower)
+        if exhibitor and exhibitor.location_x is not None and exhibitor.location_y is not None:
+            return self._get_nearest_info(exhibitor.booth_number,
+                                          self._parse_wanted(location_lower),
+                                          self._parse_count(location_lower))
+        
         # Déterminer la zone de référence
         reference_zone = self._parse_location(location_lower)
         
         if not reference_zone:
-            return f"Emplacement '{location}' non reconnu. Utilisez un numéro de stand ou une zone (A, B, C, D, E)."
+            zones = ", ".join(self.salon_data.floor_plan.zones)
+            return f"Emplacement '{location}' non reconnu. Utilisez un numéro de stand ou une zone ({zones})."
         
         return self._get_nearby_info(reference_zone)
     
     def _parse_location(self, location: str) -> Optional[str]:
         """Parse l'emplacement pour déterminer la zone"""
         # Si c'est directement une zone
-        if location.upper() in ['A', 'B', 'C', 'D', 'E']:
+        if location.upper() in self.salon_data.floor_plan.zones:
             return location.upper()
         
         # Si c'est un stand
-        for exhibitor in self.salon_data.exhibitors:
-            if exhibitor.booth_number.lower() in location:
-                return exhibitor.booth_number[0].upper()
+        exhibitor = self.salon_data.find_exhibitor_by_booth_in_text(location)
+        if exhibitor:
+            return self.salon_data.floor_plan.booth_zone(exhibitor.booth_number)
         
         # Recherche par mots-clés
-        zone_keywords = {
-            'A': ['accueil', 'entrée', 'principal'],
-            'B': ['technologie', 'tech', 'démonstration'],
-            'C': ['service', 'détente'],
-            'D': ['innovation', 'laboratoire', 'labo'],
-            'E': ['restaurant', 'café', 'manger', 'toilettes']
-        }
-        
-        for zone, keywords in zone_keywords.items():
-            if any(keyword in location for keyword in keywords):
-                return zone
+        zones = [zone for zone in intent_matcher.match(location).zones if zone in self.salon_data.floor_plan.zones]
+        if zones:
+            return min(zones)
         
         return None
     
+    def _parse_wanted(self, location: str) -> str:
+        """Services recherchés ("café", "toilettes"...), vide pour les stands"""
+        match = intent_matcher.match(location)
+        labels = [label for intent, names in FACILITY_INTENTS.items() if match.has(intent) for label in names]
+        return ",".join(labels)
+    
+    def _parse_count(self, location: str) -> int:
+        """Nombre de résultats demandé (nombre isolé dans la requête)"""
+        found = _COUNT_PATTERN.search(location)
+        count = int(found.group(1)) if found else DEFAULT_NEARBY_COUNT
+        return max(1, min(count, MAX_NEARBY_COUNT))
+    
+    @cached_output(valid_until=_congestion_window)
+    def _get_nearest_info(self, booth_number: str, wanted: str = "", count: int = DEFAULT_NEARBY_COUNT) -> str:
+        """Stands ou services les plus proches d'un stand, par distance sur le plan"""
+        index = self.salon_data.spatial_index
+        origin = index.get(booth_key(booth_number))
+        if origin is None:
+            return f"Stand {booth_number} non situé sur le plan."
+        
+        if wanted:
+            labels = set(wanted.split(","))
+            title = ", ".join(sorted(labels))
+            matches = index.nearest(origin.x, origin.y, count,
+                                    lambda e: e.kind == "facility" and e.label in labels)
+        else:
+            title = "Stands"
+            matches = index.nearest(origin.x, origin.y, count,
+                                    lambda e: e.kind == "booth" and e.key != origin.key)
+        
+        graph = self.salon_data.venue_graph
+        lines = []
+        for match in matches:
+            line = f"• {match.entry.label} - {round(match.distance)}m"
+            route = graph.shortest_path(origin.key, match.entry.key)
+            if route is not None:
+                line += f" ({round(route.distance)}m à pied, ~{route.minutes} min)"
+            lines.append(line)
+        
+        # Services sans coordonnées sur le plan : classés par distance à pied
+        if wanted and len(lines) < count:
+            routes = [graph.shortest_path(origin.key, key)
+                      for label in labels for key in graph.facility_keys(label) if key not in index]
+            routes = sorted((r for r in routes if r is not None), key=lambda r: r.cost)
+            for route in routes[:count - len(lines)]:
+                lines.append(f"• {route.nodes[-1].label} (Zone {route.nodes[-1].zone}) - "
+                             f"{round(route.distance)}m à pied, ~{route.minutes} min")
+        
+        if not lines:
+            return f"Aucun résultat à proximité du {origin.label}."
+        
+        return f"📍 *{title} les plus proches du {origin.label}*\n\n" + "\n".join(lines) + "\n"
+    
+    @cached_output()
     def _get_nearby_info(self, zone: str) -> str:
         """Retourne les informations de proximité pour une zone"""
-        zone_names = {
-            'A': 'Hall Principal',
-            'B': 'Technologie', 
-            'C': 'Services',
-            'D': 'Innovation',
-            'E': 'Restauration'
-        }
-        
-        result = f"📍 *À proximité de la Zone {zone} - {zone_names[zone]}*\n\n"
+        plan = self.salon_data.floor_plan
+        result = f"📍 *À proximité de la Zone {zone} - {plan.zone_name(zone)}*\n\n"
         
         # Exposants de cette zone
-        zone_exhibitors = [e for e in self.salon_data.exhibitors if e.booth_number.startswith(zone)]
+        zone_exhibitors = plan.zone_booths(zone)
         
         if zone_exhibitors:
             result += f"🏢 *Exposants dans cette zone* ({len(zone_exhibitors)})\n"
@@ -307,43 +375,33 @@ class ProximityTool(BaseTool):
         if adjacent_zones:
             result += f"🚶 *Zones proches*\n"
             for adj_zone, distance in adjacent_zones:
-                result += f"• Zone {adj_zone} - {zone_names[adj_zone]} ({distance})\n"
+                result += f"• Zone {adj_zone} - {plan.zone_name(adj_zone)} ({distance})\n"
         
         return result
     
     def _get_zone_services(self, zone: str) -> List[str]:
-        """Retourne les services disponibles dans une zone"""
-        services_map = {
-            'A': ['🏢 Accueil et information', '🚻 Toilettes', '📱 Point wifi'],
-            'B': ['🖥️ Démonstrations technologiques', '⚡ Prises électriques'],
-            'C': ['🛋️ Espace détente', '📞 Cabines téléphoniques'],
-            'D': ['🔬 Laboratoire de test', '🔋 Station de recharge'],
-            'E': ['🍽️ Restaurant', '☕ Café', '🚻 Toilettes', '🧴 Distributeurs']
-        }
-        
-        return services_map.get(zone, [])
+        """Retourne les services d'une zone indiqués sur le plan"""
+        return [f"{FACILITY_ICONS.get(facility.name, '📍')} {facility.name}"
+                for facility in self.salon_data.floor_plan.facilities(zone)]
     
     def _get_adjacent_zones(self, zone: str) -> List[Tuple[str, str]]:
         """Retourne les zones adjacentes avec distance estimée"""
-        adjacency_map = {
-            'A': [('B', '50m'), ('C', '80m')],
-            'B': [('A', '50m'), ('C', '30m'), ('D', '60m')],
-            'C': [('A', '80m'), ('B', '30m'), ('D', '40m'), ('E', '70m')],
-            'D': [('B', '60m'), ('C', '40m'), ('E', '50m')],
-            'E': [('C', '70m'), ('D', '50m')]
-        }
-        
-        return adjacency_map.get(zone, [])
+        neighbors = self.salon_data.venue_graph.zone_neighbors(zone)
+        return [(adjacent, f"{round(distance)}m") for adjacent, distance in neighbors]
 
 class PathFindingTool(BaseTool):
     """Outil pour calculer les itinéraires optimaux"""
     
     name = "pathfinding"
-    description = "Calcule l'itinéraire optimal entre deux points du salon"
+    description = "Calcule l'itinéraire optimal entre deux points du salon, en contournant les zones très fréquentées"
+    salon_data: Salon
     
-    def _init_(self, salon_data: Salon):
-        super()._init_()
-        self.salon_data = salon_data
+    def __init__(self, salon_data: Salon):
+        super().__init__(salon_data=salon_data)
+    
+    async def _arun(self, route_query: str) -> str:
+        """Version asynchrone : exécutée dans le pool des outils"""
+        return await run_tool(self._run, route_query)
     
     def _run(self, route_query: str) -> str:
         """Calcule un itinéraire entre deux points"""
@@ -361,82 +419,164 @@ class PathFindingTool(BaseTool):
         else:
             return "Format: 'de [point A] à [point B]' ou '[point A] vers [point B]'"
         
-        # Déterminer les zones
-        start_zone = self._location_to_zone(start)
-        end_zone = self._location_to_zone(end)
-        
-        if not start_zone or not end_zone:
-            return "Un des points n'a pas pu être localisé. Vérifiez les noms."
-        
-        return self._calculate_route(start, start_zone, end, end_zone)
+        return self._calculate_route(start, end)
     
-    def _location_to_zone(self, location: str) -> Optional[str]:
-        """Convertit un emplacement en zone"""
-        # Direct zone reference
-        if location.upper() in ['A', 'B', 'C', 'D', 'E']:
-            return location.upper()
-        
-        # Booth number
-        for exhibitor in self.salon_data.exhibitors:
-            if (location in exhibitor.name.lower() or 
-                location in exhibitor.booth_number.lower()):
-                return exhibitor.booth_number[0].upper()
-        
-        # Keywords
-        zone_keywords = {
-            'A': ['accueil', 'entrée', 'principal'],
-            'B': ['technologie', 'tech'],
-            'C': ['service'],
-            'D': ['innovation', 'labo'],
-            'E': ['restaurant', 'café', 'toilettes']
-        }
-        
-        for zone, keywords in zone_keywords.items():
-            if any(keyword in location for keyword in keywords):
-                return zone
-        
-        return None
+    def _location_to_nodes(self, location: str) -> List[str]:
+        """Convertit un emplacement en nœuds du plan (stand, service ou zone)"""
+        return _location_nodes(self.salon_data, location)
     
-    def _calculate_route(self, start: str, start_zone: str, end: str, end_zone: str) -> str:
+    def _best_route(self, starts: List[str], ends: List[str]) -> Optional[Route]:
+        """Plus court itinéraire entre l'un des départs et l'une des arrivées"""
+        graph = self.salon_data.venue_graph
+        routes = [graph.nearest(start, ends) for start in starts]
+        routes = [route for route in routes if route is not None]
+        return min(routes, key=lambda route: route.cost) if routes else None
+    
+    @cached_output(valid_until=_congestion_window)
+    def _calculate_route(self, start: str, end: str) -> str:
         """Calcule l'itinéraire optimal"""
-        if start_zone == end_zone:
-            return f"📍 *Itinéraire court* : {start} → {end}\n\nVous êtes dans la même zone ! Distance estimée : 20-30m"
-        
-        # Routes prédéfinies entre zones
-        routes = {
-            ('A', 'B'): ['Zone A', 'Zone B'],
-            ('A', 'C'): ['Zone A', 'Zone B', 'Zone C'],
-            ('A', 'D'): ['Zone A', 'Zone B', 'Zone C', 'Zone D'],
-            ('A', 'E'): ['Zone A', 'Zone B', 'Zone C', 'Zone E'],
-            ('B', 'C'): ['Zone B', 'Zone C'],
-            ('B', 'D'): ['Zone B', 'Zone C', 'Zone D'],
-            ('B', 'E'): ['Zone B', 'Zone C', 'Zone E'],
-            ('C', 'D'): ['Zone C', 'Zone D'],
-            ('C', 'E'): ['Zone C', 'Zone E'],
-            ('D', 'E'): ['Zone D', 'Zone E']
-        }
+        starts = self._location_to_nodes(start)
+        ends = self._location_to_nodes(end)
         
-        # Chemin direct ou inverse
-        path = routes.get((start_zone, end_zone)) or list(reversed(routes.get((end_zone, start_zone), [])))
+        if not starts or not ends:
+            return "Un des points n'a pas pu être localisé. Vérifiez les noms."
         
-        if not path:
+        route = self._best_route(starts, ends)
+        if route is None:
             return "Itinéraire non calculable"
         
+        if len(route.nodes) == 1:
+            return f"📍 *{route.nodes[0].label}* : vous êtes déjà sur place !"
+        
         result = f"🗺️ *Itinéraire : {start} → {end}*\n\n"
-        result += f"📍 Départ : {start} (Zone {start_zone})\n"
-        result += f"🎯 Arrivée : {end} (Zone {end_zone})\n\n"
+        result += f"📍 Départ : {route.nodes[0].label}\n"
+        result += f"🎯 Arrivée : {route.nodes[-1].label}\n\n"
         
         result += "👣 *Étapes :*\n"
-        for i, step in enumerate(path):
-            if i == len(path) - 1:
-                result += f"{i+1}. Arrivée à {step}\n"
+        steps = route.nodes[1:]
+        for i, node in enumerate(steps):
+            if i == len(steps) - 1:
+                result += f"{i+1}. Arrivée à {node.label}\n"
+            elif node.kind == "zone":
+                result += f"{i+1}. Traverser {node.label}\n"
+            else:
+                result += f"{i+1}. Passer devant {node.label}\n"
+        
+        result += f"\n⏱️ Temps estimé : {route.minutes} minutes\n"
+        result += f"📏 Distance : ~{round(route.distance)}m"
+        
+        # Affluence relevée par les caméras (déjà intégrée au choix de l'itinéraire)
+        crowded = sorted(z for z, p in self.salon_data.venue_graph.congestion.items() if p > 1.0)
+        if crowded:
+            crossed = [z for z in crowded if any(node.zone == z for node in route.nodes)]
+            avoided = [z for z in crowded if z not in crossed]
+            if avoided:
+                result += f"\n🚦 Zones très fréquentées évitées : {', '.join('Zone ' + z for z in avoided)}"
+            if crossed:
+                result += f"\n⚠️ Forte affluence sur le trajet : {', '.join('Zone ' + z for z in crossed)}"
+        
+        return result
+
+class ItineraryTool(BaseTool):
+    """Outil pour planifier un parcours de visite en plusieurs étapes"""
+    
+    name = "itinerary"
+    description = ("Planifie l'ordre de visite de plusieurs stands et événements en tenant compte "
+                   "des horaires (ex: 'A12, EcoTech, FinTech et l'atelier de 14h')")
+    salon_data: Salon
+    
+    def __init__(self, salon_data: Salon):
+        super().__init__(salon_data=salon_data)
+    
+    async def _arun(self, request: str) -> str:
+        """Version asynchrone : exécutée dans le pool des outils"""
+        return await run_tool(self._run, request)
+    
+    def _run(self, request: str) -> str:
+        """Planifie un parcours à partir d'une liste d'étapes"""
+        now = datetime.now()
+        
+        origin = DEFAULT_ORIGIN
+        origin_match = _ORIGIN_PATTERN.match(request)
+        if origin_match:
+            nodes = _location_nodes(self.salon_data, origin_match.group(1).strip().lower())
+            if nodes:
+                origin = nodes[0]
+            request = request[origin_match.end():]
+        
+        stops, unknown = [], []
+        for part in _STOP_SEPARATOR.split(request):
+            part = part.strip()
+            if not part:
+                continue
+            stop = self._resolve_stop(part, now)
+            if stop is None:
+                unknown.append(part)
+            else:
+                stops.append(stop)
+        
+        if not stops:
+            return "Aucune étape reconnue. Indiquez des stands, exposants ou événements séparés par des virgules."
+        
+        tour = TourPlanner(self.salon_data.venue_graph).plan(origin, stops, now)
+        return self._format_tour(tour, unknown)
+    
+    def _resolve_stop(self, part: str, now: datetime) -> Optional[TourStop]:
+        """Convertit un élément de la demande en étape (événement ou stand)"""
+        # Événement désigné par son heure ("l'atelier de 14h")
+        time_match = _TIME_PATTERN.search(part)
+        if time_match:
+            hour, minute = int(time_match.group(1)), int(time_match.group(2) or 0)
+            for event in self.salon_data.time_index.iter_from(now):
+                if (event.start_time.hour, event.start_time.minute) == (hour, minute):
+                    return self._event_stop(event)
+        
+        # Stand ou exposant
+        exhibitor = (self.salon_data.find_exhibitor_by_booth_in_text(part) or
+                     self.salon_data.get_exhibitor_by_name(part))
+        if exhibitor:
+            return self._exhibitor_stop(exhibitor)
+        
+        # Événement désigné par son titre
+        events = self.salon_data.search_events_scored(part, limit=1)
+        if events:
+            return self._event_stop(events[0][0])
+        
+        # Nom mal orthographié
+        matches = self.salon_data.suggest(part, limit=1, kinds=["exhibitor", "booth"])
+        if matches and matches[0].score >= FUZZY_RESOLVE_SCORE:
+            return self._exhibitor_stop(matches[0].target)
+        
+        return None
+    
+    def _exhibitor_stop(self, exhibitor: Exhibitor) -> TourStop:
+        return TourStop(booth_key(exhibitor.booth_number), f"Stand {exhibitor.booth_number} ({exhibitor.name})")
+    
+    def _event_stop(self, event: Event) -> TourStop:
+        return TourStop(room_key(event.location), f"{event.title} ({event.location})",
+                        start_time=event.start_time, end_time=event.end_time)
+    
+    def _format_tour(self, tour, unknown: List[str]) -> str:
+        """Met en forme le parcours planifié"""
+        result = f"🗓️ *Votre parcours* ({len(tour.stops)} étapes, ~{round(tour.distance)}m à pied)\n\n"
+        
+        for i, scheduled in enumerate(tour.stops, start=1):
+            walk = f" • 🚶 {max(1, round(scheduled.walk_minutes))} min" if scheduled.walk_minutes else ""
+            if scheduled.stop.is_event:
+                result += (f"{i}. {scheduled.stop.start_time.strftime('%H:%M')}-"
+                           f"{scheduled.departure.strftime('%H:%M')} 🎤 {scheduled.stop.label}{walk}\n")
             else:
-                result += f"{i+1}. Traverser {step}\n"
+                result += f"{i}. {scheduled.arrival.strftime('%H:%M')} 🏢 {scheduled.stop.label}{walk}\n"
         
-        distance = len(path) * 50  # 50m par zone
-        time = len(path) * 2  # 2 min par zone
+        if tour.stops:
+            result += f"\n🏁 Fin prévue vers {tour.stops[-1].departure.strftime('%H:%M')}\n"
         
-        result += f"\n⏱️ Temps estimé : {time} minutes\n"
-        result += f"📏 Distance : ~{distance}m"
+        if tour.unscheduled:
+            result += "\n⚠️ *Non planifiés :*\n"
+            for stop, reason in tour.unscheduled:
+                result += f"• {stop.label} ({reason})\n"
         
-        return result
\ No newline at end of file
+        if unknown:
+            result += f"\n❓ Non reconnus : {', '.join(unknown)}\n"
+        
+        return result
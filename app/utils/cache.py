@@ -0,0 +1,98 @@
+import functools
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from app.config import settings
+from app.utils.helpers import normalize_text
+
+class ToolOutputCache:
+    """Cache LRU des sorties d'outils, avec expiration par échéance"""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[Any, Optional[datetime]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, now: Optional[datetime] = None) -> Tuple[bool, Any]:
+        """Retourne (trouvé, valeur) ; les entrées échues sont ignorées"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or (now or datetime.now()) < expires_at:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def set(self, key: Hashable, value: Any, expires_at: Optional[datetime] = None):
+        """Enregistre une valeur (évince la moins récemment utilisée si plein)"""
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Vide le cache et remet les compteurs à zéro"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Compteurs de succès et d'échecs"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0
+        }
+
+tool_cache = ToolOutputCache(settings.TOOL_CACHE_MAX_ENTRIES)
+
+def _normalize_argument(value: Any) -> Hashable:
+    """Normalise une entrée d'outil pour la clé de cache"""
+    if isinstance(value, str):
+        return " ".join(normalize_text(value).split())
+    return value
+
+def cached_output(valid_until: Optional[Callable[[Any, datetime], Optional[datetime]]] = None):
+    """Met en cache le rendu d'une méthode d'outil.
+
+    La clé combine l'outil, la méthode, l'entrée normalisée et la version du
+    salon (incrémentée par Salon.update_stats). Pour les rendus qui dépendent
+    de l'heure, valid_until(outil, maintenant) donne la fin de la tranche de
+    temps pendant laquelle le rendu reste exact.
+    """
+    def decorator(method: Callable) -> Callable:
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            salon = self.salon_data
+            key = (
+                self.name, method.__name__, salon.id, salon.version,
+                tuple(_normalize_argument(a) for a in args),
+                tuple(sorted((k, _normalize_argument(v)) for k, v in kwargs.items()))
+            )
+            now = datetime.now()
+            found, value = tool_cache.get(key, now)
+            if found:
+                return value
+
+            expires_at = valid_until(self, now) if valid_until else None
+            value = method(self, *args, **kwargs)
+            tool_cache.set(key, value, expires_at)
+            return value
+        return wrapper
+    return decorator
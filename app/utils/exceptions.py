@@ -16,4 +16,11 @@ class AgentError(AIAssistantError):
 
 class DatabaseError(AIAssistantError):
     """Erreur de base de données"""
-    pass
\ No newline at end of file
+    pass
+class SnapshotError(AIAssistantError):
+    """Erreur de lecture d'un instantané du catalogue"""
+    pass
+
+class SalonNotFoundError(AIAssistantError):
+    """Salon inconnu ou introuvable"""
+    pass
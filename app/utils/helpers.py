@@ -1,5 +1,6 @@
 import json
 import hashlib
+import unicodedata
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional
 from pathlib import Path
@@ -25,6 +26,11 @@ def save_json_file(data: Dict[str, Any], file_path: str) -> bool:
         logger.error(f"Error saving JSON file {file_path}: {e}")
         return False
 
+def normalize_text(text: str) -> str:
+    """Normalise un texte : minuscules et suppression des accents"""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
 def generate_hash(text: str) -> str:
     """Génère un hash MD5 d'un texte"""
     return hashlib.md5(text.encode()).hexdigest()
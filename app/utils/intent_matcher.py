@@ -0,0 +1,109 @@
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set, Tuple
+
+from app.utils.helpers import normalize_text
+
+# Table déclarative des mots-clés : intention -> mots-clés (préfixes de mots)
+INTENT_KEYWORDS: Dict[str, List[str]] = {
+    # Demandes de navigation
+    "navigation.map": ["plan", "carte", "layout"],
+    "navigation.toilettes": ["toilettes", "wc", "restroom"],
+    "navigation.restauration": ["restaurant", "café", "manger", "boire"],
+    "navigation.accueil": ["accueil", "information", "aide"],
+    "navigation.sortie": ["sortie", "exit", "parking"],
+    "navigation.stand": ["stand"],
+
+    # Programme des événements
+    "schedule.today": ["today", "aujourd'hui", "maintenant"],
+    "schedule.all": ["all", "tous", "complet"],
+    "schedule.tomorrow": ["demain"],
+
+    # Types de requêtes (statistiques de l'agent)
+    "query.exposants": ["exposant", "stand", "entreprise", "société", "booth"],
+    "query.événements": ["événement", "programme", "conférence", "atelier", "horaire"],
+    "query.navigation": ["où", "direction", "aller", "trouver", "chemin", "plan"],
+    "query.services": ["service", "aide", "assistance", "info", "renseignement"],
+
+    # Zones du salon
+    "zone.A": ["accueil", "entrée", "principal"],
+    "zone.B": ["technologie", "tech", "démonstration"],
+    "zone.C": ["service", "détente"],
+    "zone.D": ["innovation", "laboratoire", "labo"],
+    "zone.E": ["restaurant", "café", "manger", "toilettes"],
+}
+
+class IntentMatch:
+    """Résultat d'une analyse : intentions et mots-clés trouvés dans la requête"""
+
+    __slots__ = ("intents", "exact", "keywords")
+
+    def __init__(self, intents: List[str], exact: Set[str], keywords: List[str]):
+        self.intents = intents
+        self.exact = exact
+        self.keywords = keywords
+
+    def has(self, *intents: str) -> bool:
+        """Vrai si l'une des intentions a été détectée"""
+        return any(intent in self.intents for intent in intents)
+
+    def is_exactly(self, intent: str) -> bool:
+        """Vrai si la requête se limite à un mot-clé de l'intention"""
+        return intent in self.exact
+
+    def with_prefix(self, prefix: str) -> List[str]:
+        """Intentions d'une famille ("zone.", "query."...) dans l'ordre d'apparition"""
+        return [intent[len(prefix):] for intent in self.intents if intent.startswith(prefix)]
+
+    @property
+    def zones(self) -> List[str]:
+        return self.with_prefix("zone.")
+
+class IntentMatcher:
+    """Reconnaissance multi-motifs en une seule passe (alternance regex compilée)"""
+
+    def __init__(self, table: Dict[str, Iterable[str]]):
+        self._intents_by_keyword: Dict[str, List[str]] = defaultdict(list)
+        for intent, keywords in table.items():
+            for keyword in keywords:
+                for variant in self._variants(keyword):
+                    if intent not in self._intents_by_keyword[variant]:
+                        self._intents_by_keyword[variant].append(intent)
+
+        # Les mots-clés les plus longs d'abord pour que l'alternance les préfère
+        alternatives = "|".join(re.escape(k) for k in sorted(self._intents_by_keyword, key=len, reverse=True))
+        self._pattern = re.compile(r"(?<!\w)(" + alternatives + ")")
+        # Mots entiers seulement (pluriel en -s/-x admis) : "planning" ne contient pas "plan"
+        self._word_pattern = re.compile(r"(?<!\w)(" + alternatives + r")(?:s|x)?(?!\w)")
+
+    @staticmethod
+    def _variants(keyword: str) -> Tuple[str, ...]:
+        """Mot-clé en minuscules, plus sa forme sans accents si elle reste non ambiguë"""
+        keyword = keyword.lower()
+        folded = normalize_text(keyword)
+        # "où" sans accent deviendrait "ou" : on ne plie que les mots assez longs
+        if folded != keyword and len(folded) > 3:
+            return keyword, folded
+        return (keyword,)
+
+    def match(self, text: str, whole_words: bool = False) -> IntentMatch:
+        """Analyse un texte et retourne toutes les intentions reconnues (mots-clés en préfixe ou mots entiers)"""
+        lowered = text.lower().replace("’", "'").strip()
+        intents: List[str] = []
+        exact: Set[str] = set()
+        keywords: List[str] = []
+
+        pattern = self._word_pattern if whole_words else self._pattern
+        for found in pattern.finditer(lowered):
+            keyword = found.group(1)
+            keywords.append(keyword)
+            for intent in self._intents_by_keyword[keyword]:
+                if intent not in intents:
+                    intents.append(intent)
+                if found.start() == 0 and found.end() == len(lowered):
+                    exact.add(intent)
+
+        return IntentMatch(intents, exact, keywords)
+
+# Instance partagée, construite une seule fois au démarrage
+intent_matcher = IntentMatcher(INTENT_KEYWORDS)
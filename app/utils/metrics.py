@@ -0,0 +1,313 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from app.config import settings
+
+# Histogrammes à la manière de HdrHistogram : valeurs entières en microsecondes,
+# 16 sous-intervalles linéaires par puissance de deux (erreur relative ≤ 3 %)
+SUB_BUCKET_BITS = 4
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+_LINEAR_LIMIT = SUB_BUCKETS * 2
+MAX_SHIFT = 32  # ≈ 19 h en microsecondes
+BUCKET_COUNT = _LINEAR_LIMIT + MAX_SHIFT * SUB_BUCKETS
+
+# Quantiles exportés (1.0 : maximum de la fenêtre)
+EXPORTED_QUANTILES = (0.5, 0.9, 0.99, 1.0)
+
+def bucket_index(micros: int) -> int:
+    """Indice du sous-intervalle d'une valeur (en microsecondes)"""
+    if micros < _LINEAR_LIMIT:
+        return max(micros, 0)
+    shift = micros.bit_length() - SUB_BUCKET_BITS - 1
+    if shift > MAX_SHIFT:
+        return BUCKET_COUNT - 1
+    return _LINEAR_LIMIT + (shift - 1) * SUB_BUCKETS + (micros >> shift) - SUB_BUCKETS
+
+def bucket_value(index: int) -> float:
+    """Valeur représentative (milieu) d'un sous-intervalle, en microsecondes"""
+    if index < _LINEAR_LIMIT:
+        return float(index)
+    shift = (index - _LINEAR_LIMIT) // SUB_BUCKETS + 1
+    mantissa = (index - _LINEAR_LIMIT) % SUB_BUCKETS + SUB_BUCKETS
+    return ((mantissa << shift) + ((mantissa + 1) << shift) - 1) / 2
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value: float) -> str:
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class _Metric:
+    """Famille de séries (une par combinaison de valeurs d'étiquettes)"""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not self.label_names:
+            self._children[()] = self._new_child()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """Série correspondant aux valeurs d'étiquettes (créée au premier usage)"""
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.label_names):
+                raise ValueError(f"{self.name}: {len(self.label_names)} label value(s) expected")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _series(self) -> List[Tuple[Tuple[str, ...], object]]:
+        with self._lock:
+            return sorted(self._children.items())
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in self._series():
+            lines.extend(self._render_child(values, child))
+        return lines
+
+    def _render_child(self, values: Tuple[str, ...], child) -> List[str]:
+        return [f"{self.name}{_format_labels(self.label_names, values)} {_format_value(child.value)}"]
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+class Counter(_Metric):
+    """Compteur monotone"""
+
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+class _GaugeChild:
+    __slots__ = ("_value", "_function")
+
+    def __init__(self):
+        self._value = 0.0
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float):
+        self._value = float(value)
+
+    def set_function(self, function: Callable[[], float]):
+        """Valeur lue au moment de l'export (taille de file, sessions ouvertes...)"""
+        self._function = function
+
+    @property
+    def value(self) -> float:
+        if self._function is not None:
+            try:
+                return float(self._function())
+            except Exception:
+                return math.nan
+        return self._value
+
+class Gauge(_Metric):
+    """Valeur instantanée, fixée ou lue à l'export"""
+
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+    def set_function(self, function: Callable[[], float]):
+        self.labels().set_function(function)
+
+class _HistogramChild:
+    """Comptes par sous-intervalle sur une fenêtre glissante de tranches, plus cumuls"""
+
+    __slots__ = ("_slice_seconds", "_slice_count", "_slices", "_slice_ids", "_lock", "count", "sum")
+
+    def __init__(self, window_seconds: float, slices: int):
+        self._slice_seconds = window_seconds / slices
+        self._slice_count = slices
+        self._slices: List[List[int]] = [[0] * BUCKET_COUNT for _ in range(slices)]
+        self._slice_ids = [-1] * slices
+        self._lock = threading.Lock()
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        """Enregistre une durée (de l'ordre de la microseconde, sans allocation hors changement de tranche)"""
+        index = bucket_index(int(seconds * 1_000_000))
+        slice_id = int(time.monotonic() / self._slice_seconds)
+        position = slice_id % self._slice_count
+        with self._lock:
+            if self._slice_ids[position] != slice_id:
+                self._slices[position] = [0] * BUCKET_COUNT
+                self._slice_ids[position] = slice_id
+            self._slices[position][index] += 1
+            self.count += 1
+            self.sum += seconds
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """Mesure la durée du bloc"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    def window(self) -> List[int]:
+        """Comptes cumulés des tranches encore dans la fenêtre"""
+        current = int(time.monotonic() / self._slice_seconds)
+        oldest = current - len(self._slices) + 1
+        totals = [0] * BUCKET_COUNT
+        with self._lock:
+            live = [counts for counts, slice_id in zip(self._slices, self._slice_ids) if slice_id >= oldest]
+            for counts in live:
+                for i, n in enumerate(counts):
+                    if n:
+                        totals[i] += n
+        return totals
+
+    def quantiles(self, quantiles: Sequence[float] = EXPORTED_QUANTILES) -> Dict[float, float]:
+        """Quantiles de la fenêtre, en secondes (NaN si aucune mesure)"""
+        totals = self.window()
+        seen = sum(totals)
+        if not seen:
+            return {q: math.nan for q in quantiles}
+        result: Dict[float, float] = {}
+        targets = sorted(quantiles)
+        running = 0
+        t = 0
+        for index, n in enumerate(totals):
+            if not n:
+                continue
+            running += n
+            while t < len(targets) and running >= max(1, math.ceil(targets[t] * seen)):
+                result[targets[t]] = bucket_value(index) / 1_000_000
+                t += 1
+            if t == len(targets):
+                break
+        return result
+
+class Histogram(_Metric):
+    """Latences : quantiles sur fenêtre glissante (exportés en summary Prometheus), somme et nombre cumulés"""
+
+    kind = "summary"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (),
+                 window_seconds: Optional[float] = None, slices: Optional[int] = None):
+        self.window_seconds = window_seconds or settings.METRICS_WINDOW_SECONDS
+        self.slices = slices or settings.METRICS_WINDOW_SLICES
+        super().__init__(name, documentation, labels)
+
+    def _new_child(self):
+        return _HistogramChild(self.window_seconds, self.slices)
+
+    def observe(self, seconds: float):
+        self.labels().observe(seconds)
+
+    def time(self):
+        return self.labels().time()
+
+    def _render_child(self, values: Tuple[str, ...], child) -> List[str]:
+        lines = []
+        for quantile, value in child.quantiles().items():
+            labels = _format_labels(self.label_names, values, f'quantile="{quantile:g}"')
+            lines.append(f"{self.name}{labels} {_format_value(value)}")
+        labels = _format_labels(self.label_names, values)
+        lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+        lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+class MetricsRegistry:
+    """Ensemble des métriques du processus, exporté au format texte Prometheus"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Histogram:
+        return self._register(Histogram(name, documentation, labels))
+
+    def render(self) -> str:
+        """Export au format texte Prometheus (version 0.0.4)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+metrics = MetricsRegistry()
+
+# Chaîne de traitement d'une interaction
+INTERACTION_SECONDS = metrics.histogram(
+    "mc_interaction_seconds", "Durée de bout en bout d'une interaction", ["path"])
+FIRST_CHUNK_SECONDS = metrics.histogram(
+    "mc_first_chunk_seconds", "Délai avant la première phrase envoyée au client")
+INTERACTIONS_TOTAL = metrics.counter(
+    "mc_interactions_total", "Interactions traitées", ["path"])
+QUERIES_TOTAL = metrics.counter(
+    "mc_queries_total", "Requêtes par catégorie", ["category"])
+LLM_SECONDS = metrics.histogram(
+    "mc_llm_seconds", "Durée d'un appel au modèle de langage")
+LLM_ERRORS_TOTAL = metrics.counter(
+    "mc_llm_errors_total", "Appels au modèle de langage en erreur")
+TOOL_SECONDS = metrics.histogram(
+    "mc_tool_seconds", "Durée d'exécution d'un outil", ["tool"])
+TOOL_ERRORS_TOTAL = metrics.counter(
+    "mc_tool_errors_total", "Exécutions d'outil en erreur", ["tool"])
+
+# Voix et vision
+STT_SECONDS = metrics.histogram(
+    "mc_stt_seconds", "Durée de la reconnaissance vocale")
+TTS_SECONDS = metrics.histogram(
+    "mc_tts_seconds", "Durée de la synthèse vocale d'une phrase")
+TTS_FIRST_WORD_SECONDS = metrics.histogram(
+    "mc_tts_first_word_seconds", "Délai avant le premier mot prononcé")
+VISION_FRAME_SECONDS = metrics.histogram(
+    "mc_vision_frame_seconds", "Durée de traitement d'une image de la caméra", ["operation"])
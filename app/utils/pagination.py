@@ -0,0 +1,100 @@
+import base64
+import re
+from itertools import islice
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Réponse des outils à un jeton de pagination illisible (mal recopié ou d'une autre liste)
+INVALID_CURSOR_MESSAGE = ("⚠️ Curseur invalide : ce jeton de pagination n'est pas reconnu. "
+                          "Relancez la demande sans 'cursor=' pour repartir de la première page.")
+
+_PAGING_PATTERN = re.compile(
+    r"\b(?:(page|limit)\s*[=:]?\s*(\d+)|(cursor)\s*[=:]\s*([A-Za-z0-9_\-]+))", re.IGNORECASE
+)
+
+class PageRequest(NamedTuple):
+    """Demande de page extraite d'une entrée d'outil ou d'une requête API"""
+    query: str
+    offset: int
+    limit: int
+
+class Page(NamedTuple):
+    """Page de résultats et jeton de continuation"""
+    items: List
+    offset: int
+    next_cursor: Optional[str]
+
+def encode_cursor(offset: int) -> str:
+    """Jeton de continuation opaque pour une position dans la liste"""
+    return base64.urlsafe_b64encode(f"o:{offset}".encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> int:
+    """Position correspondant à un jeton de continuation"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        prefix, offset = base64.urlsafe_b64decode(padded.encode()).decode().split(":")
+        if prefix != "o" or int(offset) < 0:
+            raise ValueError
+        return int(offset)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError(f"Jeton de pagination invalide: {cursor}")
+
+def page_request(cursor: Optional[str] = None, page: Optional[int] = None,
+                 limit: Optional[int] = None, query: str = "") -> PageRequest:
+    """Construit une demande de page (le curseur est prioritaire sur le numéro)"""
+    limit = max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+    if cursor:
+        offset = decode_cursor(cursor)
+    elif page:
+        offset = (max(page, 1) - 1) * limit
+    else:
+        offset = 0
+    return PageRequest(query, offset, limit)
+
+def parse_page_request(text: str) -> PageRequest:
+    """Extrait page, limit et cursor d'une entrée texte ("tous page=2 limit=10")"""
+    params = {}
+    for number_name, number, cursor_name, cursor in _PAGING_PATTERN.findall(text):
+        if number_name:
+            params[number_name.lower()] = number
+        else:
+            params[cursor_name.lower()] = cursor
+    query = _PAGING_PATTERN.sub("", text).strip()
+
+    def as_int(value: Optional[str]) -> Optional[int]:
+        return int(value) if value and value.isdigit() else None
+
+    return page_request(params.get("cursor"), as_int(params.get("page")),
+                        as_int(params.get("limit")), query)
+
+def paginate(records: Iterable, request: PageRequest) -> Page:
+    """Découpe une page dans un itérable sans matérialiser le reste"""
+    items = list(islice(records, request.offset, request.offset + request.limit + 1))
+    has_more = len(items) > request.limit
+    next_cursor = encode_cursor(request.offset + request.limit) if has_more else None
+    return Page(items[:request.limit], request.offset, next_cursor)
+
+def render_page_footer(page: Page) -> str:
+    """Pied de page textuel indiquant comment obtenir la suite"""
+    if not page.items and page.offset:
+        # Curseur périmé : la liste a raccourci depuis qu'il a été émis
+        return "\n📄 Fin de la liste : relancez la demande sans 'cursor=' pour repartir du début"
+    footer = f"\n📄 Éléments {page.offset + 1} à {page.offset + len(page.items)}"
+    if page.next_cursor:
+        footer += f" • ➡️ Suite : cursor={page.next_cursor}"
+    return footer
+
+def group_lines(records: Iterable[Tuple[str, str]]) -> List[str]:
+    """Met en forme des paires (groupe, ligne) en répétant l'en-tête à chaque changement"""
+    lines = []
+    current = None
+    for group, line in records:
+        if group != current:
+            if current is not None:
+                lines.append("")
+            lines.append(group)
+            current = group
+        lines.append(line)
+    return lines
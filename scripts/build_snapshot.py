@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Script de compilation du catalogue d'un salon en instantané binaire (projeté en mémoire au démarrage)
+Usage: python scripts/build_snapshot.py --file data/sample_salon.json --output data/salon.snapshot
+"""
+
+import sys
+import os
+import argparse
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, Dict, List
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.catalog import CatalogSnapshot
+from app.models.snapshot_file import write_snapshot, load_snapshot
+from app.utils.helpers import load_json_file
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Champs lus sur chaque enregistrement et valeurs par défaut
+EXHIBITOR_FIELDS = {
+    "id": "", "name": "", "booth_number": "", "category": "", "description": "",
+    "contact_person": "", "email": None, "phone": None, "website": None,
+    "tags": [], "special_offers": [], "is_sponsor": False
+}
+EVENT_FIELDS = {
+    "id": "", "title": "", "description": "", "category": "", "speaker": "",
+    "location": "", "language": "fr", "level": None, "additional_speakers": [], "tags": [],
+    "start_time": None, "end_time": None
+}
+
+def _record(source: Dict[str, Any], fields: Dict[str, Any]) -> SimpleNamespace:
+    """Enregistrement aux attributs de Exhibitor/Event depuis un dict JSON"""
+    get = source.get
+    values = {name: get(name, default) for name, default in fields.items()}
+    for name in ("start_time", "end_time"):
+        if isinstance(values.get(name), str):
+            values[name] = datetime.fromisoformat(values[name])
+    for name in ("id", "category"):
+        values[name] = str(values[name] or "")
+    return SimpleNamespace(**values)
+
+def _default_ids(records: List[SimpleNamespace], prefix: str) -> List[SimpleNamespace]:
+    """Attribue un identifiant stable aux enregistrements qui n'en ont pas"""
+    for position, record in enumerate(records, start=1):
+        if not record.id:
+            record.id = f"{prefix}{position}"
+    return records
+
+def build_from_json(file_path: str):
+    """Compile l'instantané à partir d'un fichier JSON (format de data/sample_salon.json)"""
+    data = load_json_file(file_path)
+    if not data:
+        raise ValueError(f"No salon data in {file_path}")
+
+    exhibitors = _default_ids([_record(e, EXHIBITOR_FIELDS) for e in data.get('exhibitors', [])], "exh-")
+    events = _default_ids([_record(e, EVENT_FIELDS) for e in data.get('events', [])], "evt-")
+    salon = data.get('salon', {})
+
+    catalog = CatalogSnapshot.from_records(exhibitors, events, salon_id=str(salon.get('id', '')))
+    return catalog, salon
+
+def main():
+    parser = argparse.ArgumentParser(description='Build a binary salon catalog snapshot')
+    parser.add_argument('--file', required=True, help='JSON file to compile')
+    parser.add_argument('--output', required=True, help='Snapshot file to write')
+    parser.add_argument('--version', type=int, default=0, help='Catalog version stored in the header')
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.file):
+        print(f"❌ File not found: {args.file}")
+        sys.exit(1)
+
+    try:
+        catalog, info = build_from_json(args.file)
+        catalog.version = args.version
+        size = write_snapshot(catalog, args.output, info)
+
+        # Vérification : relecture de l'instantané écrit
+        snapshot = load_snapshot(args.output)
+        logger.info(f"✅ Snapshot written: {len(snapshot.exhibitors)} exhibitors, "
+                    f"{len(snapshot.events)} events, {size} bytes")
+        snapshot.close()
+
+        print(f"🎉 Snapshot built: {args.output}")
+
+    except Exception as e:
+        print(f"❌ Snapshot build failed: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
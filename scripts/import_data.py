@@ -16,7 +16,7 @@ from app.utils.helpers import load_json_file
 from app.utils.logger import setup_logger
 from datetime import datetime
 
-logger = setup_logger(_name_)
+logger = setup_logger(__name__)
 
 def import_from_json(file_path: str):
     """Importe les données depuis un fichier JSON"""
@@ -124,5 +124,5 @@ def main():
         print(f"❌ Import failed: {e}")
         sys.exit(1)
 
-if _name_ == "_main_":
+if __name__ == "__main__":
     main()
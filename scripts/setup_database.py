@@ -13,7 +13,7 @@ from app.models.salon import SalonDB, ExhibitorDB, EventDB
 from app.utils.logger import setup_logger
 from datetime import datetime
 
-logger = setup_logger(_name_)
+logger = setup_logger(__name__)
 
 def create_sample_data():
     """Crée des données d'exemple"""
@@ -89,5 +89,5 @@ def main():
         logger.error(f"❌ Database setup failed: {e}")
         sys.exit(1)
 
-if _name_ == "_main_":
+if __name__ == "__main__":
     main()
\ No newline at end of file
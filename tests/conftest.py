@@ -0,0 +1,58 @@
+import os
+from datetime import datetime
+
+import pytest
+
+# Paramètres obligatoires de app.config (aucun appel réel n'est fait pendant les tests)
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+
+from app.models.salon import Event, Exhibitor, Salon, Venue  # noqa: E402
+
+def make_salon() -> Salon:
+    """Salon livré par défaut (data/salons/default.json) : 3 exposants, 3 événements"""
+    return Salon(
+        id="default",
+        name="Salon de l'Innovation Technologique 2025",
+        description="Le plus grand rendez-vous technologique du Congo-Brazzaville",
+        date=datetime(2025, 6, 15, 9, 0),
+        venue=Venue(name="Centre des Congrès de Brazzaville", address="Avenue Amilcar Cabral",
+                    city="Brazzaville", postal_code="00242", country="Congo"),
+        organizer="Comité d'organisation",
+        contact_email="contact@salon-innovation.cg",
+        exhibitors=[
+            Exhibitor(id="e1", name="TechInnovation SARL", booth_number="A12", category="Technologie",
+                      description="Solutions d'IA pour les entreprises africaines",
+                      contact_person="Marie Dubois",
+                      special_offers=["Démonstration gratuite", "Consultation IA personnalisée"],
+                      location={"x": 12, "y": 5, "zone": "A"}),
+            Exhibitor(id="e2", name="EcoTech Congo", booth_number="B08", category="Innovation",
+                      description="Solutions écologiques et durables",
+                      contact_person="Jean-Paul Makaya",
+                      special_offers=["Audit énergétique gratuit", "Kit solaire à prix réduit"],
+                      location={"x": 8, "y": 3, "zone": "B"}),
+            Exhibitor(id="e3", name="FinTech Brazzaville", booth_number="C15", category="Services",
+                      description="Solutions de paiement mobile et bancaires",
+                      contact_person="Sylvie Ngoma",
+                      special_offers=["Ouverture de compte gratuite", "Formation fintech"],
+                      location={"x": 15, "y": 7, "zone": "C"}),
+        ],
+        events=[
+            Event(id="v1", title="Conférence sur l'IA en Afrique", category="Conférence",
+                  description="L'avenir de l'intelligence artificielle sur le continent africain",
+                  speaker="Dr. Sophie Laurent", location="Auditorium Principal",
+                  start_time=datetime(2025, 6, 15, 10, 0), end_time=datetime(2025, 6, 15, 11, 30)),
+            Event(id="v2", title="Atelier Technologies Vertes", category="Atelier",
+                  description="Mise en pratique des solutions écologiques",
+                  speaker="Ing. Paul Makosso", location="Salle d'Atelier B",
+                  start_time=datetime(2025, 6, 15, 14, 0), end_time=datetime(2025, 6, 15, 16, 0)),
+            Event(id="v3", title="Table Ronde Fintech", category="Table ronde",
+                  description="L'avenir des services financiers numériques au Congo",
+                  speaker="Panel d'experts", location="Espace Débat",
+                  start_time=datetime(2025, 6, 15, 16, 30), end_time=datetime(2025, 6, 15, 18, 0)),
+        ],
+    )
+
+@pytest.fixture
+def salon() -> Salon:
+    return make_salon()
@@ -0,0 +1,491 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.agent.fast_path import FastPathRouter
+
+# Réponses directes (sans LLM)
+
+@pytest.fixture
+def router(salon):
+    return FastPathRouter(salon, {})
+
+@pytest.mark.parametrize("text", ["il y a 12 exposants ?", "à 12 heures", "il y a 12 stands"])
+def test_fast_path_ignores_numbers_that_are_not_booths(router, text):
+    decision = router.route(text)
+    assert decision is None or decision.argument != "A12"
+
+@pytest.mark.parametrize("text, intent, argument", [
+    ("où est le stand a 12 ?", "booth_location", "stand A12"),
+    ("où se trouve A-12", "booth_location", "stand A12"),
+    ("stand A12", "exhibitor", "A12"),
+])
+def test_fast_path_routes_booth_requests(router, text, intent, argument):
+    decision = router.route(text)
+    assert (decision.intent, decision.argument) == (intent, argument)
+
+# Registre des salons
+
+def _registry(loader, **kwargs):
+    from app.agent.registry import SalonRegistry
+    kwargs.setdefault("max_bytes", 1 << 30)
+    return SalonRegistry(loader, lambda salon: object(), **kwargs)
+
+def test_registry_loads_each_salon_once_under_concurrency(salon):
+    import threading
+
+    calls = []
+    registry = _registry(lambda salon_id: calls.append(salon_id) or salon)
+    insert = registry._insert
+    racers = []
+
+    def insert_with_concurrent_get(salon_id, engine):
+        # Un get() concurrent juste avant l'insertion doit attendre, pas recharger
+        racer = threading.Thread(target=registry.get, args=(salon_id,))
+        racer.start()
+        racer.join(0.05)
+        racers.append(racer)
+        insert(salon_id, engine)
+
+    registry._insert = insert_with_concurrent_get
+    engine = registry.get("default")
+    racers[0].join()
+
+    assert calls == ["default"]
+    assert registry.get("default") is engine
+    assert registry.loads == 1 and not registry._building
+
+def test_registry_failed_load_can_be_retried(salon):
+    from app.utils.exceptions import SalonNotFoundError
+
+    attempts = []
+
+    def loader(salon_id):
+        attempts.append(salon_id)
+        if len(attempts) == 1:
+            raise SalonNotFoundError(salon_id)
+        return salon
+
+    registry = _registry(loader)
+    with pytest.raises(SalonNotFoundError):
+        registry.get("default")
+    assert registry.get("default").salon is salon
+    assert not registry._building
+
+def test_registry_evicts_least_recently_used_idle_salons(salon):
+    registry = _registry(lambda salon_id: salon.copy(update={"id": salon_id}), max_salons=2)
+    busy = registry.acquire("a")
+    registry.get("b")
+    registry.get("c")
+    # "a" a une session ouverte : c'est "b" qui part
+    assert "a" in registry and "b" not in registry and "c" in registry
+    registry.release(busy)
+    registry.get("d")
+    assert "a" not in registry and len(registry) == 2
+
+def test_registry_estimates_the_route_matrix_without_building_it(salon):
+    from app.models.route_matrix import RouteMatrix
+    from app.models.salon import Exhibitor
+
+    engine = _registry(lambda salon_id: salon).get("default")
+    estimate = engine.estimated_bytes
+    assert salon._venue_graph is None
+    # Même nombre de nœuds que le graphe réellement construit
+    assert RouteMatrix.estimate_nbytes(len(salon.venue_graph)) == salon.venue_graph.matrix.nbytes
+
+    salon.add_exhibitor(Exhibitor(id="e4", name="AgriTech Pool", booth_number="D02", category="Technologie",
+                                  description="Capteurs pour l'agriculture", contact_person="Alain Mbemba"))
+    assert engine.estimated_bytes > estimate
+
+def test_registry_builds_the_salon_agent_on_first_use(salon):
+    pytest.importorskip("langchain_openai")
+    from app.agent.registry import SalonRegistry, _build_agent
+
+    registry = SalonRegistry(lambda salon_id: salon, _build_agent, max_bytes=1 << 30)
+    engine = registry.get("default")
+    assert engine.built_agent is None
+    agent = engine.agent
+    assert engine.agent is agent and engine.built_agent is agent and agent.salon_data is salon
+    assert {tool.name for tool in agent.tools} == {"exhibitor_info", "event_schedule", "navigation"}
+    assert all(tool.salon_data is salon for tool in agent.tools)
+
+def test_default_salon_file_is_valid():
+    from app.agent.registry import load_salon_file
+    from app.utils.exceptions import SalonNotFoundError
+
+    salon = load_salon_file("default")
+    assert salon.id == "default"
+    assert salon.get_exhibitor_by_booth("A12").zone == "A"
+    assert len(salon.events) == 3
+    with pytest.raises(SalonNotFoundError):
+        load_salon_file("../secrets")
+
+@pytest.mark.parametrize("text, decision", [
+    ("Où sont les toilettes ?", ("facility", "navigation")),
+    ("bonjour, où est le café svp", ("facility", "navigation")),
+    ("montre moi le plan", ("map", "navigation")),
+    ("EcoTech Congo", ("exhibitor", "exhibitor_info")),
+    ("le programme de demain", ("schedule", "event_schedule")),
+    ("planning de demain", ("schedule", "event_schedule")),
+    ("le planning", ("schedule", "event_schedule")),
+    ("les plans du salon", ("map", "navigation")),
+])
+def test_fast_path_recognizes_simple_requests(router, text, decision):
+    assert router.route(text)[:2] == decision
+
+@pytest.mark.parametrize("text", [
+    "toilettes et restaurant",
+    "stand A12 et plan",
+    "pourquoi visiter le stand A12 ?",
+    "quel stand me conseillez-vous",
+    "où est le restaurant le moins cher",
+    "horaires du salon",
+    "le plan du programme",
+])
+def test_fast_path_leaves_ambiguous_requests_to_the_agent(router, text):
+    assert router.route(text) is None
+
+@pytest.mark.parametrize("text", ["planning de demain", "le planning", "planifier ma visite", "cartographie"])
+def test_fast_path_matches_whole_keywords_only(router, text):
+    decision = router.route(text)
+    assert decision is None or decision.intent != "map"
+
+class _EchoTool:
+    def __init__(self, fail=False):
+        self.fail = fail
+
+    def _run(self, argument):
+        if self.fail:
+            raise RuntimeError("panne")
+        return f"résultat {argument}  "
+
+    async def _arun(self, argument):
+        return self._run(argument)
+
+def test_fast_path_answers_with_templates_and_counts(salon):
+    import asyncio
+
+    router = FastPathRouter(salon, {"exhibitor_info": _EchoTool(), "event_schedule": _EchoTool(fail=True)})
+    assert router.answer("stand A12") == (
+        "résultat A12\n\nVoulez-vous l'itinéraire jusqu'à ce stand ? 🗺️")
+    assert asyncio.run(router.aanswer("EcoTech Congo")).startswith("résultat B08")
+    assert router.answer("programme") is None  # l'outil a échoué : la demande va à l'agent
+    assert router.answer("montre moi le plan") is None  # outil absent
+    assert router.answer("pourquoi ?") is None
+
+    stats = router.stats()
+    assert (stats["requests"], stats["hits"], stats["errors"]) == (5, 2, 1)
+    assert stats["hits_by_intent"] == {"exhibitor": 2}
+
+# Cache sémantique des réponses
+
+@pytest.fixture
+def response_cache():
+    from app.agent.response_cache import SemanticResponseCache
+    return SemanticResponseCache(max_entries=3, ttl_seconds=600, bucket_minutes=15, threshold=0.85)
+
+NOW = datetime(2025, 6, 15, 10, 1)
+
+def test_response_cache_reuses_answers_of_close_questions(salon, response_cache):
+    response_cache.set(salon, "Quels exposants proposent des solutions de paiement mobile ?", "R1", NOW)
+    assert response_cache.get(salon, "Bonjour, quels exposants proposent des solutions de paiement mobile svp ?",
+                              NOW) == "R1"
+    assert response_cache.get(salon, "Quels exposants proposent des solutions écologiques ?", NOW) is None
+
+def test_response_cache_matches_paraphrases_of_the_same_day(salon, response_cache):
+    response_cache.set(salon, "programme d'aujourd'hui", "R", NOW)
+    assert response_cache.get(salon, "qu'est-ce qui se passe aujourd'hui ?", NOW) == "R"
+    assert response_cache.get(salon, "le planning d'aujourd'hui", NOW) == "R"
+    assert response_cache.get(salon, "programme de demain", NOW) is None
+
+    # "après-midi" n'est pas une relance ("après")
+    response_cache.set(salon, "programme cet après-midi", "PM", NOW)
+    assert response_cache.get(salon, "le programme de l'après-midi", NOW) == "PM"
+    assert not response_cache.eligible("et après ?") and not response_cache.eligible("il y a quoi après ?")
+
+def test_response_cache_never_mixes_booths(salon, response_cache):
+    response_cache.set(salon, "Que propose le stand A12 ?", "A12", NOW)
+    assert response_cache.get(salon, "Que propose le stand B08 ?", NOW) is None
+    assert response_cache.get(salon, "que propose le stand a12", NOW) == "A12"
+
+def test_response_cache_expiry_version_and_follow_ups(salon, response_cache):
+    question = "Que propose le stand A12 ?"
+    response_cache.set(salon, question, "A12", NOW)
+    # Tranche horaire suivante (10:15) : la réponse n'est plus servie
+    assert response_cache.get(salon, question, NOW + timedelta(minutes=14)) is None
+    response_cache.set(salon, question, "A12", NOW)
+    salon.remove_event("v3")
+    assert response_cache.get(salon, question, NOW) is None
+
+    response_cache.set(salon, "et demain ?", "R", NOW)
+    assert response_cache.get(salon, "et demain ?", NOW) is None
+    assert response_cache.stats()["ineligible"] == 1
+
+def test_response_cache_is_bounded(salon, response_cache):
+    for booth in ["A12", "B08", "C15", "A12"]:
+        response_cache.set(salon, f"Que propose le stand {booth} ?", booth, NOW)
+    assert len(response_cache) == 3
+    assert response_cache.get(salon, "Que propose le stand B08 ?", NOW) == "B08"
+
+# Découpage des réponses en phrases (flux)
+
+def _stream(text, size=7):
+    from app.agent.streaming import SentenceChunker
+
+    chunker = SentenceChunker()
+    chunks = []
+    for i in range(0, len(text), size):
+        chunks.extend(chunker.feed(text[i:i + size]))
+    return chunks + chunker.flush()
+
+def test_chunker_round_trips_a_long_unbroken_token():
+    from app.agent.streaming import MAX_CHUNK_CHARS
+
+    url = "https://salon.example/" + "x" * (2 * MAX_CHUNK_CHARS + 37)
+    text = f"Voici le lien : {url} pour vous inscrire."
+    chunks = _stream(text)
+    assert "".join(chunks) == text
+    assert all(len(chunk) <= MAX_CHUNK_CHARS for chunk in chunks)
+
+def test_chunker_splits_sentences_and_keeps_separators():
+    from app.agent.streaming import split_sentences
+
+    text = "Bonjour, bienvenue au salon de l'innovation, je suis votre guide. Le stand A12 est en zone A !\nBonne visite."
+    chunks = _stream(text, size=3)
+    assert "".join(chunks) == text
+    assert chunks[0] == "Bonjour, bienvenue au salon de l'innovation, "  # première phrase écourtée
+    assert chunks[-1] == "Bonne visite."
+    assert split_sentences("Un. Deux ! Trois") == ["Un. ", "Deux ! ", "Trois"]
+
+# Conversations des visiteurs
+
+def test_visitor_token_is_bound_to_the_server_signature():
+    pytest.importorskip("langchain")
+    from app.agent.sessions import issue_visitor_token, verify_visitor_token
+
+    token = issue_visitor_token()
+    visitor_id = verify_visitor_token(token)
+    assert visitor_id and token.startswith(visitor_id)
+    assert verify_visitor_token(issue_visitor_token()) != visitor_id
+    # Un identifiant choisi ou une signature modifiée ne donnent accès à aucune conversation
+    for forged in [visitor_id, f"{visitor_id}.", f"{visitor_id}.{'0' * 64}", f"other.{token.split('.')[1]}", "", None,
+                   f"{visitor_id}.é{'0' * 63}", "é.é", "\ud800.x"]:
+        assert verify_visitor_token(forged) is None
+
+def test_session_turns_stay_serialized_across_eviction():
+    pytest.importorskip("langchain")
+    import asyncio
+    from app.agent.sessions import SessionStore
+
+    store = SessionStore(max_sessions=1)
+    events = []
+
+    async def turn(name, release=None):
+        async with store.turn("a"):
+            events.append(f"{name}:start")
+            if release is not None:
+                await release.wait()
+            events.append(f"{name}:end")
+
+    async def scenario():
+        release = asyncio.Event()
+        first = asyncio.create_task(turn("first", release))
+        await asyncio.sleep(0)
+        # La session "a" est évincée pendant l'échange, puis recréée par le suivant
+        store.get("b")
+        assert "a" not in store
+        second = asyncio.create_task(turn("second"))
+        await asyncio.sleep(0.01)
+        assert events == ["first:start"]
+        release.set()
+        await asyncio.gather(first, second)
+
+    asyncio.run(scenario())
+    assert events == ["first:start", "first:end", "second:start", "second:end"]
+    assert not store._turns
+
+# Exécution des appels au LLM
+
+def test_normalize_question_ignores_case_accents_and_punctuation():
+    from app.agent.execution import normalize_question
+
+    assert normalize_question("  Où est le Café ?! ") == normalize_question("ou est le cafe") == "ou est le cafe"
+
+def test_gate_bounds_concurrency_in_arrival_order():
+    import asyncio
+    from app.agent.execution import InteractionGate
+
+    gate = InteractionGate(max_concurrent=2)
+    running, peak, order = [0], [0], []
+
+    async def call(i):
+        async with gate.slot():
+            order.append(i)
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+            await asyncio.sleep(0.001)
+            running[0] -= 1
+
+    async def scenario():
+        await asyncio.gather(*(call(i) for i in range(8)))
+
+    asyncio.run(scenario())
+    assert peak[0] == 2 and order == list(range(8))
+    stats = gate.stats()
+    assert stats["active"] == 0 and stats["queue_depth"] == 0 and stats["max_queue_depth"] == 6
+
+def test_gate_cancelled_waiter_does_not_leak_a_slot():
+    import asyncio
+    from app.agent.execution import InteractionGate
+
+    gate = InteractionGate(max_concurrent=1)
+
+    async def hold(release):
+        async with gate.slot():
+            await release.wait()
+
+    async def scenario():
+        release = asyncio.Event()
+        holder = asyncio.create_task(hold(release))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(hold(asyncio.Event()))
+        await asyncio.sleep(0)
+        assert gate.queue_depth == 1
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        release.set()
+        await holder
+        async with gate.slot():
+            assert gate.stats()["active"] == 1
+
+    asyncio.run(scenario())
+    assert gate.stats()["active"] == 0 and gate.queue_depth == 0
+
+def test_gate_shares_one_call_between_identical_questions():
+    import asyncio
+    from app.agent.execution import InteractionGate
+
+    gate = InteractionGate(max_concurrent=4)
+    calls = []
+
+    async def ask(key):
+        async with gate.flight(key) as flight:
+            if flight.coalesced:
+                return flight.result
+            calls.append(key)
+            await asyncio.sleep(0.01)
+            flight.publish(f"réponse {key}")
+            return flight.output
+
+    async def scenario():
+        return await asyncio.gather(ask("q"), ask("q"), ask("q"), ask(None), ask(None))
+
+    results = asyncio.run(scenario())
+    assert results == ["réponse q"] * 3 + ["réponse None"] * 2
+    # Sans clé (question liée à l'historique), chaque appel est mené séparément
+    assert calls == ["q", None, None]
+    assert (gate.led, gate.coalesced) == (3, 2) and not gate._inflight
+
+def test_gate_followers_see_leader_errors_and_retry_after_cancellation():
+    import asyncio
+    from app.agent.execution import InteractionGate
+
+    gate = InteractionGate(max_concurrent=4)
+
+    async def fail():
+        async with gate.flight("q"):
+            await asyncio.sleep(0.01)
+            raise RuntimeError("llm down")
+
+    async def ask():
+        async with gate.flight("q") as flight:
+            if flight.coalesced:
+                return "shared"
+            flight.publish("led")
+            return "led"
+
+    async def abandoned_leader():
+        async with gate.flight("q"):
+            await asyncio.sleep(1)
+
+    async def scenario():
+        leader = asyncio.create_task(fail())
+        await asyncio.sleep(0)
+        errors = await asyncio.gather(leader, ask(), return_exceptions=True)
+        assert [type(e) for e in errors] == [RuntimeError, RuntimeError]
+
+        # Meneur annulé : le suiveur relance l'appel au lieu d'échouer
+        leader = asyncio.create_task(abandoned_leader())
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(ask())
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(scenario()) == "led"
+    assert not gate._inflight and gate.stats()["active"] == 0
+
+# Budget de jetons du prompt
+
+def test_count_tokens_estimates_words_numbers_and_symbols():
+    from app.agent.token_budget import count_tokens
+
+    assert count_tokens("") == 0
+    assert count_tokens("stand") == 2  # 5 lettres : 2 tranches de 4
+    assert count_tokens("2025") == 2
+    assert count_tokens("A12 ?") == 3
+    assert count_tokens("🚻") == 2
+
+def _messages(*texts):
+    from types import SimpleNamespace
+    return [SimpleNamespace(content=text) for text in texts]
+
+def test_fit_history_keeps_the_most_recent_whole_turns():
+    from app.agent.token_budget import MESSAGE_OVERHEAD_TOKENS, TokenBudget, count_tokens
+
+    history = _messages("q1 " * 20, "r1 " * 20, "question deux", "réponse deux", "trois", "trois")
+    recent = history[2:]
+    budget = TokenBudget(history_tokens=sum(count_tokens(m.content) + MESSAGE_OVERHEAD_TOKENS for m in recent))
+    with budget.request(100, "question") as usage:
+        assert budget.fit_history(history, usage) == recent
+    assert usage.history_dropped == 1 and usage.history > 0
+    assert budget.stats()["history_turns_dropped"] == 1
+
+def test_fit_history_respects_the_prompt_ceiling():
+    from app.agent.token_budget import TokenBudget
+
+    budget = TokenBudget(max_prompt_tokens=60, history_tokens=1000)
+    with budget.request(50, "question") as usage:
+        assert budget.fit_history(_messages("q", "r" * 200), usage) == []
+    assert usage.history == 0 and usage.history_dropped == 1
+
+def test_fit_observation_cuts_whole_lines_to_the_tool_budget():
+    from app.agent.token_budget import TokenBudget, count_tokens
+
+    budget = TokenBudget(tool_tokens={"navigation": 60}, default_tool_tokens=1000)
+    observation = "\n\n".join(f"Stand A{i} : exposant numéro {i}  " for i in range(40))
+    text, tokens, truncated = budget.fit_observation("navigation", observation)
+    assert truncated and tokens <= 60 and tokens == count_tokens(text)
+    assert text.startswith("Stand A0 : exposant numéro 0\nStand A1")
+    assert "ligne(s) omise(s)" in text.splitlines()[-1]
+
+    # Une seule ligne trop longue est coupée dans le budget
+    text, tokens, truncated = budget.fit_observation("navigation", "exposant " * 200)
+    assert truncated and tokens <= 60 and tokens == count_tokens(text)
+    assert text.startswith("exposant exposant") and "…\n[…" in text
+
+    # Sous le budget : seulement condensée (blancs de fin et lignes vides retirés)
+    assert budget.fit_observation("exhibitor_info", "a  \n\n\nb\n") == ("a\nb", 2, False)
+
+def test_trim_steps_accounts_tool_tokens_in_the_request():
+    from types import SimpleNamespace
+    from app.agent.token_budget import TokenBudget
+
+    budget = TokenBudget(tool_tokens={"navigation": 30})
+    action = SimpleNamespace(tool="navigation", tool_input="plan")
+    with budget.request(10, "plan") as usage:
+        steps = budget.trim_steps([(action, "\n".join(f"ligne {i}" for i in range(50)))])
+    assert steps[0][0] is action and "omise(s)" in steps[0][1]
+    assert usage.truncated == 1 and usage.tools["navigation"] > 0
+    assert budget.trim_steps([(action, "court")]) == [(action, "court")]
+    assert budget.stats()["observations_truncated"] == 1
@@ -0,0 +1,134 @@
+import asyncio
+
+import pytest
+
+# Lots de trajets (matrice précalculée)
+
+@pytest.fixture
+def client(salon):
+    pytest.importorskip("fastapi")
+    from fastapi.testclient import TestClient
+    from app.api import routes
+
+    routes.salon_registry.register(salon)
+    yield TestClient(routes.app)
+    routes.salon_registry.evict(salon.id)
+
+def test_route_matrix_is_rebuilt_off_the_event_loop(client, salon, monkeypatch):
+    from app.models.route_matrix import RouteMatrix
+
+    on_loop = []
+    build = RouteMatrix.__init__
+
+    def tracked_build(self, graph):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        build(self, graph)
+
+    monkeypatch.setattr(RouteMatrix, "__init__", tracked_build)
+    salon.reindex()
+
+    response = client.post("/api/salons/default/routes/batch",
+                           json={"pairs": [["A12", "C15"], ["A12", "Z99"]], "paths": True})
+    body = response.json()
+    assert body["unknown"] == 1
+    assert body["routes"][0]["distance"] == 80.0
+    assert body["routes"][0]["path"] == ["booth:A12", "zone:A", "zone:C", "booth:C15"]
+
+    salon.reindex()
+    ranked = client.get("/api/salons/default/routes/from/A12", params={"limit": 2}).json()
+    assert [entry["destination"] for entry in ranked["destinations"]] == ["booth:B08", "booth:C15"]
+    assert on_loop == [False, False]
+
+# Métriques Prometheus
+
+def test_metrics_endpoint_exports_latencies_and_gauges(client):
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    lines = response.text.splitlines()
+    assert "# TYPE mc_interaction_seconds summary" in lines
+    assert "# TYPE mc_tool_errors_total counter" in lines
+    assert "mc_salons_loaded 1" in lines
+    assert any(line.startswith("mc_sessions ") for line in lines)
+
+# Exposants du salon par défaut
+
+def test_exhibitor_routes_serve_the_default_salon(client, salon):
+    assert [e["booth_number"] for e in client.get("/api/exhibitors").json()] == ["A12", "B08", "C15"]
+    created = client.post("/api/exhibitors", json={
+        "id": "e4", "name": "AgriTech Pool", "booth_number": "D02", "category": "Technologie",
+        "description": "Capteurs pour l'agriculture", "contact_person": "Alain Mbemba"}).json()
+    assert created["booth_number"] == "D02"
+    assert salon.get_exhibitor_by_booth("D02").name == "AgriTech Pool"
+
+# Plan du salon (ETag)
+
+def test_map_etag_is_derived_from_the_rendered_plan(client, salon):
+    first = client.get("/api/map.svg")
+    etag = first.headers["etag"]
+    assert first.status_code == 200 and first.text.startswith("<svg")
+    assert client.get("/api/map.svg", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/api/salons/default/map.txt").headers["etag"] != etag
+
+    # Nouvelle version du plan au même contenu (redémarrage, autre worker) : même ETag
+    salon.reindex()
+    assert client.get("/api/map.svg", headers={"If-None-Match": etag}).status_code == 304
+
+    salon.remove_exhibitor("e2")
+    changed = client.get("/api/map.svg", headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["etag"] != etag
+    assert "B08" not in changed.text
+
+# Conversations (jeton de reprise)
+
+def test_websocket_issues_and_accepts_only_signed_visitor_tokens(client):
+    from urllib.parse import urlencode
+    from app.api import routes
+
+    with client.websocket_connect("/ws/default") as websocket:
+        issued = websocket.receive_json()
+    assert issued["type"] == "session" and routes.verify_visitor_token(issued["visitor_token"])
+
+    with client.websocket_connect(f"/ws/default?visitor_token={issued['visitor_token']}") as websocket:
+        assert websocket.receive_json()["visitor_token"] == issued["visitor_token"]
+    for forged in ["visiteur", "é.é", issued["visitor_token"][:-1] + "x"]:
+        with client.websocket_connect(f"/ws/default?{urlencode({'visitor_token': forged})}") as websocket:
+            assert websocket.receive_json()["visitor_token"] not in (forged, issued["visitor_token"])
+    assert routes.manager.active_connections == []
+
+def test_websocket_finishes_speech_when_the_client_leaves_mid_answer(client, monkeypatch):
+    from app.agent.registry import SalonEngine
+    from app.api import routes
+
+    finished = []
+
+    class Speech:
+        def say(self, sentence):
+            pass
+
+        async def finish(self):
+            finished.append(True)
+
+    class Agent:
+        async def stream_interaction(self, message, session_id=None):
+            yield "Bienvenue au salon. "
+            raise routes.WebSocketDisconnect()
+
+    monkeypatch.setattr(routes.voice_service, "speech_stream", lambda started=None: Speech())
+    monkeypatch.setattr(SalonEngine, "agent", property(lambda self: Agent()))
+    with client.websocket_connect("/ws/default") as websocket:
+        websocket.receive_json()
+        websocket.send_json({"type": "voice_command", "message": "bonjour", "speak": True})
+        assert websocket.receive_json()["type"] == "agent_response_chunk"
+    assert finished == [True]
+    assert routes.manager.active_connections == []
+
+def test_salon_stats_do_not_build_the_agent(client):
+    from app.api import routes
+
+    assert client.get("/api/salons/default/stats").json() == {"interactions": 0, "fast_path": None}
+    assert routes.salon_registry.get("default").built_agent is None
@@ -0,0 +1,140 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.crowd_service import CrowdService
+
+# Affluence (relevés des caméras)
+
+def test_crowd_levels_take_the_busiest_camera_and_expire():
+    service = CrowdService({"0": "zone A", "1": "zone:a", "2": "C"}, reading_ttl=60)
+    now = datetime(2025, 6, 15, 10)
+    assert service.record(0, {"density": "high", "level": 3}, now) == "A"
+    service.record(1, {"density": "low", "level": 1}, now)
+    service.record(2, {"density": "extreme", "level": 9}, now - timedelta(minutes=5))
+    assert service.record(7, {"level": 4}, now) is None
+    assert service.record(2, {"density": "unknown", "level": 4}, now) is None
+
+    assert service.zone_levels(now) == {"A": 3}
+    assert service.zone_penalties(now) == {"A": 1.8}
+    assert service.zone_levels(now + timedelta(minutes=2)) == {}
+
+def test_congestion_reroutes_around_busy_zones(salon):
+    graph = salon.venue_graph
+    route = graph.shortest_path("booth:A12", "zone:D")
+    assert [node.zone for node in route.nodes] == ["A", "A", "B", "D"]
+
+    service = CrowdService({"0": "B"})
+    service.record(0, {"level": 4})
+    assert service.apply([salon]) == 1
+    assert service.apply([salon]) == 0  # pénalités inchangées
+
+    route = graph.shortest_path("booth:A12", "zone:D")
+    assert [node.zone for node in route.nodes] == ["A", "A", "C", "D"]
+    assert (route.distance, route.cost) == (120.0, 120.0)
+    # La pénalité survit à la reconstruction du graphe
+    salon.remove_exhibitor("e2")
+    assert salon.venue_graph is not graph
+    assert salon.venue_graph.congestion["B"] == 3.0
+
+def test_incremental_congestion_update_matches_full_solve(salon):
+    graph = salon.venue_graph
+    steps = [{"B": 3.0, "C": 1.8}, {"B": 1.3}, {"B": 1.3, "E": 3.0}, {}]
+    for penalties in steps:
+        assert graph.set_congestion(penalties)
+        expected = graph._solve_zones(graph.congestion)
+        for pair, distance in expected.distance.items():
+            assert graph._zones.distance[pair] == pytest.approx(distance)
+
+# Annonces des événements (tas de minuteries)
+
+def _at(hour, minute=0):
+    return datetime(2025, 6, 15, hour, minute).timestamp()
+
+def test_announcements_fire_in_order_at_their_triggers(salon):
+    from app.services.announcement_service import AnnouncementScheduler
+
+    scheduler = AnnouncementScheduler(lead_minutes=[10, 5])
+    scheduler.refresh([salon], now=_at(9))
+    assert len(scheduler) == 3 * 4
+    assert scheduler.next_at() == _at(9, 50)
+
+    assert scheduler.due(now=_at(9, 49)) == []
+    fired = scheduler.due(now=_at(11, 30))
+    assert [(a.event_id, a.kind) for a in fired] == [
+        ("v1", "reminder"), ("v1", "reminder"), ("v1", "start"), ("v1", "end")]
+    assert "dans 10 minutes" in fired[0].message and "dans 5 minutes" in fired[1].message
+    assert all(a.salon_id == "default" for a in fired)
+    assert scheduler.next_at() == _at(13, 50)
+
+def test_announcements_follow_schedule_changes(salon):
+    from app.services.announcement_service import AnnouncementScheduler
+
+    scheduler = AnnouncementScheduler(lead_minutes=[10], announce_end=False)
+    scheduler.refresh([salon], now=_at(9))
+    moved = salon.events[0].copy(update={"start_time": datetime(2025, 6, 15, 12),
+                                        "end_time": datetime(2025, 6, 15, 13)})
+    salon.update_event(moved)
+    salon.remove_event("v2")
+    scheduler.refresh([salon], now=_at(9, 30))
+
+    # Les déclencheurs caducs sont ignorés (ou retirés au recompactage)
+    assert scheduler.due(now=_at(11, 0)) == []
+    assert [(a.event_id, a.kind) for a in scheduler.due(now=_at(17))] == [
+        ("v1", "reminder"), ("v1", "start"), ("v3", "reminder"), ("v3", "start")]
+    assert scheduler.next_at() is None
+
+    # Un salon évincé n'est plus suivi
+    scheduler.salons_changed()
+    scheduler.refresh([], now=_at(9))
+    assert scheduler.stats()["salons"] == 0
+    assert scheduler._salon_changed not in salon._listeners
+
+def test_announcement_loop_sleeps_until_the_next_trigger_and_wakes_on_changes(salon):
+    import asyncio
+    from app.models.salon import Event
+    from app.services.announcement_service import AnnouncementScheduler
+
+    for event_id in ["v1", "v2", "v3"]:
+        salon.remove_event(event_id)
+    scheduler = AnnouncementScheduler(lead_minutes=[], announce_end=False)
+    delivered = []
+
+    async def sink(announcement):
+        delivered.append(announcement)
+
+    async def failing_sink(announcement):
+        raise RuntimeError("écran déconnecté")
+
+    async def scenario():
+        scheduler.start(lambda: [salon], [failing_sink, sink])
+        await asyncio.sleep(0.02)
+        assert scheduler.stats()["pending_triggers"] == 0
+        # Un événement ajouté réveille la boucle, qui dort ensuite jusqu'à son début
+        start = datetime.now() + timedelta(seconds=0.1)
+        salon.add_event(Event(id="v9", title="Démo flash", category="Démonstration", description="",
+                              speaker="Équipe", location="Auditorium Principal",
+                              start_time=start, end_time=start + timedelta(minutes=5)))
+        await asyncio.sleep(0.05)
+        assert delivered == [] and scheduler.stats()["pending_triggers"] == 1
+        await asyncio.sleep(0.15)
+        scheduler.stop()
+
+    asyncio.run(scenario())
+    assert [(a.event_id, a.kind) for a in delivered] == [("v9", "start")]
+    assert scheduler.sent == {"start": 1}
+
+def test_reloaded_salon_does_not_repeat_announcements(salon):
+    from app.services.announcement_service import AnnouncementScheduler
+    from tests.conftest import make_salon
+
+    scheduler = AnnouncementScheduler(lead_minutes=[10])
+    scheduler.refresh([salon], now=_at(9))
+    # Salon évincé puis rechargé (nouvelle instance, même programme)
+    scheduler.salons_changed()
+    scheduler.refresh([], now=_at(9))
+    scheduler.salons_changed()
+    scheduler.refresh([make_salon()], now=_at(9))
+
+    fired = scheduler.due(now=_at(11, 30))
+    assert [(a.event_id, a.kind) for a in fired] == [("v1", "reminder"), ("v1", "start"), ("v1", "end")]
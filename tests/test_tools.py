@@ -0,0 +1,773 @@
+import heapq
+import math
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.salon import Event
+from app.models.search_index import SearchIndex
+from app.models.time_index import EventTimeIndex
+from app.models.fuzzy_index import FuzzyIndex, levenshtein_distance
+from app.models.snapshot_file import load_snapshot, write_snapshot
+from app.models.spatial_index import SpatialEntry, SpatialIndex
+from app.models.itinerary import TourPlanner, TourStop
+from app.models.lookup import ExhibitorLookup, normalize_booth, normalize_name
+from app.utils.intent_matcher import IntentMatcher, intent_matcher
+from app.utils.exceptions import SnapshotError
+from app.utils.cache import ToolOutputCache, cached_output, tool_cache
+from app.utils.pagination import (
+    INVALID_CURSOR_MESSAGE, PageRequest, decode_cursor, encode_cursor, paginate, parse_page_request,
+    render_page_footer
+)
+
+def _booths(exhibitors):
+    return [e.booth_number for e in exhibitors]
+
+def _ids(events):
+    return [e.id for e in events]
+
+# Recherche (index inversé)
+
+def test_exhibitor_search_keeps_baseline_order(salon):
+    # Les trois descriptions contiennent "Solutions" : ordre du catalogue
+    assert _booths(salon.search_exhibitors("solutions")) == ["A12", "B08", "C15"]
+    assert _booths(salon.search_exhibitors("solution")) == ["A12", "B08", "C15"]
+    assert _booths(salon.search_exhibitors("Fintech")) == ["C15"]
+
+def test_event_search_keeps_baseline_order(salon):
+    # "avenir" n'apparaît que dans les descriptions : ex æquo, les plus tardifs d'abord
+    assert _ids(salon.search_events("avenir")) == ["v3", "v1"]
+    assert _ids(salon.search_events("l'avenir")) == ["v3", "v1"]
+    assert _ids(salon.search_events("avenir", limit=1)) == ["v3"]
+
+def _baseline_search(records, query, fields):
+    """Ancienne recherche (sous-chaîne par champ, tri par score décroissant puis clé)"""
+    query = query.lower()
+    scored = []
+    for record in records:
+        score = 0
+        for field, weight in fields.items():
+            values = getattr(record, field)
+            for value in ([values] if isinstance(values, str) else values):
+                score += weight * (query in value.lower())
+        if score:
+            scored.append((record, score))
+    return scored
+
+@pytest.mark.parametrize("query", ["solutions", "tech", "fintech", "eco", "ia", "paiement", "services",
+                                   "innovation", "technologie", "congo", "brazzaville", "africaines"])
+def test_exhibitor_search_matches_baseline_ranking(salon, query):
+    fields = {"name": 5, "description": 3, "tags": 2, "category": 1}
+    baseline = sorted(_baseline_search(salon.exhibitors, query, fields), key=lambda x: x[1], reverse=True)
+    assert _booths(salon.search_exhibitors(query)) == _booths(e for e, _ in baseline)
+
+@pytest.mark.parametrize("query", ["avenir", "atelier", "fintech", "ia", "table", "conférence", "solutions",
+                                   "afrique", "panel", "technologies"])
+def test_event_search_matches_baseline_ranking(salon, query):
+    fields = {"title": 5, "description": 3, "speaker": 2, "tags": 2, "category": 1}
+    baseline = sorted(_baseline_search(salon.events, query, fields), key=lambda x: (x[1], x[0].start_time),
+                      reverse=True)
+    assert _ids(salon.search_events(query)) == _ids(e for e, _ in baseline)
+
+def test_search_ranks_by_field_priority(salon):
+    # Le titre (v3) l'emporte sur la description (v2)
+    assert _ids(salon.search_events("écologiques fintech")) == ["v3", "v2"]
+    assert _ids(salon.search_events("fintech")) == ["v3"]
+    # Le nom l'emporte sur la description, quelle que soit sa longueur
+    assert _booths(salon.search_exhibitors("eco écologiques")) == ["B08"]
+
+def test_event_search_ties_follow_start_time(salon):
+    salon.add_event(Event(
+        id="v0", title="Petit-déjeuner", category="Networking", speaker="Équipe",
+        description="Rencontres autour de l'avenir du salon", location="Hall",
+        start_time=datetime(2025, 6, 15, 8, 0), end_time=datetime(2025, 6, 15, 9, 0)
+    ))
+    assert _ids(salon.search_events("avenir")) == ["v3", "v1", "v0"]
+
+def test_search_index_bm25_scoring():
+    index = SearchIndex({"name": 2.0, "description": 1.0})
+    index.add("short", {"name": "Alpha", "description": "robots"})
+    index.add("long", {"name": "Beta", "description": "robots pour ateliers industriels modernes"})
+    index.add("twice", {"name": "Gamma", "description": "robots robots mobiles modernes autonomes"})
+    index.add("name", {"name": "Robots", "description": "ateliers"})
+    scores = dict(index.search("robots", limit=None))
+    # Poids du champ, puis normalisation par la longueur du champ, fréquence saturée
+    assert scores["name"] > scores["short"] > scores["twice"] > scores["long"]
+    assert scores["twice"] < 2 * scores["long"]
+    # Un terme rare pèse plus qu'un terme présent partout
+    assert dict(index.search("mobiles"))["twice"] > scores["twice"]
+
+    flat = SearchIndex({"description": 1.0}, field_b={"description": 0.0})
+    flat.add("a", {"description": "robots"})
+    flat.add("b", {"description": "robots pour ateliers industriels"})
+    # Sans normalisation de longueur : ex æquo, dans l'ordre d'insertion
+    (first, first_score), (second, second_score) = flat.search("robots")
+    assert (first, second) == ("a", "b")
+    assert first_score == pytest.approx(second_score)
+
+def test_search_index_updates_incrementally():
+    index = SearchIndex({"name": 2.0, "description": 1.0})
+    index.add("a", {"name": "Alpha", "description": "robots"})
+    index.add("b", {"name": "Beta", "description": "robots"})
+    assert [doc for doc, _ in index.search("robots")] == ["a", "b"]
+
+    # Réindexé, un document garde sa place parmi les ex æquo
+    index.add("a", {"name": "Alpha Prime", "description": "robots"})
+    assert [doc for doc, _ in index.search("robots")] == ["a", "b"]
+    # Une description plus longue le fait passer derrière (normalisation BM25)
+    index.add("a", {"name": "Alpha", "description": "robots industriels"})
+    assert [doc for doc, _ in index.search("robots")] == ["b", "a"]
+
+    index.remove("a")
+    assert [doc for doc, _ in index.search("alpha")] == []
+    assert len(index) == 1
+
+# Programme (index temporel)
+
+def test_time_index_queries(salon):
+    index = EventTimeIndex(reversed(salon.events))
+    assert _ids(index.all()) == ["v1", "v2", "v3"]
+    assert _ids(index.on_day(datetime(2025, 6, 15))) == ["v1", "v2", "v3"]
+    assert index.on_day(datetime(2025, 6, 16)) == []
+    assert _ids(index.between(datetime(2025, 6, 15, 10), datetime(2025, 6, 15, 14))) == ["v1", "v2"]
+    assert _ids(index.between(datetime(2025, 6, 15, 10), datetime(2025, 6, 15, 14), include_start=False)) == ["v2"]
+    assert _ids(index.iter_from(datetime(2025, 6, 15, 12))) == ["v2", "v3"]
+    assert _ids(index.iter_from(datetime(2025, 6, 15, 14), reverse=True)) == ["v2", "v1"]
+
+def test_time_index_running_at_matches_scan(salon):
+    index = EventTimeIndex(salon.events)
+    moment = datetime(2025, 6, 15, 8, 0)
+    while moment < datetime(2025, 6, 15, 19, 0):
+        expected = [e.id for e in salon.events if e.start_time <= moment <= e.end_time]
+        assert _ids(index.running_at(moment)) == expected
+        moment += timedelta(minutes=15)
+
+def test_time_index_running_at_keeps_schedule_order_for_overlaps():
+    import random
+
+    rng = random.Random(7)
+    day = datetime(2025, 6, 15, 8)
+    events = []
+    for i in range(200):
+        start = day + timedelta(minutes=15 * rng.randrange(40))
+        events.append(Event(id=f"x{i}", title="Atelier", category="Atelier", speaker="Équipe",
+                            description="", location="Salle A",
+                            start_time=start, end_time=start + timedelta(minutes=15 * rng.randrange(1, 16))))
+    index = EventTimeIndex(events)
+    schedule = index.all()
+    for minutes in range(0, 16 * 60, 5):
+        moment = day + timedelta(minutes=minutes)
+        # Même ordre que le programme (ex æquo : ordre d'insertion)
+        expected = [e.id for e in schedule if e.start_time <= moment <= e.end_time]
+        assert _ids(index.running_at(moment)) == expected
+
+def test_time_index_next_change_and_remove(salon):
+    index = EventTimeIndex(salon.events)
+    assert index.next_change(datetime(2025, 6, 15, 11)) == datetime(2025, 6, 15, 11, 30)
+    assert index.next_change(datetime(2025, 6, 15, 12), lead=timedelta(hours=1)) == datetime(2025, 6, 15, 13)
+    assert index.next_change(datetime(2025, 6, 15, 18)) is None
+
+    assert index.remove(salon.events[1])
+    assert not index.remove(salon.events[1])
+    assert _ids(index.running_at(datetime(2025, 6, 15, 15))) == []
+    assert len(index) == 2
+
+def test_salon_schedule_follows_event_edits(salon):
+    assert _ids(salon.get_current_events(datetime(2025, 6, 15, 15))) == ["v2"]
+    salon.remove_event("v2")
+    assert salon.get_current_events(datetime(2025, 6, 15, 15)) == []
+    assert _ids(salon.get_upcoming_events(hours=8, now=datetime(2025, 6, 15, 9))) == ["v1", "v3"]
+
+# Noms mal orthographiés (index de trigrammes)
+
+def test_levenshtein_distance():
+    assert levenshtein_distance("kitten", "sitting") == 3
+    assert levenshtein_distance("stand", "stand") == 0
+    # Arrêt anticipé : au-delà du plafond, plafond + 1
+    assert levenshtein_distance("abc", "abcdef", max_distance=1) == 2
+
+def test_suggest_tolerates_misspellings_and_split_words(salon):
+    assert salon.suggest("ecotek")[0].label == "EcoTech Congo"
+    assert salon.suggest("tekinovation")[0].target.booth_number == "A12"
+    assert salon.suggest("fin tech brazaville")[0].label == "FinTech Brazzaville"
+    assert salon.suggest("sophie lorent", kinds=["speaker"])[0].label == "Dr. Sophie Laurent"
+    assert salon.suggest("zzzz") == []
+
+def test_fuzzy_index_counts_shared_keys():
+    index = FuzzyIndex()
+    index.add("speaker:paul", "Paul Makosso", "speaker")
+    index.add("speaker:paul", "Paul Makosso", "speaker")
+    index.remove("speaker:paul")
+    assert [m.label for m in index.search("paul makoso")] == ["Paul Makosso"]
+    index.remove("speaker:paul")
+    assert index.search("paul makoso") == []
+    assert len(index) == 0
+
+def test_suggest_follows_catalog_edits(salon):
+    salon.suggest("ecotek")
+    salon.remove_exhibitor("e2")
+    assert salon.suggest("ecotek", kinds=["exhibitor"]) == []
+
+# Tables de correspondance (stands, noms)
+
+def test_lookup_tables(salon):
+    lookup = ExhibitorLookup(salon.exhibitors)
+    assert normalize_booth("a-12") == "A12"
+    assert normalize_name("  Éco-Tech  Congo!") == "eco tech congo"
+    assert lookup.get_by_booth("a 12").id == "e1"
+    assert lookup.get_by_name("ecotech congo").id == "e2"
+    assert lookup.get_by_id("e3").booth_number == "C15"
+
+    lookup.remove(salon.exhibitors[0])
+    assert lookup.get_by_booth("A12") is None
+    assert len(lookup) == 2
+
+@pytest.mark.parametrize("text, booth", [
+    ("stand a 12 svp", "A12"),
+    ("où est A-12 ?", "A12"),
+    ("a12?", "A12"),
+    ("le stand numéro c 15", "C15"),
+    ("l'allée B 08", "B08"),
+    ("booth b08", "B08"),
+])
+def test_booth_found_in_sentence(salon, text, booth):
+    assert salon.find_exhibitor_by_booth_in_text(text).booth_number == booth
+
+@pytest.mark.parametrize("text", [
+    "il y a 12 stands",
+    "il y a 12 exposants ?",
+    "à 12 heures",
+    "rendez-vous à 12h",
+    "le programme a 15 conférences",
+    "c 15 minutes de marche",
+])
+def test_french_sentences_do_not_resolve_to_a_booth(salon, text):
+    assert salon.find_exhibitor_by_booth_in_text(text) is None
+
+def test_numeric_booth_needs_a_cue(salon):
+    salon.add_exhibitor(salon.exhibitors[0].copy(update={"id": "e9", "booth_number": "12"}))
+    assert salon.find_exhibitor_by_booth_in_text("il y a 12 exposants") is None
+    assert salon.find_exhibitor_by_booth_in_text("stand 12").id == "e9"
+
+# Mots-clés des intentions (reconnaissance en une passe)
+
+def test_intent_matcher_finds_all_intents_in_order():
+    match = intent_matcher.match("Où sont les toilettes près du café ?")
+    assert match.has("navigation.toilettes", "navigation.restauration")
+    assert match.with_prefix("query.") == ["navigation"]
+    assert match.zones == ["E"]
+    assert match.keywords == ["où", "toilettes", "café"]
+
+def test_intent_matcher_exact_and_accent_folding():
+    assert intent_matcher.match("today").is_exactly("schedule.today")
+    assert not intent_matcher.match("today please").is_exactly("schedule.today")
+    # Forme sans accent des mots longs, mais pas de "ou" pour "où"
+    assert intent_matcher.match("l'evenement de demain").has("query.événements", "schedule.tomorrow")
+    assert not intent_matcher.match("thé ou café").has("query.navigation")
+
+def test_intent_matcher_prefers_longest_keyword_at_word_start():
+    matcher = IntentMatcher({"short": ["tech"], "long": ["technologie"], "other": ["logie"]})
+    match = matcher.match("technologie")
+    assert match.intents == ["long"]
+    assert matcher.match("mytech").intents == []
+
+def test_intent_matcher_whole_words():
+    assert intent_matcher.match("planning de demain").has("navigation.map")
+    match = intent_matcher.match("planning de demain", whole_words=True)
+    assert match.keywords == ["demain"] and not match.has("navigation.map")
+    assert intent_matcher.match("les plans et les cafés", whole_words=True).keywords == ["plan", "café"]
+
+# Cache des sorties d'outils
+
+def test_tool_output_cache_lru_and_expiry():
+    cache = ToolOutputCache(max_entries=2)
+    now = datetime(2025, 6, 15, 10)
+    cache.set("a", 1)
+    cache.set("b", 2, expires_at=now + timedelta(minutes=5))
+    assert cache.get("a") == (True, 1)
+    cache.set("c", 3)
+    assert cache.get("b") == (False, None)  # évincé (le moins récemment utilisé)
+    cache.set("d", 4, expires_at=now)
+    assert cache.get("d", now) == (False, None)  # échu
+    assert cache.stats()["hits"] == 1
+
+class _CountingTool:
+    name = "counting"
+
+    def __init__(self, salon):
+        self.salon_data = salon
+        self.calls = 0
+
+    @cached_output()
+    def render(self, query: str) -> str:
+        self.calls += 1
+        return f"{query}:{self.salon_data.version}"
+
+def test_cached_output_is_keyed_by_input_and_salon_version(salon):
+    tool_cache.clear()
+    tool = _CountingTool(salon)
+    assert tool.render("Écologie") == tool.render("  ecologie ") == "Écologie:0"
+    assert tool.calls == 1
+
+    salon.remove_event("v2")
+    assert tool.render("Écologie") == "Écologie:1"
+    assert tool.calls == 2
+
+# Pagination des listes
+
+def test_cursor_round_trip_and_invalid_tokens():
+    assert decode_cursor(encode_cursor(40)) == 40
+    for token in ["!!bad", "zzzz", encode_cursor(-1)]:
+        with pytest.raises(ValueError):
+            decode_cursor(token)
+
+def test_parse_page_request():
+    assert parse_page_request("tous page=2 limit=10") == PageRequest("tous", 10, 10)
+    assert parse_page_request(f"Atelier cursor={encode_cursor(5)}") == PageRequest("Atelier", 5, 20)
+    assert parse_page_request("tous limit=500").limit == 100
+
+def test_paginate_and_footer():
+    page = paginate(iter(range(5)), PageRequest("", 0, 2))
+    assert page.items == [0, 1]
+    assert decode_cursor(page.next_cursor) == 2
+    assert "cursor=" in render_page_footer(page)
+
+    last = paginate(iter(range(5)), PageRequest("", 4, 2))
+    assert last.items == [4] and last.next_cursor is None
+    # Curseur périmé (liste raccourcie) : pas de "Éléments 11 à 10"
+    stale = paginate(iter(range(5)), PageRequest("", 10, 2))
+    assert "Éléments" not in render_page_footer(stale)
+
+@pytest.mark.parametrize("module, tool_name", [
+    ("app.tools.event_tools", "EventScheduleTool"),
+    ("app.tools.event_tools", "EventCategoryTool"),
+    ("app.tools.exhibitor_tools", "ExhibitorListTool"),
+])
+def test_list_tools_report_invalid_cursor(salon, module, tool_name):
+    pytest.importorskip("langchain")
+    import importlib
+    tool_class = getattr(importlib.import_module(module), tool_name)
+    tool = tool_class(salon)
+    assert tool._run("tous cursor=zzzz") == INVALID_CURSOR_MESSAGE
+
+# Instantané en colonnes du catalogue
+
+def test_catalog_snapshot_rows_match_models(salon):
+    catalog = salon.catalog
+    assert len(catalog.exhibitors) == 3 and len(catalog.events) == 3
+    first = catalog.exhibitors[0]
+    assert first.booth_number == "A12"
+    assert first.special_offers == salon.exhibitors[0].special_offers
+    assert catalog.exhibitors[-1].name == "FinTech Brazzaville"
+    assert catalog.events[1].dict()["start_time"] == datetime(2025, 6, 15, 14, 0)
+    with pytest.raises(IndexError):
+        catalog.exhibitors[3]
+    # Chaînes internées : une seule entrée par valeur distincte
+    assert len(catalog.strings) == len(set(catalog.strings))
+
+def test_catalog_snapshot_queries(salon):
+    catalog = salon.catalog
+    assert [row.id for row in catalog.exhibitors_in_category("technologie")] == ["e1"]
+    assert [row.id for row in catalog.events_in_category("ATELIER")] == ["v2"]
+    assert list(catalog.exhibitor_category_groups()) == ["Technologie", "Innovation", "Services"]
+    assert catalog.event_range(datetime(2025, 6, 15, 10), datetime(2025, 6, 15, 14)) == range(0, 2)
+    assert catalog.event_range(datetime(2025, 6, 15, 10), include_start=False) == range(1, 3)
+    assert [row.booth_number for row in catalog.exhibitors_with_booth_prefix("B")] == ["B08"]
+
+def test_catalog_snapshot_is_rebuilt_on_edits(salon):
+    catalog = salon.catalog
+    assert salon.catalog is catalog
+    salon.remove_event("v1")
+    assert salon.catalog is not catalog
+    assert [row.id for row in salon.catalog.events] == ["v2", "v3"]
+
+# Instantané binaire projeté en mémoire
+
+def test_snapshot_file_round_trip(salon, tmp_path):
+    path = str(tmp_path / "salon.snapshot")
+    catalog = salon.catalog
+    write_snapshot(catalog, path, {"name": salon.name})
+    snapshot = load_snapshot(path)
+    try:
+        assert snapshot.salon_id == "default" and snapshot.info == {"name": salon.name}
+        assert [row.dict() for row in snapshot.exhibitors] == [row.dict() for row in catalog.exhibitors]
+        assert [row.dict() for row in snapshot.events] == [row.dict() for row in catalog.events]
+        assert [row.id for row in snapshot.events_in_category("conférence")] == ["v1"]
+        assert snapshot.event_range(datetime(2025, 6, 15, 12)) == range(1, 3)
+    finally:
+        snapshot.close()
+
+def test_snapshot_file_rejects_invalid_files(tmp_path):
+    path = tmp_path / "bad.snapshot"
+    path.write_bytes(b"NOTASNAPSHOT" * 4)
+    with pytest.raises(SnapshotError):
+        load_snapshot(str(path))
+    with pytest.raises(SnapshotError):
+        load_snapshot(str(tmp_path / "missing.snapshot"))
+
+def test_build_snapshot_script_compiles_json(tmp_path):
+    import importlib.util
+    from pathlib import Path
+
+    script = Path(__file__).resolve().parent.parent / "scripts" / "build_snapshot.py"
+    spec = importlib.util.spec_from_file_location("build_snapshot", script)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    catalog, info = module.build_from_json(str(script.parent.parent / "data" / "sample_salon.json"))
+    assert len(catalog.exhibitors) == 3
+    assert catalog.exhibitors[0].id == "exh-1"
+    assert [row.start_time for row in catalog.events] == sorted(row.start_time for row in catalog.events)
+
+# Graphe des déplacements
+
+def _dijkstra(graph, source_key):
+    """Plus courts chemins sur le graphe complet, sans précalcul (référence)"""
+    best = {graph._ids[source_key]: 0.0}
+    heap = [(0.0, graph._ids[source_key])]
+    while heap:
+        distance, current = heapq.heappop(heap)
+        if distance > best[current]:
+            continue
+        for neighbor, weight in graph._adjacency[current]:
+            if distance + weight < best.get(neighbor, math.inf):
+                best[neighbor] = distance + weight
+                heapq.heappush(heap, (distance + weight, neighbor))
+    return {graph.nodes[i].key: d for i, d in best.items()}
+
+def test_venue_graph_matches_plain_dijkstra(salon):
+    graph = salon.venue_graph
+    for source in ["booth:A12", "booth:C15", "facility:E:Café", "room:espace débat"]:
+        expected = _dijkstra(graph, source)
+        for node in graph.nodes:
+            assert graph.measure(source, node.key)[0] == pytest.approx(expected[node.key])
+
+def test_venue_graph_route_between_zones(salon):
+    route = salon.venue_graph.shortest_path("booth:A12", "booth:C15")
+    assert [node.key for node in route.nodes] == ["booth:A12", "zone:A", "zone:C", "booth:C15"]
+    assert (route.distance, route.minutes) == (80.0, 4)
+    assert salon.venue_graph.shortest_path("booth:A12", "booth:Z99") is None
+
+def test_venue_graph_nearest_facility(salon):
+    graph = salon.venue_graph
+    route = graph.nearest("booth:C15", graph.facility_keys("Toilettes"))
+    assert route.nodes[-1].key == "facility:E:Toilettes"
+    assert route.distance == 85.0
+
+# Index spatial (stands et services les plus proches)
+
+def test_spatial_index_matches_brute_force():
+    import random
+
+    rng = random.Random(7)
+    index = SpatialIndex(cell_size=5.0)
+    points = [SpatialEntry(f"p{i}", "booth", f"P{i}", "A", rng.uniform(-40, 60), rng.uniform(0, 30))
+              for i in range(200)]
+    for entry in points:
+        index.add(entry)
+
+    for _ in range(20):
+        x, y = rng.uniform(-50, 70), rng.uniform(-10, 40)
+        by_distance = sorted(points, key=lambda e: math.hypot(e.x - x, e.y - y))
+        assert [m.entry.key for m in index.nearest(x, y, 7)] == [e.key for e in by_distance[:7]]
+        inside = [e.key for e in by_distance if math.hypot(e.x - x, e.y - y) <= 12.0]
+        assert [m.entry.key for m in index.within(x, y, 12.0)] == inside
+
+def test_spatial_index_move_remove_and_filter():
+    index = SpatialIndex()
+    index.add(SpatialEntry("booth:A1", "booth", "A1", "A", 0.0, 0.0))
+    index.add(SpatialEntry("facility:A:Café", "facility", "Café", "A", 30.0, 0.0))
+    assert index.nearest(25.0, 0.0, 1)[0].entry.key == "facility:A:Café"
+    assert index.nearest(25.0, 0.0, 1, predicate=lambda e: e.kind == "booth")[0].distance == 25.0
+
+    assert index.move("booth:A1", 26.0, 0.0)
+    assert index.nearest(25.0, 0.0, 1)[0].entry.key == "booth:A1"
+    assert index.remove("booth:A1") and not index.remove("booth:A1")
+    assert len(index) == 1 and "booth:A1" not in index
+
+def test_salon_spatial_index_follows_exhibitor_edits(salon):
+    index = salon.spatial_index
+    assert index.nearest(9.0, 3.0, 1)[0].entry.key == "booth:B08"
+    salon.remove_exhibitor("e2")
+    assert index.nearest(9.0, 3.0, 1, predicate=lambda e: e.kind == "booth")[0].entry.key == "booth:A12"
+
+# Itinéraire de visite (stands et événements)
+
+def _event_stop(event):
+    return TourStop(f"room:{event.location.lower()}", event.title,
+                    start_time=event.start_time, end_time=event.end_time)
+
+def test_tour_orders_booths_like_brute_force(salon):
+    from itertools import permutations
+
+    graph = salon.venue_graph
+    keys = ["booth:C15", "facility:E:Café", "booth:B08", "booth:A12", "facility:D:Laboratoire"]
+    tour = TourPlanner(graph).plan("zone:A", [TourStop(key, key) for key in keys], datetime(2025, 6, 15, 9))
+
+    def length(order):
+        stops = ["zone:A", *order]
+        return sum(graph.measure(a, b)[0] for a, b in zip(stops, stops[1:]))
+
+    assert sorted(s.stop.key for s in tour.stops) == sorted(keys)
+    assert tour.distance == pytest.approx(min(length(order) for order in permutations(keys)))
+
+def test_tour_keeps_events_on_time(salon):
+    v1, v2, v3 = salon.events
+    overlapping = v2.copy(update={"id": "v9", "location": "Espace Débat",
+                                  "start_time": v2.start_time + timedelta(minutes=30)})
+    stops = [TourStop("booth:C15", "C15"), _event_stop(v2), _event_stop(v1), _event_stop(overlapping),
+             TourStop("booth:Z99", "Z99")]
+    tour = TourPlanner(graph=salon.venue_graph).plan("booth:A12", stops, datetime(2025, 6, 15, 10, 30))
+
+    reasons = {stop.label: reason for stop, reason in tour.unscheduled}
+    assert reasons == {"Z99": "lieu inconnu", overlapping.title: "conflit d'horaire"}
+    events = [s for s in tour.stops if s.stop.is_event]
+    assert [s.stop.label for s in events] == [v1.title, v2.title]
+    for scheduled in events:
+        assert scheduled.arrival <= max(scheduled.stop.start_time, datetime(2025, 6, 15, 10, 30)) + timedelta(minutes=5)
+    arrivals = [s.arrival for s in tour.stops]
+    assert arrivals == sorted(arrivals)
+
+def test_tour_skips_finished_events(salon):
+    tour = TourPlanner(salon.venue_graph).plan("zone:A", [_event_stop(salon.events[0])],
+                                               datetime(2025, 6, 15, 12))
+    assert tour.stops == [] and tour.unscheduled[0][1] == "déjà terminé"
+
+# Réponses de navigation construites à partir du plan
+
+def _navigation_tool(name, salon):
+    pytest.importorskip("langchain")
+    from app.tools import navigation_tools
+
+    return getattr(navigation_tools, name)(salon)
+
+def _custom_layout():
+    from app.models.floor_plan import FacilityLayout, FloorPlanLayout, ZoneLayout
+
+    return FloorPlanLayout(zones=[
+        ZoneLayout(id="N", name="Hall Nord", facilities=[FacilityLayout(name="Accueil", distance=5.0)]),
+        ZoneLayout(id="S", name="Hall Sud", facilities=[FacilityLayout(name="Toilettes", distance=8.0),
+                                                        FacilityLayout(name="Café", distance=4.0)]),
+    ], connections=[{"from": "N", "to": "S", "distance": 40.0}])
+
+def test_facility_answers_follow_the_floor_plan(salon):
+    tool = _navigation_tool("NavigationTool", salon)
+    answer = tool._get_facilities_info("toilettes")
+    assert "Toilettes (Zone A - Hall Principal)" in answer
+    assert "Toilettes (Zone E - Restauration)" in answer
+
+    salon.layout = _custom_layout()
+    salon.reindex()
+    answer = tool._get_facilities_info("toilettes")
+    assert "Zone S - Hall Sud" in answer and "Zone E" not in answer
+    assert "Aucun service" in tool._get_facilities_info("sortie")
+
+def test_navigation_help_and_zone_services_follow_the_floor_plan(salon):
+    salon.layout = _custom_layout()
+    salon.reindex()
+    help_text = _navigation_tool("NavigationTool", salon)._general_navigation_help()
+    assert "Zone N - Hall Nord (Accueil)" in help_text
+    assert "Zone S - Hall Sud (Toilettes, Café)" in help_text
+    assert "Zone E" not in help_text
+
+    proximity = _navigation_tool("ProximityTool", salon)
+    assert proximity._get_zone_services("S") == ["🚻 Toilettes", "☕ Café"]
+    assert proximity._get_zone_services("E") == []
+
+# Matrice des trajets (lots de l'API)
+
+def test_route_matrix_matches_graph_measure(salon):
+    graph = salon.venue_graph
+    graph.set_congestion({"B": 3.0, "E": 1.3})
+    matrix = graph.matrix
+    pairs = [(a.key, b.key) for a in graph.nodes for b in graph.nodes]
+    result = matrix.measure_pairs(pairs)
+    for i, (a, b) in enumerate(pairs):
+        distance, cost = graph.measure(a, b)
+        assert result.distance[i] == pytest.approx(distance, abs=1e-3)
+        assert result.cost[i] == pytest.approx(cost, abs=1e-3)
+
+    steps = matrix.path(matrix.resolve("A12"), matrix.resolve("facility:E:Café"))
+    route = graph.shortest_path("booth:A12", "facility:E:Café")
+    assert [matrix.keys[step] for step in steps] == [node.key for node in route.nodes]
+
+    batch = matrix.measure_pairs([("a12", "C15"), ("A12", "Z99")])
+    assert list(batch.known) == [True, False]
+    assert [key for key, _, _ in matrix.rank_from("A12")] == ["booth:C15", "booth:B08"]
+
+def test_venue_graph_is_kept_across_catalog_edits(salon):
+    graph = salon.venue_graph
+    matrix = graph.matrix
+    salon.add_exhibitor(salon.exhibitors[0].copy(update={"description": "Nouvelle offre"}))
+    salon.add_event(salon.events[0].copy(update={"id": "v4", "title": "Rediffusion"}))
+    salon.remove_event("v4")
+    assert salon.venue_graph is graph and graph.matrix is matrix
+
+def test_venue_graph_is_rebuilt_on_layout_changes(salon):
+    def rebuilt(edit):
+        graph = salon.venue_graph
+        edit()
+        return salon.venue_graph is not graph
+
+    assert rebuilt(lambda: salon.add_exhibitor(salon.exhibitors[0].copy(update={"location_x": 30.0})))
+    assert salon.venue_graph.node("booth:A12").x == 30.0
+    assert rebuilt(lambda: salon.add_exhibitor(salon.exhibitors[0].copy(update={"id": "e4", "booth_number": "D01",
+                                                                                "zone": "D"})))
+    assert rebuilt(lambda: salon.remove_exhibitor("e4"))
+    assert rebuilt(lambda: salon.add_event(salon.events[0].copy(update={"location": "Salle Panorama"})))
+    assert "room:salle panorama" in salon.venue_graph
+    assert rebuilt(salon.reindex)
+    assert salon.floor_plan.layout_version == salon.layout_version
+
+# Exécution asynchrone des outils
+
+class _SlowTool:
+    name = "slow_tool"
+
+    def __init__(self, delay=0.1):
+        self.delay = delay
+
+    def _run(self, query):
+        import threading
+        import time
+
+        if query == "boom":
+            raise ValueError(query)
+        time.sleep(self.delay)
+        return f"{query}@{threading.current_thread().name}"
+
+def test_run_tool_runs_tools_concurrently_off_the_event_loop():
+    import asyncio
+    import time
+    from app.tools.executor import run_tool
+
+    tool = _SlowTool()
+
+    async def scenario():
+        ticks = []
+
+        async def heartbeat():
+            while True:
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.01)
+
+        beat = asyncio.create_task(heartbeat())
+        started = time.perf_counter()
+        results = await asyncio.gather(run_tool(tool._run, "a"), run_tool(tool._run, query="b"))
+        elapsed = time.perf_counter() - started
+        beat.cancel()
+        return results, elapsed, ticks
+
+    results, elapsed, ticks = asyncio.run(scenario())
+    assert [r.split("@")[0] for r in results] == ["a", "b"]
+    assert all(r.split("@")[1].startswith("tool") for r in results)
+    # Les deux appels se chevauchent et la boucle reste disponible pendant leur exécution
+    assert elapsed < 0.19
+    assert len(ticks) >= 5
+
+def test_run_tool_records_duration_and_errors_per_tool():
+    import asyncio
+    from app.tools.executor import run_tool
+    from app.utils.metrics import TOOL_ERRORS_TOTAL, TOOL_SECONDS
+
+    tool = _SlowTool(delay=0)
+    calls = TOOL_SECONDS.labels("slow_tool").count
+    errors = TOOL_ERRORS_TOTAL.labels("slow_tool").value
+
+    asyncio.run(run_tool(tool._run, "ok"))
+    with pytest.raises(ValueError):
+        asyncio.run(run_tool(tool._run, "boom"))
+    assert TOOL_SECONDS.labels("slow_tool").count == calls + 2
+    assert TOOL_ERRORS_TOTAL.labels("slow_tool").value == errors + 1
+
+@pytest.mark.parametrize("module, tool_name, query", [
+    ("exhibitor_tools", "ExhibitorInfoTool", "A12"),
+    ("event_tools", "EventScheduleTool", "programme"),
+    ("navigation_tools", "NavigationTool", "toilettes"),
+])
+def test_async_tools_match_their_sync_version(salon, module, tool_name, query):
+    pytest.importorskip("langchain")
+    import asyncio
+    import importlib
+
+    tool_class = getattr(importlib.import_module(f"app.tools.{module}"), tool_name)
+    tool = tool_class(salon)
+    assert tool.salon_data is salon
+    assert asyncio.run(tool._arun(query)) == tool._run(query)
+
+def test_event_search_tool_lists_ties_in_programme_order(salon):
+    pytest.importorskip("langchain")
+    from app.tools.event_tools import EventScheduleTool
+
+    output = EventScheduleTool(salon)._run("avenir")
+    assert "(2 résultats)" in output
+    assert output.index("Conférence sur l'IA") < output.index("Table Ronde Fintech")
+
+# Métriques (histogrammes à fenêtre glissante, export Prometheus)
+
+def test_histogram_buckets_bound_the_relative_error():
+    from app.utils.metrics import BUCKET_COUNT, SUB_BUCKETS, bucket_index, bucket_value
+
+    # Milieu d'un sous-intervalle : au plus une demi-largeur d'écart
+    tolerance = 1 / (2 * SUB_BUCKETS)
+    previous = -1
+    for micros in list(range(0, 5000)) + [10 ** k + d for k in range(4, 11) for d in (-1, 0, 1, 12345)]:
+        index = bucket_index(micros)
+        assert previous <= index < BUCKET_COUNT
+        previous = index
+        assert abs(bucket_value(index) - micros) <= max(micros * tolerance, 0.5)
+    assert bucket_index(-5) == 0
+    assert bucket_index(1 << 60) == BUCKET_COUNT - 1
+
+def test_histogram_quantiles_match_exact_percentiles_over_the_window(monkeypatch):
+    import random
+    import time
+    from app.utils.metrics import Histogram
+
+    clock = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: clock[0])
+    histogram = Histogram("test_seconds", "Test", window_seconds=60, slices=6)
+    assert all(math.isnan(v) for v in histogram.labels().quantiles().values())
+
+    rng = random.Random(7)
+    samples = sorted(rng.lognormvariate(-3, 1) for _ in range(5000))
+    for value in samples:
+        histogram.observe(value)
+    quantiles = histogram.labels().quantiles()
+    for q in (0.5, 0.9, 0.99, 1.0):
+        exact = samples[max(math.ceil(q * len(samples)), 1) - 1]
+        assert quantiles[q] == pytest.approx(exact, rel=0.04)
+
+    # Hors de la fenêtre, seules les nouvelles mesures comptent ; les cumuls restent
+    clock[0] += 61
+    histogram.observe(2.0)
+    assert histogram.labels().quantiles()[0.5] == pytest.approx(2.0, rel=0.03)
+    assert histogram.labels().count == 5001
+    assert histogram.labels().sum == pytest.approx(sum(samples) + 2.0)
+
+def test_metrics_registry_renders_prometheus_text():
+    from app.utils.metrics import MetricsRegistry
+
+    registry = MetricsRegistry()
+    requests = registry.counter("test_requests_total", "Requêtes", ["path"])
+    requests.labels('a"b\\c').inc()
+    requests.labels("agent").inc(2)
+    with pytest.raises(ValueError):
+        requests.labels("agent", "extra")
+    registry.gauge("test_queue", "File").set(3)
+    registry.gauge("test_broken", "Jauge en erreur").set_function(lambda: 1 / 0)
+    latency = registry.histogram("test_seconds", "Latence")
+    with latency.time():
+        pass
+    with pytest.raises(ValueError):
+        registry.counter("test_queue", "Doublon")
+
+    lines = registry.render().splitlines()
+    assert lines[:4] == ["# HELP test_requests_total Requêtes", "# TYPE test_requests_total counter",
+                         'test_requests_total{path="a\\"b\\\\c"} 1', 'test_requests_total{path="agent"} 2']
+    assert "test_queue 3" in lines and "test_broken NaN" in lines
+    assert "# TYPE test_seconds summary" in lines
+    assert [line.split(" ")[0] for line in lines if line.startswith("test_seconds")] == [
+        'test_seconds{quantile="0.5"}', 'test_seconds{quantile="0.9"}', 'test_seconds{quantile="0.99"}',
+        'test_seconds{quantile="1"}', "test_seconds_sum", "test_seconds_count"]
+    assert "test_seconds_count 1" in lines